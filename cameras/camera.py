@@ -0,0 +1,249 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+import numpy as np
+
+from ..utils.vector import Vec3
+from ..utils.matrix import Mat3x4, Mat4x4
+
+__all__ = ['Camera']
+
+#####################################################################
+# Camera class
+# ============
+# A camera looking from an eye point at a target point, with either a
+# perspective or an orthographic projection onto an image of width by
+# height pixels. It provides:
+# - The world to view space affine matrix (calc_view_mat)
+# - The view to clip space projection matrix (calc_projection_mat)
+# - The combined world to clip space matrix (calc_view_projection_mat)
+# - View space positions of an array of points (to_view)
+# - Clip, NDC and screen coordinates of an array of points (project)
+# - The six planes of the view frustum (calc_frustum_planes)
+#
+# View space follows OpenGL: the camera looks down -z with y up, and
+# the near and far planes map to -1 and 1 in NDC. Screen coordinates
+# are in pixels from the top left corner of the image.
+#
+# The matrices are cached, and dropped whenever one of the camera
+# parameters is set, which also bumps the camera's version, so other
+# caches can tell if the camera has moved.
+class Camera:
+  """A perspective or orthographic camera"""
+
+  # The parameters the matrices depend on
+  parameters = ['eye', 'target', 'up', 'projection', 'fov', 'ortho_height',
+                'near', 'far', 'width', 'height']
+
+  projections = ['perspective', 'orthographic']
+
+  # Camera constructor
+  # ------------------
+  # This constructor takes only keyword arguments:
+  # - eye: the position of the camera
+  # - target: the point the camera looks at
+  # - up: a direction that is up in the image
+  # - projection: 'perspective' or 'orthographic'
+  # - fov: the vertical field of view of a perspective camera, in
+  #   radians
+  # - ortho_height: the height of the view of an orthographic camera,
+  #   in scene units
+  # - near, far: the distances of the near and far clipping planes
+  # - width, height: the size of the image in pixels
+  def __init__(self, eye=(0,0,5), target=(0,0,0), up=(0,1,0), projection='perspective',
+               fov=np.pi/4, ortho_height=2., near=0.1, far=100., width=640, height=480):
+    """Constructor for the Camera class"""
+    self.__dict__['cache'] = {}
+    self.__dict__['version'] = 0
+    self.set(eye=eye, target=target, up=up, projection=projection, fov=fov,
+             ortho_height=ortho_height, near=near, far=far, width=width, height=height)
+
+  # Setting parameters
+  # ------------------
+  # Parameters can be set one at a time as attributes, or several at
+  # once with set. Either way the cached matrices are dropped.
+  def __setattr__(self, name, value):
+    if name in self.parameters:
+      self.set(**{name: value})
+    else:
+      self.__dict__[name] = value
+
+  def set(self, **params):
+    """Sets camera parameters and drops the cached matrices"""
+    for name, value in params.items():
+      if name not in self.parameters:
+        raise AttributeError("Camera has no parameter {}".format(name))
+      if name in ('eye', 'target', 'up'):
+        value = np.asarray(getattr(value, 'array', value), dtype=np.float64).reshape(3)
+      elif name == 'projection' and value not in self.projections:
+        raise ValueError("Camera projection must be one of {}".format(self.projections))
+      self.__dict__[name] = value
+    if self.__dict__.get('near', 1.) <= 0 and self.__dict__.get('projection') == 'perspective':
+      raise ValueError("A perspective camera needs a positive near distance")
+    self.__dict__['version'] += 1
+    self.cache.clear()
+
+  def cached(self, key, func, *args):
+    """Returns a cached value, calling func(*args) on a miss"""
+    if key not in self.cache:
+      self.cache[key] = func(*args)
+    return( self.cache[key])
+
+  @property
+  def aspect(self):
+    """Width over height of the image"""
+    return( float(self.width)/self.height)
+
+  # calc_view_mat method
+  # --------------------
+  # Returns the Mat3x4 that takes world space to view space. Its rows
+  # are the right, up and backward directions of the camera, and it
+  # moves the eye to the origin.
+  def calc_view_mat(self):
+    """Returns the world to view space matrix"""
+    return( self.cached('view_mat', self._calc_view_mat))
+
+  def _calc_view_mat(self):
+    forward = self.target-self.eye
+    if not np.any(forward):
+      raise ValueError("Camera eye and target must be different points")
+    forward = forward/np.linalg.norm(forward)
+    right = np.cross(forward, self.up)
+    if np.linalg.norm(right) < 1.e-12:
+      raise ValueError("Camera up direction must not be along the view direction")
+    right = right/np.linalg.norm(right)
+    up = np.cross(right, forward)
+    R = np.stack([right, up, -forward])
+    return( Mat3x4(np.concatenate([R, -np.dot(R, self.eye)[:,np.newaxis]], axis=1)))
+
+  # calc_projection_mat method
+  # --------------------------
+  # Returns the Mat4x4 that takes view space to clip space, with the
+  # same layout as the OpenGL perspective and orthographic matrices.
+  def calc_projection_mat(self):
+    """Returns the view to clip space matrix"""
+    return( self.cached('projection_mat', self._calc_projection_mat))
+
+  def _calc_projection_mat(self):
+    n, f = self.near, self.far
+    m = np.zeros((4,4))
+    if self.projection == 'perspective':
+      t = 1./np.tan(0.5*self.fov)
+      m[0,0] = t/self.aspect
+      m[1,1] = t
+      m[2,2] = (f+n)/(n-f)
+      m[2,3] = 2.*f*n/(n-f)
+      m[3,2] = -1.
+    else:
+      h = 0.5*self.ortho_height
+      m[0,0] = 1./(h*self.aspect)
+      m[1,1] = 1./h
+      m[2,2] = 2./(n-f)
+      m[2,3] = (f+n)/(n-f)
+      m[3,3] = 1.
+    return( Mat4x4(m))
+
+  # calc_view_projection_mat method
+  # -------------------------------
+  # Returns the Mat4x4 that takes world space straight to clip space.
+  def calc_view_projection_mat(self):
+    """Returns the world to clip space matrix"""
+    return( self.cached('view_projection_mat', self._calc_view_projection_mat))
+
+  def _calc_view_projection_mat(self):
+    return( self.calc_projection_mat().dot(self.calc_view_mat().to_square()))
+
+  # to_view method
+  # --------------
+  # Returns the (N,3) view space positions of an (N,3) array of world
+  # space points.
+  def to_view(self, points):
+    """Returns the view space positions of an array of points"""
+    m = self.calc_view_mat().array
+    points = np.asarray(points, dtype=np.float32).reshape(-1,3)
+    return( np.dot(points, m[:,:3].T)+m[:,3])
+
+  # to_clip method
+  # --------------
+  # Returns the (N,4) clip space coordinates of an (N,3) array of world
+  # space points.
+  def to_clip(self, points):
+    """Returns the clip space coordinates of an array of points"""
+    m = self.calc_view_projection_mat().array
+    points = np.asarray(points, dtype=np.float32).reshape(-1,3)
+    return( np.dot(points, m[:,:3].T.astype(np.float32))+m[:,3].astype(np.float32))
+
+  # project method
+  # --------------
+  # Projects an (N,3) array of world space points in one pass and
+  # returns three arrays:
+  # - ndc: the (N,3) normalized device coordinates
+  # - screen: the (N,3) pixel x and y from the top left corner, and the
+  #   depth from 0 at the near plane to 1 at the far plane
+  # - inside: an (N,) bool array, True for points inside the frustum
+  # Points on or behind the plane of the eye (w <= 0) have no
+  # projection, their coordinates are NaN and they are not inside.
+  def project(self, points):
+    """Returns the NDC and screen coordinates of an array of points"""
+    clip = self.to_clip(points)
+    w = clip[:,3]
+    front = w > 0
+    ndc = clip[:,:3]/np.where(front, w, np.float32(1))[:,np.newaxis]
+    ndc[~front] = np.nan
+    inside = front & np.all(np.abs(clip[:,:3]) <= w[:,np.newaxis], axis=1)
+    screen = np.empty_like(ndc)
+    screen[:,0] = 0.5*(ndc[:,0]+1)*self.width
+    screen[:,1] = 0.5*(1-ndc[:,1])*self.height
+    screen[:,2] = 0.5*(ndc[:,2]+1)
+    return( ndc, screen, inside)
+
+  # calc_rays method
+  # ----------------
+  # The inverse of project: returns the (N,3) world space origins and
+  # unit directions of the rays through an (N,) array of pixel x and y
+  # positions, measured like screen coordinates from the top left
+  # corner, so pixel centers are at whole numbers plus one half. The
+  # rays of a perspective camera all start at the eye, those of an
+  # orthographic camera start on the plane of the eye.
+  def calc_rays(self, px, py):
+    """Returns the origins and directions of the rays through pixels"""
+    m = self.calc_view_mat().array
+    x = (2.*np.asarray(px, dtype=np.float64).ravel()/self.width-1)
+    y = (1-2.*np.asarray(py, dtype=np.float64).ravel()/self.height)
+    if self.projection == 'perspective':
+      t = np.tan(0.5*self.fov)
+      view = np.stack([x*t*self.aspect, y*t, -np.ones_like(x)], axis=1)
+      directions = np.dot(view, m[:,:3])
+      directions /= np.linalg.norm(directions, axis=1)[:,np.newaxis]
+      origins = np.broadcast_to(self.eye, directions.shape)
+    else:
+      h = 0.5*self.ortho_height
+      origins = self.eye+np.outer(x*h*self.aspect, m[0,:3])+np.outer(y*h, m[1,:3])
+      directions = np.broadcast_to(-m[2,:3], origins.shape)
+    return( origins.astype(np.float32), directions.astype(np.float32))
+
+  # calc_frustum_planes method
+  # --------------------------
+  # Returns the (6,4) array of the left, right, bottom, top, near and
+  # far planes of the view frustum. A world space point p is on the
+  # inside of plane (a,b,c,d) if a*p[0]+b*p[1]+c*p[2]+d >= 0. The
+  # normals (a,b,c) have length one, so the value is a distance.
+  def calc_frustum_planes(self):
+    """Returns the planes of the view frustum"""
+    return( self.cached('frustum_planes', self._calc_frustum_planes))
+
+  def _calc_frustum_planes(self):
+    m = self.calc_view_projection_mat().array.astype(np.float64)
+    planes = np.stack([m[3]+m[0], m[3]-m[0], m[3]+m[1], m[3]-m[1], m[3]+m[2], m[3]-m[2]])
+    return( planes/np.linalg.norm(planes[:,:3], axis=1)[:,np.newaxis])
+
+  # calc_visible_spheres method
+  # ---------------------------
+  # Returns an (N,) bool array that is False for the spheres that are
+  # entirely outside the view frustum, for culling.
+  def calc_visible_spheres(self, centers, radii):
+    """Tests an array of bounding spheres against the view frustum"""
+    planes = self.calc_frustum_planes()
+    centers = np.asarray(centers, dtype=np.float64).reshape(-1,3)
+    dist = np.dot(centers, planes[:,:3].T)+planes[:,3]
+    return( np.all(dist >= -np.asarray(radii, dtype=np.float64).reshape(-1,1), axis=1))
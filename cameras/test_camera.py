@@ -0,0 +1,50 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+from camera import *
+
+import unittest
+import numpy as np
+
+class TestCamera(unittest.TestCase):
+
+  # Test that the target lands in the middle of the image, and that
+  # points behind the camera are clipped
+  def test_project(self):
+    c = Camera(eye=(0,0,5), target=(0,0,0), width=200, height=100)
+    ndc, screen, inside = c.project([[0,0,0],[0,0,10],[0,0,-200]])
+    self.assertTrue(np.allclose(screen[0,:2], [100,50]))
+    self.assertTrue(0 < screen[0,2] < 1)
+    self.assertTrue(np.all(np.isnan(ndc[1])))
+    self.assertEqual(inside.tolist(), [True, False, False])
+
+  # Test that the matrices are cached until a parameter changes
+  def test_cache(self):
+    c = Camera(projection='orthographic', ortho_height=4.)
+    m = c.calc_view_projection_mat()
+    self.assertIs(m, c.calc_view_projection_mat())
+    ndc, screen, inside = c.project([[0,2,0]])
+    self.assertAlmostEqual(ndc[0,1], 1., places=5)
+    version = c.version
+    c.eye = (5,0,0)
+    self.assertGreater(c.version, version)
+    self.assertIsNot(m, c.calc_view_projection_mat())
+    self.assertTrue(np.allclose(c.to_view([[0,0,0]]), [[0,0,-5]], atol=1e-6))
+
+  # Test that points along the rays through pixels project back onto
+  # those pixels
+  def test_rays(self):
+    px, py = np.array([0.5, 100., 150.25]), np.array([0.5, 50., 80.75])
+    for projection in Camera.projections:
+      c = Camera(eye=(1,2,5), target=(0,0,0), projection=projection, width=200, height=100)
+      origins, directions = c.calc_rays(px, py)
+      self.assertTrue(np.allclose(np.linalg.norm(directions, axis=1), 1, atol=1e-6))
+      ndc, screen, inside = c.project(origins+3*directions)
+      self.assertTrue(np.allclose(screen[:,0], px, atol=1e-3))
+      self.assertTrue(np.allclose(screen[:,1], py, atol=1e-3))
+
+  # Test that spheres outside the frustum are culled
+  def test_frustum(self):
+    c = Camera(eye=(0,0,5), target=(0,0,0))
+    visible = c.calc_visible_spheres([[0,0,0],[100,0,0],[0,0,10]], [1,1,1])
+    self.assertEqual(visible.tolist(), [True, False, False])
@@ -0,0 +1,453 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+import os
+import re
+import sys
+import time
+import numpy as np
+
+from ..utils.vector import index_dtype
+from ..renderables.surface import Surface, find_bad_faces, format_face_list
+
+__all__ = ['read_obj', 'read_ply', 'read_stl', 'load_surface', 'measure_load']
+
+#####################################################################
+# Mesh importers
+# ==============
+# Readers for OBJ, PLY (ascii and binary) and STL (binary and ascii)
+# files that build array backed surfaces. The files are read a block of
+# chunk_bytes at a time, and each block is parsed in bulk with numpy,
+# so only the finished arrays and one block are in memory at once:
+# - The lines of one kind in a block of text are found with one regular
+#   expression search, and their numbers are read with one call to
+#   np.fromstring
+# - Binary records are read with np.frombuffer as structured arrays
+# Polygons are split into triangle fans. The face indices are checked
+# in one pass before the surfaces are built with Surface.from_arrays.
+
+chunk_bytes = 1 << 24
+
+# The numpy types of the PLY property types
+ply_types = {'char': 'i1', 'int8': 'i1', 'uchar': 'u1', 'uint8': 'u1',
+             'short': 'i2', 'int16': 'i2', 'ushort': 'u2', 'uint16': 'u2',
+             'int': 'i4', 'int32': 'i4', 'uint': 'u4', 'uint32': 'u4',
+             'float': 'f4', 'float32': 'f4', 'double': 'f8', 'float64': 'f8'}
+
+# The layout of one triangle in a binary STL file
+stl_dtype = np.dtype([('normal', '<f4', 3),
+                      ('corners', '<f4', (3,3)),
+                      ('attribute', '<u2')])
+
+# iter_text_blocks function
+# -------------------------
+# Yields the text of an open binary file in blocks of about chunk_bytes
+# that end at the end of a line. A line cut by the end of a block is
+# carried over to the next one.
+def iter_text_blocks(f, size=None):
+  """Yields blocks of whole lines read a block at a time"""
+  size = size or chunk_bytes
+  rest = b''
+  while True:
+    block = f.read(size)
+    if not block:
+      if rest:
+        yield rest
+      return
+    block = rest+block
+    cut = block.rfind(b'\n')
+    if cut < 0:
+      rest = block
+      continue
+    rest = block[cut+1:]
+    yield block[:cut+1]
+
+# find_lines function
+# -------------------
+# Returns the lines of a block of text that start with a keyword, with
+# the keyword removed, joined into one string, and the number of lines.
+# The lines are found with one regular expression search over the block.
+def find_lines(block, keyword, pattern=None):
+  """Returns the joined lines starting with a keyword and their number"""
+  pattern = pattern or re.compile(rb'^[ \t]*'+re.escape(keyword)+rb'[ \t][^\n]*', re.M)
+  lines = pattern.findall(block)
+  return( b'\n'.join(lines).replace(keyword, b' '), len(lines))
+
+# parse_numbers function
+# ----------------------
+# Reads all of the numbers in a string, or a list of lines, with one
+# call to np.fromstring.
+def parse_numbers(text, dtype=np.float64):
+  """Returns the numbers in a string as one flat array"""
+  if isinstance(text, list):
+    text = b' '.join(text)
+  if not text.strip():
+    return( np.zeros(0, dtype=dtype))
+  return( np.fromstring(text, dtype=dtype, sep=' '))
+
+# fan_triangulate function
+# ------------------------
+# Splits polygons into triangle fans. The polygons are given as one flat
+# array of corner indices and the number of corners of each polygon.
+# Polygon i with corners c0, c1, ..., ck becomes the triangles
+# (c0, c1, c2), (c0, c2, c3), ..., (c0, ck-1, ck).
+def fan_triangulate(indices, counts):
+  """Returns the (F,3) triangles of a set of polygons"""
+  counts = np.asarray(counts, dtype=np.int64)
+  if np.any(counts < 3):
+    raise ValueError("Every polygon must have at least 3 corners")
+  starts = np.cumsum(counts)-counts
+  triangles = counts-2
+  if np.all(triangles == 1):
+    return( indices.reshape(-1,3))
+  first = np.repeat(starts, triangles)
+  step = np.arange(len(first))-np.repeat(np.cumsum(triangles)-triangles, triangles)+1
+  return( np.stack([indices[first], indices[first+step], indices[first+step+1]], axis=1))
+
+# weld_vertices function
+# ----------------------
+# Merges vertices with exactly the same position. Takes an (N,3) float32
+# array and returns the (V,3) unique positions and the index of each
+# input vertex in them. The positions are compared as 12 byte strings,
+# after -0.0 is turned into 0.0.
+def weld_vertices(points):
+  """Returns the unique vertices and the index of every input vertex"""
+  points = np.ascontiguousarray(points, dtype=np.float32)+np.float32(0)
+  keys = points.view(np.dtype((np.void, 12))).ravel()
+  _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+  return( points[first], inverse.ravel())
+
+# Indices are checked, then stored in the smallest type for the number
+# of vertices
+def face_index_array(faces, num_vertices):
+  faces = np.asarray(faces).reshape(-1,3)
+  bad = find_bad_faces(faces, num_vertices)
+  if len(bad):
+    raise AttributeError("Faces {} reference indices which are not in the vertex array".format(
+      format_face_list(bad)))
+  return( faces.astype(index_dtype(num_vertices), copy=False))
+
+
+#####################################################################
+# OBJ files
+# =========
+# Only the vertex positions (`v` lines) and faces (`f` lines) are read.
+# The texture and normal indices of a corner (`f 1/2/3 ...`) are dropped,
+# and negative indices count back from the last vertex read so far.
+
+# The vertex and face lines, and everything after the first slash of
+# a face corner
+obj_vertex_lines = re.compile(rb'^v[ \t][^\n]*', re.M)
+obj_face_lines = re.compile(rb'^f[ \t][^\n]*', re.M)
+obj_corner_tail = re.compile(rb'/\S*')
+
+def read_obj(path, trans=[], **kwargs):
+  """Reads an OBJ file into a Surface"""
+  vertex_blocks = []
+  index_blocks = []
+  count_blocks = []
+  num_vertices = 0
+  with open(path, 'rb') as f:
+    for block in iter_text_blocks(f):
+      v_text, nv = find_lines(block, b'v', obj_vertex_lines)
+      f_text, nf = find_lines(block, b'f', obj_face_lines)
+      if nv:
+        v = parse_numbers(v_text)
+        if len(v) != 3*nv:
+          # Some lines have a w coordinate or a color
+          v = np.array([l.split()[:3] for l in v_text.split(b'\n')], dtype=np.float64)
+        vertex_blocks.append( v.astype(np.float32).reshape(-1,3))
+      if nf:
+        f_text = obj_corner_tail.sub(b'', f_text)
+        indices = parse_numbers(f_text, np.int64)
+        # Lines of three corners are all triangles, as no polygon has
+        # less than three
+        if len(indices) == 3*nf:
+          counts = np.full(nf, 3, dtype=np.int64)
+        else:
+          counts = np.array([len(l.split()) for l in f_text.split(b'\n')], dtype=np.int64)
+        if len(indices) != np.sum(counts):
+          raise ValueError("Unreadable face in {}".format(path))
+        negative = indices < 0
+        if np.any(negative):
+          # The number of vertices before each face line
+          kinds = [l[:1] for l in block.split(b'\n') if l[:2] in (b'v ', b'f ', b'v\t', b'f\t')]
+          is_v = np.array([k == b'v' for k in kinds])
+          before = num_vertices+np.cumsum(is_v)[~is_v]
+          indices[negative] += np.repeat(before, counts)[negative]+1
+        index_blocks.append( indices-1)
+        count_blocks.append( counts)
+      num_vertices += nv
+  vertices = np.concatenate(vertex_blocks) if vertex_blocks else np.zeros((0,3), dtype=np.float32)
+  indices = np.concatenate(index_blocks) if index_blocks else np.zeros(0, dtype=np.int64)
+  counts = np.concatenate(count_blocks) if count_blocks else np.zeros(0, dtype=np.int64)
+  faces = face_index_array(fan_triangulate(indices, counts), len(vertices))
+  return( Surface.from_arrays(vertices, faces, trans=trans, **kwargs))
+
+
+#####################################################################
+# PLY files
+# =========
+# The header lists the elements of the file, each with a count and a
+# list of properties. The `vertex` element gives the positions from its
+# x, y and z properties, and the `face` element gives the polygons from
+# its list property. Other elements are read and dropped.
+
+# read_ply_header function
+# ------------------------
+# Returns the format and a list of elements, each a tuple of the name,
+# the count and a list of properties. A property is a tuple of the name,
+# the numpy type, and for list properties the numpy type of the count.
+def read_ply_header(f):
+  """Reads the header of a PLY file"""
+  if f.readline().strip() != b'ply':
+    raise ValueError("Not a PLY file")
+  fmt = None
+  elements = []
+  while True:
+    line = f.readline()
+    if not line:
+      raise ValueError("The PLY header has no end_header")
+    words = line.decode('ascii').split()
+    if not words or words[0] in ('comment', 'obj_info'):
+      continue
+    if words[0] == 'end_header':
+      break
+    if words[0] == 'format':
+      fmt = words[1]
+    elif words[0] == 'element':
+      elements.append( (words[1], int(words[2]), []))
+    elif words[0] == 'property' and words[1] == 'list':
+      elements[-1][2].append( (words[4], ply_types[words[3]], ply_types[words[2]]))
+    elif words[0] == 'property':
+      elements[-1][2].append( (words[2], ply_types[words[1]], None))
+  if fmt not in ('ascii', 'binary_little_endian', 'binary_big_endian'):
+    raise ValueError("Unknown PLY format {}".format(fmt))
+  return( fmt, elements)
+
+# The record type of a binary element, with k entries in its list
+# property
+def ply_record_dtype(props, endian, k=0):
+  fields = []
+  for name, dtype, count_type in props:
+    if count_type is None:
+      fields.append( (name, endian+dtype))
+    else:
+      fields.append( (name+'_count', endian+count_type))
+      fields.append( (name, endian+dtype, (k,)))
+  return( np.dtype(fields))
+
+# iter_binary_records function
+# ----------------------------
+# Yields the records of one binary element as structured arrays. An
+# element without a list property has records of a fixed size, and is
+# read a block at a time. With a list property the records are read in
+# runs with the same list length: the length of the first record picks
+# the record type, a window of records is read with it, and the run
+# ends at the first record with another length. The window shrinks
+# after a short run and grows again after a long one.
+def iter_binary_records(f, props, count, endian):
+  """Yields the records of a binary PLY element"""
+  lists = [p for p in props if p[2] is not None]
+  if len(lists) > 1:
+    raise ValueError("PLY elements with more than one list property are not supported")
+  if not lists:
+    dtype = ply_record_dtype(props, endian)
+    step = max(chunk_bytes//dtype.itemsize, 1)
+    for lo in range(0, count, step):
+      n = min(step, count-lo)
+      data = f.read(n*dtype.itemsize)
+      if len(data) < n*dtype.itemsize:
+        raise ValueError("The PLY file ends inside an element")
+      yield np.frombuffer(data, dtype=dtype)
+    return
+  name = lists[0][0]
+  head = ply_record_dtype(props[:props.index(lists[0])+1], endian)
+  count_field = name+'_count'
+  buf = b''
+  pos = 0
+  window = max_window = max(chunk_bytes//head.itemsize, 1)
+  while count > 0:
+    if len(buf)-pos < head.itemsize:
+      data = f.read(chunk_bytes)
+      if not data:
+        raise ValueError("The PLY file ends inside an element")
+      buf = buf[pos:]+data
+      pos = 0
+    k = int(np.frombuffer(buf, dtype=head, count=1, offset=pos)[count_field][0])
+    dtype = ply_record_dtype(props, endian, k)
+    n = min((len(buf)-pos)//dtype.itemsize, count, window)
+    if n == 0:
+      data = f.read(chunk_bytes)
+      if not data:
+        raise ValueError("The PLY file ends inside an element")
+      buf = buf[pos:]+data
+      pos = 0
+      continue
+    records = np.frombuffer(buf, dtype=dtype, count=n, offset=pos)
+    other = np.flatnonzero(records[count_field] != k)
+    if len(other):
+      n = int(other[0])
+      records = records[:n]
+      window = max(16, 2*n)
+    else:
+      window = min(2*window, max_window)
+    yield records
+    pos += n*dtype.itemsize
+    count -= n
+  # Step back over the bytes read past the element
+  f.seek(pos-len(buf), 1)
+
+# iter_ascii_records function
+# ---------------------------
+# Yields the numbers of one ascii element, a block of lines at a time,
+# as a flat array with the number of values on each line.
+def iter_ascii_records(lines, count):
+  """Yields the values and the values per line of an ascii PLY element"""
+  while count > 0:
+    block = lines.take(count)
+    if not block:
+      raise ValueError("The PLY file ends inside an element")
+    count -= len(block)
+    values = parse_numbers(block)
+    widths = np.array([len(l.split()) for l in block], dtype=np.int64)
+    if len(values) != np.sum(widths):
+      raise ValueError("Unreadable line in a PLY element")
+    yield values, widths
+
+# The lines of the body of an ascii PLY file, taken a block at a time
+class LineQueue:
+
+  def __init__(self, f):
+    self.blocks = iter_text_blocks(f)
+    self.lines = []
+    self.pos = 0
+
+  def take(self, n):
+    if self.pos >= len(self.lines):
+      self.lines = [l for l in next(self.blocks, b'').split(b'\n') if l.strip()]
+      self.pos = 0
+    block = self.lines[self.pos:self.pos+n]
+    self.pos += len(block)
+    return( block)
+
+# The corner indices and counts of an ascii list property, at column
+# start of each line
+def ascii_list_values(values, widths, start):
+  rows = np.cumsum(widths)-widths+start
+  counts = values[rows].astype(np.int64)
+  corners = np.repeat(rows+1-np.cumsum(counts)+counts, counts)+np.arange(np.sum(counts))
+  return( values[corners].astype(np.int64), counts)
+
+def read_ply(path, trans=[], **kwargs):
+  """Reads a PLY file into a Surface"""
+  vertex_blocks = []
+  index_blocks = []
+  count_blocks = []
+  with open(path, 'rb') as f:
+    fmt, elements = read_ply_header(f)
+    endian = '>' if fmt == 'binary_big_endian' else '<'
+    lines = LineQueue(f) if fmt == 'ascii' else None
+    for name, count, props in elements:
+      names = [p[0] for p in props]
+      lists = [p[0] for p in props if p[2] is not None]
+      if name == 'vertex' and not all(c in names for c in 'xyz'):
+        raise ValueError("The PLY vertex element has no x, y and z")
+      if fmt != 'ascii':
+        for records in iter_binary_records(f, props, count, endian):
+          if name == 'vertex':
+            vertex_blocks.append( np.stack([records[c] for c in 'xyz'], axis=1).astype(np.float32))
+          elif name == 'face':
+            corners = records[lists[0]].astype(np.int64)
+            index_blocks.append( corners.ravel())
+            count_blocks.append( np.full(len(corners), corners.shape[1], dtype=np.int64))
+        continue
+      if lists and props[0][0] != lists[0] and name == 'face':
+        raise ValueError("ascii PLY faces must start with their list of corners")
+      for values, widths in iter_ascii_records(lines, count):
+        if name == 'vertex':
+          if lists:
+            raise ValueError("ascii PLY vertices with list properties are not supported")
+          values = values.reshape(-1,len(props))
+          vertex_blocks.append( values[:,[names.index(c) for c in 'xyz']].astype(np.float32))
+        elif name == 'face':
+          corners, counts = ascii_list_values(values, widths, 0)
+          index_blocks.append( corners)
+          count_blocks.append( counts)
+  vertices = np.concatenate(vertex_blocks) if vertex_blocks else np.zeros((0,3), dtype=np.float32)
+  indices = np.concatenate(index_blocks) if index_blocks else np.zeros(0, dtype=np.int64)
+  counts = np.concatenate(count_blocks) if count_blocks else np.zeros(0, dtype=np.int64)
+  faces = face_index_array(fan_triangulate(indices, counts), len(vertices))
+  return( Surface.from_arrays(vertices, faces, trans=trans, **kwargs))
+
+
+#####################################################################
+# STL files
+# =========
+# An STL file is a list of triangles, each with its own three corners,
+# so the corners are welded into shared vertices unless weld is False.
+# A binary file is an 80 byte header, a uint32 count and 50 bytes for
+# each triangle; anything else starting with `solid` is read as ascii.
+
+def read_stl(path, weld=True, trans=[], **kwargs):
+  """Reads an STL file into a Surface"""
+  size = os.path.getsize(path)
+  corner_blocks = []
+  with open(path, 'rb') as f:
+    head = f.read(84)
+    count = int(np.frombuffer(head, dtype='<u4', count=1, offset=80)[0]) if len(head) == 84 else -1
+    if 84+count*stl_dtype.itemsize == size:
+      step = max(chunk_bytes//stl_dtype.itemsize, 1)
+      for lo in range(0, count, step):
+        n = min(step, count-lo)
+        records = np.frombuffer(f.read(n*stl_dtype.itemsize), dtype=stl_dtype)
+        corner_blocks.append( records['corners'].reshape(-1,3))
+    elif head[:5] == b'solid':
+      f.seek(0)
+      for block in iter_text_blocks(f):
+        corners = parse_numbers(find_lines(block, b'vertex')[0])
+        corner_blocks.append( corners.astype(np.float32).reshape(-1,3))
+    else:
+      raise ValueError("{} is not an STL file".format(path))
+  corners = np.concatenate(corner_blocks) if corner_blocks else np.zeros((0,3), dtype=np.float32)
+  if len(corners) % 3:
+    raise ValueError("The STL file has a triangle without 3 corners")
+  if weld:
+    vertices, faces = weld_vertices(corners)
+  else:
+    vertices, faces = corners, np.arange(len(corners))
+  faces = face_index_array(faces, len(vertices))
+  return( Surface.from_arrays(vertices, faces, trans=trans, **kwargs))
+
+
+# load_surface function
+# ---------------------
+# Reads a mesh file into a Surface, picking the reader from the file
+# extension. The keyword arguments are passed on to the reader.
+readers = {'.obj': read_obj, '.ply': read_ply, '.stl': read_stl}
+
+def load_surface(path, **kwargs):
+  """Reads an OBJ, PLY or STL file into a Surface"""
+  ext = os.path.splitext(path)[1].lower()
+  if ext not in readers:
+    raise ValueError("Unknown mesh file type {}".format(ext))
+  return( readers[ext](path, **kwargs))
+
+# measure_load function
+# ---------------------
+# Reads a mesh file and returns the surface and the load throughput in
+# MB/s of file read.
+def measure_load(path, **kwargs):
+  """Returns a loaded Surface and the load throughput in MB/s"""
+  start = time.perf_counter()
+  surface = load_surface(path, **kwargs)
+  seconds = time.perf_counter()-start
+  return( surface, os.path.getsize(path)/1e6/max(seconds, 1e-9))
+
+
+# Prints the load throughput of each file given on the command line
+if __name__ == '__main__':
+  for path in sys.argv[1:]:
+    surface, rate = measure_load(path)
+    print('{}: {} vertices, {} faces, {:.1f} MB/s'.format(
+      path, len(surface.vertex_array), len(surface.face_array), rate))
@@ -0,0 +1,259 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+import json
+import struct
+import numpy as np
+
+from ..utils.color import RGBA
+from ..transforms.transform import Transform
+from ..transforms.affine import Affine
+from ..renderables.renderable import RenderableGraphicsObj
+from ..renderables.style import StyleTable
+from ..renderables.surface import Surface
+from ..renderables.lineset import LineSet
+from ..renderables.pointcloud import PointCloud
+
+__all__ = ['MeshFile', 'write_meshfile', 'load_scene']
+
+#####################################################################
+# Mesh file format
+# ================
+# A binary container for scenes of renderable objects, laid out so it
+# can be opened with np.memmap and read without parsing:
+# - A 64 byte header: the magic bytes, the format version, the number
+#   of sections, and the offset of the section table
+# - The sections, each one array starting on a 64 byte boundary:
+#   float32 vertex, color and transform sections, uint32 index
+#   sections, and one 'index' section holding the style table and the
+#   list of objects as JSON
+# - The section table, one 64 byte entry for each section with its
+#   name, numpy dtype, number of rows and columns, and offset
+# All numbers are little endian.
+
+magic = b'PYGMESH\0'
+version = 1
+alignment = 64
+header_format = '<8sIIQ'
+entry_format = '<32s8sQQQ'
+header_size = 64
+entry_size = 64
+
+# Style option values are stored in JSON, with colors as lists tagged
+# with their class name, and numpy numbers as plain ones.
+def encode_option(value):
+  if isinstance(value, RGBA):
+    return( {'RGBA': [float(c) for c in value]})
+  if isinstance(value, (np.generic, np.ndarray)):
+    return( value.tolist())
+  return( value)
+
+def decode_option(value):
+  if isinstance(value, dict) and 'RGBA' in value:
+    return( RGBA(value['RGBA']))
+  return( value)
+
+
+#####################################################################
+# MeshFile class
+# ==============
+# An open mesh file. Opening only reads the header and the section
+# table, so it takes the same time for any file size. The sections are
+# mapped with np.memmap as they are asked for, read-only, and the
+# operating system pages them in when they are first touched. It
+# provides:
+# - The names of the sections (names, `in` operator)
+# - A read-only array of a section (section, `[]` operator)
+# - The style table and the object list (styles, objects)
+# - The renderable objects, wrapping the mapped arrays (load_object)
+class MeshFile:
+  """A memory-mapped mesh file"""
+
+  def __init__(self, path):
+    """Opens a mesh file and reads its section table"""
+    self.path = path
+    with open(path, 'rb') as f:
+      head = f.read(header_size)
+      if len(head) < header_size or head[:8] != magic:
+        raise ValueError("{} is not a mesh file".format(path))
+      _, file_version, count, table_offset = struct.unpack_from(header_format, head)
+      if file_version > version:
+        raise ValueError("Mesh file version {} is newer than {}".format(file_version, version))
+      f.seek(table_offset)
+      table = f.read(count*entry_size)
+    self.entries = {}
+    for i in range(count):
+      name, dtype, rows, cols, offset = struct.unpack_from(entry_format, table, i*entry_size)
+      name = name.rstrip(b'\0').decode('ascii')
+      self.entries[name] = (np.dtype(dtype.rstrip(b'\0').decode('ascii')), rows, cols, offset)
+    self.maps = {}
+    index = json.loads(self.section('index').tobytes().decode('utf-8'))
+    self.styles = [dict((k, decode_option(v)) for k, v in s.items()) for s in index['styles']]
+    self.objects = index['objects']
+
+  def names(self):
+    """Returns the names of the sections"""
+    return( list(self.entries.keys()))
+
+  def __contains__(self, name):
+    return( name in self.entries)
+
+  def __getitem__(self, name):
+    return( self.section(name))
+
+  def __len__(self):
+    """Number of objects in the file"""
+    return( len(self.objects))
+
+  # section method
+  # --------------
+  # Returns a read-only memory-mapped array of a section. Sections with
+  # one column are returned as 1-D arrays.
+  def section(self, name):
+    """Returns the memory-mapped array of a section"""
+    if name not in self.maps:
+      dtype, rows, cols, offset = self.entries[name]
+      shape = (rows,) if cols == 1 else (rows, cols)
+      if rows == 0:
+        self.maps[name] = np.zeros(shape, dtype=dtype)
+      else:
+        self.maps[name] = np.memmap(self.path, dtype=dtype, mode='r', offset=offset, shape=shape)
+    return( self.maps[name])
+
+  # load_object method
+  # ------------------
+  # Returns the renderable object with the given index. Its arrays are
+  # the mapped sections, without a copy, so they are read-only and the
+  # object is changed by replacing its arrays.
+  def load_object(self, i):
+    """Returns one renderable object wrapping the mapped arrays"""
+    obj = self.objects[i]
+    kind = obj['kind']
+    prefix = '{}/'.format(i)
+    style = dict(self.styles[obj['style']])
+    trans = []
+    if obj['transform'] >= 0:
+      trans = [Transform(Affine(self.section('transforms')[obj['transform']]))]
+    if kind == 'Surface':
+      rend = Surface.from_arrays(self.section(prefix+'vertices'), self.section(prefix+'faces'),
+                                 trans=trans, **style)
+      if prefix+'vertex_colors' in self:
+        rend.vertex_colors = self.section(prefix+'vertex_colors')
+    elif kind == 'LineSet':
+      if prefix+'strip_offsets' in self:
+        rend = LineSet.from_strips(self.section(prefix+'vertices'), self.section(prefix+'strip_offsets'),
+                                   self.section(prefix+'strip_closed').astype(bool),
+                                   transforms=trans, **style)
+      else:
+        rend = LineSet.from_arrays(self.section(prefix+'vertices'), self.section(prefix+'edges'),
+                                   transforms=trans, **style)
+    elif kind == 'PointCloud':
+      columns = {}
+      for name in ('sizes', 'colors', 'texture_ids'):
+        if prefix+name in self:
+          columns[name] = self.section(prefix+name)
+      rend = PointCloud(self.section(prefix+'positions'), transforms=trans, **dict(columns, **style))
+    else:
+      raise ValueError("Unknown object kind {} in mesh file".format(kind))
+    return( rend)
+
+  def load_objects(self):
+    """Returns a list of all the renderable objects"""
+    return( [self.load_object(i) for i in range(len(self))])
+
+
+# write_meshfile function
+# -----------------------
+# Writes a renderable object, or a sequence of them, to a mesh file.
+# The leaves of the tree are written with their world matrix and their
+# resolved style, so the file holds a flat list of objects. Each array
+# is written straight from memory with tofile. The objects are only
+# read: they keep their parents and their resolved style ids, and
+# start from the world matrix and the style of their ancestors.
+def write_meshfile(path, objs):
+  """Writes renderable objects to a mesh file"""
+  if isinstance(objs, RenderableGraphicsObj):
+    objs = [objs]
+  table = StyleTable()
+  leaves = []
+  for obj in objs:
+    world_mat = None if obj.parent is None else obj.parent.calc_world_mat()
+    leaves += iter_leaf_styles(obj, world_mat, obj.calc_inherited_style())
+  sections = []
+  objects = []
+  mats = []
+  for i, (leaf, world_mat, style) in enumerate(leaves):
+    prefix = '{}/'.format(i)
+    transform = -1
+    if not world_mat.is_identity():
+      transform = len(mats)
+      mats.append( world_mat.array.reshape(12))
+    if isinstance(leaf, Surface):
+      kind = 'Surface'
+      sections.append( (prefix+'vertices', leaf.vertex_array, np.float32))
+      sections.append( (prefix+'faces', leaf.face_array, np.uint32))
+      if hasattr(leaf, 'vertex_colors'):
+        colors = [getattr(c, 'array', c) for c in leaf.vertex_colors]
+        sections.append( (prefix+'vertex_colors', np.asarray(colors).reshape(-1,4), np.float32))
+    elif isinstance(leaf, LineSet):
+      kind = 'LineSet'
+      sections.append( (prefix+'vertices', leaf.vertex_array, np.float32))
+      if leaf.is_strips():
+        sections.append( (prefix+'strip_offsets', leaf.strip_offsets, np.uint64))
+        sections.append( (prefix+'strip_closed', leaf.strip_closed, np.uint8))
+      else:
+        sections.append( (prefix+'edges', leaf.edge_array, np.uint32))
+    elif isinstance(leaf, PointCloud):
+      kind = 'PointCloud'
+      sections.append( (prefix+'positions', leaf.positions, np.float32))
+      for name, dtype in (('sizes', np.float32), ('colors', np.float32), ('texture_ids', np.int32)):
+        if getattr(leaf, name) is not None:
+          sections.append( (prefix+name, getattr(leaf, name), dtype))
+    else:
+      raise AttributeError("write_meshfile can not write a {}".format(leaf.__class__.__name__))
+    objects.append( {'kind': kind, 'style': table.intern(style), 'transform': transform})
+  sections.append( ('transforms', np.array(mats, dtype=np.float32).reshape(-1,12), np.float32))
+  styles = [dict((k, encode_option(v)) for k, v in style.options().items()) for style in table]
+  index = json.dumps({'styles': styles, 'objects': objects}).encode('utf-8')
+  sections.append( ('index', np.frombuffer(index, dtype=np.uint8), np.uint8))
+  entries = []
+  with open(path, 'wb') as f:
+    f.write(b'\0'*header_size)
+    for name, array, dtype in sections:
+      array = np.ascontiguousarray(array, dtype=dtype)
+      rows = len(array)
+      cols = 1 if array.ndim == 1 else int(np.prod(array.shape[1:]))
+      f.write(b'\0'*(-f.tell() % alignment))
+      entries.append( struct.pack(entry_format, name.encode('ascii'), array.dtype.str.encode('ascii'),
+                                  rows, cols, f.tell()))
+      array.tofile(f)
+    f.write(b'\0'*(-f.tell() % alignment))
+    table_offset = f.tell()
+    for entry in entries:
+      f.write(entry.ljust(entry_size, b'\0'))
+    f.seek(0)
+    f.write(struct.pack(header_format, magic, version, len(entries), table_offset))
+
+# iter_leaf_styles function
+# -------------------------
+# The walk of resolve_styles and iter_leaf_mats in one, without storing
+# anything on the objects. Yields each leaf below an object with its
+# world matrix and its effective style.
+def iter_leaf_styles(obj, parent_mat, inherited):
+  """Returns an iterator over the leaves, world matrices and styles"""
+  world_mat = obj.trans_mat if parent_mat is None else parent_mat*obj.trans_mat
+  style = inherited.merge(**obj.get_style_options())
+  if obj.obj_list:
+    for child in obj.obj_list:
+      for item in iter_leaf_styles(child, world_mat, style):
+        yield item
+  else:
+    yield obj, world_mat, style.trim(obj.graphics_options)
+
+# load_scene function
+# -------------------
+# Opens a mesh file and returns all of its objects in one renderable
+# object.
+def load_scene(path):
+  """Returns the objects of a mesh file as one renderable object"""
+  return( RenderableGraphicsObj(*MeshFile(path).load_objects()))
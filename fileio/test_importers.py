@@ -0,0 +1,61 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+from importers import *
+
+import os
+import struct
+import tempfile
+import unittest
+import numpy as np
+
+class TestImporters(unittest.TestCase):
+
+  def setUp(self):
+    self.dir = tempfile.mkdtemp()
+
+  def tearDown(self):
+    for name in os.listdir(self.dir):
+      os.remove(os.path.join(self.dir, name))
+    os.rmdir(self.dir)
+
+  def write(self, name, data):
+    path = os.path.join(self.dir, name)
+    with open(path, 'wb') as f:
+      f.write(data)
+    return( path)
+
+  # Test that quads are split into two triangles, and that texture
+  # and normal indices and negative indices are handled
+  def test_obj(self):
+    path = self.write('quad.obj', b'# square\nv 0 0 0\nv 1 0 0\nv 1 1 0\nv 0 1 0\n'
+                                  b'vt 0 0\nf 1/1 2/1/1 3//1 4\nv 1 -1 0\nf -4 -5 -1\n')
+    s = load_surface(path)
+    self.assertEqual(s.vertex_array.shape, (5,3))
+    self.assertTrue(np.all(s.face_array == [[0,1,2],[0,2,3],[1,0,4]]))
+    self.assertAlmostEqual(s.calc_area(), 1.5)
+
+  # Test a binary PLY file with a triangle and a quad
+  def test_ply(self):
+    header = (b'ply\nformat binary_little_endian 1.0\nelement vertex 4\n'
+              b'property float x\nproperty float y\nproperty float z\n'
+              b'element face 2\nproperty list uchar int vertex_indices\nend_header\n')
+    vertices = struct.pack('<12f', 0,0,0, 1,0,0, 1,1,0, 0,1,0)
+    faces = struct.pack('<B3i', 3, 0,1,2)+struct.pack('<B4i', 4, 0,1,2,3)
+    s = load_surface(self.write('mesh.ply', header+vertices+faces))
+    self.assertTrue(np.all(s.face_array == [[0,1,2],[0,1,2],[0,2,3]]))
+
+  # Test that the corners of a binary STL file are welded
+  def test_stl(self):
+    corners = [[0,0,0, 1,0,0, 1,1,0], [0,0,0, 1,1,0, 0,1,0]]
+    data = b'\0'*80+struct.pack('<I', 2)
+    for c in corners:
+      data += struct.pack('<12fH', 0,0,1, *(c+[0]))
+    s = load_surface(self.write('mesh.stl', data))
+    self.assertEqual(len(s.vertex_array), 4)
+    self.assertAlmostEqual(s.calc_area(), 1.)
+
+  # Test that out of range indices are refused
+  def test_bad_index(self):
+    path = self.write('bad.obj', b'v 0 0 0\nv 1 0 0\nv 1 1 0\nf 1 2 4\n')
+    self.assertRaises(AttributeError, load_surface, path)
@@ -0,0 +1,67 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+from meshfile import *
+from ..renderables.surface import Surface
+from ..renderables.lineset import LineSet
+from ..renderables.pointcloud import PointCloud
+from ..renderables.renderable import RenderableGraphicsObj
+from ..utils.color import RGBA
+
+import os
+import tempfile
+import unittest
+import numpy as np
+
+class TestMeshFile(unittest.TestCase):
+
+  def setUp(self):
+    fd, self.path = tempfile.mkstemp(suffix='.pygm')
+    os.close(fd)
+
+  def tearDown(self):
+    os.remove(self.path)
+
+  # Test that the objects come back with the same arrays and styles,
+  # wrapping read-only mapped sections
+  def test_round_trip(self):
+    vertices = np.array([[0,0,0],[1,0,0],[0,1,0],[0,0,1]], dtype=np.float32)
+    faces = np.array([[0,2,1],[0,1,3],[0,3,2],[1,2,3]])
+    s = Surface.from_arrays(vertices, faces, color=RGBA(1,0,0,1))
+    l = LineSet.from_strips(vertices, [0,2,4], closed=[False,True], line_width=2)
+    p = PointCloud(vertices, sizes=[1,2,3,4])
+    write_meshfile(self.path, RenderableGraphicsObj(s, l, p))
+    m = MeshFile(self.path)
+    self.assertEqual(len(m), 3)
+    s2, l2, p2 = m.load_objects()
+    self.assertTrue(np.all(s2.vertex_array == vertices))
+    self.assertTrue(np.all(s2.face_array == faces))
+    self.assertEqual(s2.face_array.dtype, np.uint32)
+    self.assertFalse(s2.vertex_array.flags.writeable)
+    self.assertTrue(np.all(s2.color.array == RGBA(1,0,0,1).array))
+    self.assertTrue(np.all(l2.export_strips() == l.export_strips()))
+    self.assertEqual(l2.line_width, 2)
+    self.assertTrue(np.all(p2.sizes == p.sizes))
+
+  # Test that writing leaves the objects in their own tree, and that
+  # numpy style options are written as plain numbers
+  def test_write_objects(self):
+    vertices = np.array([[0,0,0],[1,0,0],[0,1,0]], dtype=np.float32)
+    s = Surface.from_arrays(vertices, [[0,1,2]])
+    l = LineSet.from_strips(vertices, [0,3], line_width=np.float32(3))
+    group = RenderableGraphicsObj(s, l, color=RGBA(0,0,1,1))
+    table = group.resolve_styles()
+    style_ids = (s.style_id, l.style_id)
+    write_meshfile(self.path, [s, l])
+    self.assertIs(s.parent, group)
+    self.assertIs(l.parent, group)
+    self.assertEqual((s.style_id, l.style_id), style_ids)
+    s2, l2 = MeshFile(self.path).load_objects()
+    self.assertEqual(l2.line_width, 3)
+    self.assertTrue(np.all(s2.color.array == [0,0,1,1]))
+
+  # Test that a file that is not a mesh file is refused
+  def test_bad_magic(self):
+    with open(self.path, 'wb') as f:
+      f.write(b'\0'*128)
+    self.assertRaises(ValueError, MeshFile, self.path)
@@ -1,64 +1,204 @@
 # Author: Jef Wagner
 # Date: 13-02-2015
 
-from utils.matrix import Mat3x4
+import numbers
+import numpy as np
+
+from utils.vector import Vec3
+from utils.matrix import Mat3x4, affine_compose
+from utils.color import RGBA
 from transforms.transform import *
 from renderables.renderable import RenderableGraphicsObj
+from renderables.pointcloud import PointCloud
+
+# Valid values of the line_style and point_style options
+lineStyleSet = set(['solid', 'dashed', 'dotted'])
+pointStyleSet = set(['circle', 'square', 'disk', 'sphere'])
 
 class BaseGraphicsObj:
 
 	def __init__(self, trans=[], **kwargs):
-		self.transforms = []
+		self.parent = None
+		self.renderable = None
+		self.renderable_radius = None
+		self.cache = {}
+		self.version = 0
+		self.dirty = True
+		self.dirty_children = False
+		self.transforms = self.validate_transforms(trans)
+		self.trans_mat = self.calc_trans_mat()
+		for key in kwargs.keys():
+			if key in self.graphics_options:
+				self.validate_style_options(key, kwargs[key])
+				setattr(self,key,kwargs[key])
+			else:
+				name = self.__class__.__name__
+				raise AttributeError("{}.__init__ keyword options must be valid style options".format(name))
+
+	def validate_transforms(self, trans):
+		transforms = []
 		for t in trans:
 			if isinstance( t, Transform):
-				self.transforms.append(t)
+				transforms.append(t.optimize())
 			else:
 				name = self.__class__.__name__
 				raise AttributeError("{}.__init__ transform options must be an sequence of Transforms".format(name))
-		self.trans_mat = Mat3x4(1,0,0,0,0,1,0,0,0,0,1,0)
+		return( transforms)
+
+	# calc_trans_mat
+	# --------------
+	# Multiplies through the list of transforms. A transform about the
+	# center of mass finds it from the matrix of the transforms before
+	# it, so self.trans_mat is updated after every step, and the cached
+	# values computed from it are dropped each time.
+	def calc_trans_mat(self):
+		self.trans_mat = Mat3x4(1,0,0,0,0,1,0,0,0,0,1,0, kind='identity')
+		self.drop_trans_cache()
 		for t in self.transforms:
 			self.trans_mat = t.get_mat(self)*self.trans_mat
-		for key in kwargs.keys():
-			if key in self.graphics_properties:
-				self.validate_style_options(key, kwargs[key])
-				setattr(self,key,kwargs[key])
-			else:
+			self.drop_trans_cache()
+		return( self.trans_mat)
+
+	# The names of the cached values that are computed from the
+	# transform matrix. A cache key is either a name or a tuple starting
+	# with the name.
+	trans_cache_keys = ('center', 'area', 'bounds')
+
+	def drop_trans_cache(self):
+		"""Drops the cached values computed from the transform matrix"""
+		for key in list(self.cache):
+			if (key[0] if isinstance(key, tuple) else key) in self.trans_cache_keys:
+				del self.cache[key]
+
+	# calc_trans_mats
+	# ---------------
+	# Evaluates the transforms at a whole array of times. Returns a
+	# (T,3,4) array of matrices, so an animation can be computed with a
+	# few array operations instead of one matrix chain per frame.
+	def calc_trans_mats(self, times):
+		"""Returns the transform matrices at an array of times"""
+		times = np.atleast_1d(np.asarray(times, dtype=np.float64))
+		m = identity_stack(len(times))
+		for t in self.transforms:
+			m = affine_compose(t.get_mats(self, times), m)
+		return( m)
+
+	# Change notification
+	# -------------------
+	# Objects in a tree are only changed through set_transforms,
+	# set_style and replace_child. Each of these marks the object dirty,
+	# which drops its cached values and bumps its version, and then
+	# tells its ancestors that something below them changed, so their
+	# cached centers, areas, bounds and buffers are dropped as well.
+	# Anything that was not marked can reuse what it computed before.
+	def mark_dirty(self):
+		"""Marks the object as changed and notifies its ancestors"""
+		self.dirty = True
+		self.version += 1
+		self.cache.clear()
+		obj = self.parent
+		while obj is not None:
+			obj.cache.clear()
+			obj.dirty_children = True
+			obj = obj.parent
+
+	def mark_clean(self):
+		"""Clears the dirty flags on the object and everything below it"""
+		if self.dirty or self.dirty_children:
+			self.dirty = False
+			self.dirty_children = False
+			for obj in getattr(self, 'obj_list', []):
+				obj.mark_clean()
+
+	def set_transforms(self, trans):
+		"""Replaces the list of transforms"""
+		self.transforms = self.validate_transforms(trans)
+		self.trans_mat = self.calc_trans_mat()
+		self.mark_dirty()
+
+	def set_style(self, **kwargs):
+		"""Sets style options, an option set to None is removed"""
+		for key, value in kwargs.items():
+			if key not in self.graphics_options:
 				name = self.__class__.__name__
-				raise AttributeError("{}.__init__ keyword options must be valid style options".format(name))
+				raise AttributeError("{}.set_style keyword options must be valid style options".format(name))
+			if value is None:
+				if key in self.__dict__:
+					delattr(self, key)
+			else:
+				self.validate_style_options(key, value)
+				setattr(self, key, value)
+		self.mark_dirty()
+
+	def replace_child(self, index, obj):
+		"""Replaces the object at an index of the object list"""
+		if not isinstance(obj, BaseGraphicsObj):
+			name = self.__class__.__name__
+			raise AttributeError("{}.replace_child takes a BaseGraphicsObj".format(name))
+		self.obj_list[index].parent = None
+		self.obj_list[index] = obj
+		obj.parent = self
+		obj.mark_dirty()
+
+	def cached(self, key, func, *args):
+		"""Returns a cached value, calling func(*args) on a miss"""
+		if key not in self.cache:
+			self.cache[key] = func(*args)
+		return( self.cache[key])
+
+	# get_renderable
+	# --------------
+	# The renderable is kept for the display radius it was made for,
+	# since the level of detail depends on it, and made again when the
+	# object changes or another display radius is asked for.
+	def get_renderable(self, display_radius=None):
+		"""Returns the renderable object, only rebuilding it if changed"""
+		if self.renderable is None or self.dirty or self.dirty_children or \
+		   display_radius != self.renderable_radius:
+			self.renderable = self.to_renderable(display_radius)
+			self.renderable_radius = display_radius
+			self.mark_clean()
+		return( self.renderable)
 
 	def calc_center( self, display_radius=None):
+		return( self.cached(('center', display_radius), self._calc_center, display_radius))
+
+	def _calc_center( self, display_radius=None):
 		cms = [obj.calc_center( display_radius) for obj in self.obj_list]
-		areas = [obj.calc_area( display_radius) for obj in self.ojb_list]
+		areas = [obj.calc_area( display_radius) for obj in self.obj_list]
 		num = sum( [cm*area for cm, area in zip(cms, areas)])
 		denom = sum( areas)
 		return( self.trans_mat*(num/denom))		
 
 	def calc_area( self, display_radius=None):
-		areas = [obj.calca_area( display_radius) for obj in self.ojb_list]
+		return( self.cached(('area', display_radius), self._calc_area, display_radius))
+
+	def _calc_area( self, display_radius=None):
+		areas = [obj.calc_area( display_radius) for obj in self.obj_list]
 		return( sum( areas))	
 
 	def validate_style_options(self, option_name, option_value):
 		if option_name.split('_')[-1] == 'color':
 			if not isinstance(option_value, RGBA):
 				raise ValueError("Color options must be valid color objects")
-		elif options_name.split('_') == 'colors'
-			if options_name == 'face_colors' and len(option_value) != len(self.faces):
+		elif option_name.split('_')[-1] == 'colors':
+			if option_name == 'face_colors' and len(option_value) != len(self.faces):
 				raise AttributeError("Face colors must be a sequence of colors the same length as the list of faces")
-			if options_name == 'edge_colors' and len(option_value) != len(self.edges):
+			if option_name == 'edge_colors' and len(option_value) != len(self.edges):
 				raise AttributeError("Edge colors must be a sequence of colors the same length as the list of edges")
-			if options_name == 'vertex_colors' and len(option_value) != len(self.edges):
+			if option_name == 'vertex_colors' and len(option_value) != len(self.edges):
 				raise AttributeError("Vertex colors must be a sequence of colors the same length as the list of vertices")
 			for item in option_value:
-				if not isinstance(option_value, RGBA):
+				if not isinstance(item, RGBA):
 					raise ValueError("Color options must be valid color objects")
 		elif option_name == 'specularity':
-			if not isinstance(option_value, number.Numbers):
+			if not isinstance(option_value, numbers.Number):
 				raise ValueError("Specularity must be a number")
 		elif option_name == 'line_width':
-			if not isinstance(option_value, number.Numbers) or not( 1. < line_width < 10.):
+			if not isinstance(option_value, numbers.Number) or not( 1. < option_value < 10.):
 				raise ValueError("Line width must be a number between 1 and 10")
 		elif option_name == 'point_size':
-			if not isinstance(option_name, number.Numbers) or not( 1. < point_size < 30):
+			if not isinstance(option_value, numbers.Number) or not( 1. < option_value < 30):
 				raise ValueError("Point size must be a number between 1 and 30")
 		elif option_name == 'line_style':
 			if option_value not in lineStyleSet:
@@ -69,7 +209,7 @@ class BaseGraphicsObj:
 
 	def get_style_options(self):
 		style_options={}
-		for opt in self.graphics_properties:
+		for opt in self.graphics_options:
 			if hasattr(self, opt):
 				style_options[opt] = getattr(self, opt)
 		return( style_options)
@@ -78,7 +218,7 @@ class BaseGraphicsObj:
 	def trim_style_options(cls, **kwargs):
 		style_options={}
 		for opt in kwargs:
-			if opt in cls.style_options:
+			if opt in cls.graphics_options:
 				style_options[opt] = kwargs[opt]
 		return( style_options)
 
@@ -96,15 +236,131 @@ class GraphicsObj(BaseGraphicsObj):
 						'point_style']
 
 	def __init__( self, *args, transforms=[], **kwargs):
+		self.obj_list = []
 		for obj in args:
-			if isinstance(BaseGraphicsObj, obj):
+			if isinstance(obj, BaseGraphicsObj):
 				self.obj_list.append(obj)
 			else:
 				name = self.__class__.__name__
-				raise AttributeError("{}.__init__ takes and array of BaseGraphicsObjs")
-		super(GraphicsObjs, self).__init__(transforms, **kwargs)
+				raise AttributeError("{}.__init__ takes and array of BaseGraphicsObjs".format(name))
+		super(GraphicsObj, self).__init__(transforms, **kwargs)
+		for obj in self.obj_list:
+			obj.parent = self
+
+	# from_arrays
+	# -----------
+	# Bulk constructor for many objects that share a transform recipe.
+	# Instead of building one Python object per item, it takes the
+	# (K,3) centers of mass of the items and a recipe of batched
+	# transforms (see batch_trans_mats), computes all K transform
+	# matrices in one vectorized pass, and returns a single columnar
+	# GraphicsArray.
+	#
+	# Example:
+	# >>> objs = GraphicsObj.from_arrays(centers,
+	# ...            [(RotateZ, {'angles': angles}),
+	# ...             (Translate, {'vecs': offsets})],
+	# ...            color=Red)
+	@classmethod
+	def from_arrays(cls, centers, recipe=[], transforms=[], **kwargs):
+		trans_mats = batch_trans_mats(recipe, centers)[0]
+		return( GraphicsArray(centers, trans_mats, transforms=transforms, **kwargs))
 
+	# to_renderable
+	# -------------
+	# The first call builds the renderable tree. Later calls update the
+	# same renderable tree in place: only the children that changed, or
+	# all of them at another display radius, are asked for their
+	# renderable again and swapped in with replace_child, and the
+	# transforms and
+	# style are only pushed down if they were set on this object. The
+	# renderable tree then knows which of its packed buffer ranges need
+	# to be written again.
 	def to_renderable(self, display_radius=None):
-		rend_obj_list = [obj.to_renderable() for obj in self.obj_list]
-		style_options = self.get_style_options()
-		return( RenderableGraphicsObj(rend_obj_list, trans=self.transforms, **style_options))
+		if self.renderable is None:
+			rend_obj_list = [obj.get_renderable(display_radius) for obj in self.obj_list]
+			style_options = self.get_style_options()
+			return( RenderableGraphicsObj(*rend_obj_list, trans=self.transforms, **style_options))
+		rend = self.renderable
+		resized = display_radius != self.renderable_radius
+		if self.dirty_children or resized:
+			for i, obj in enumerate(self.obj_list):
+				if obj.dirty or obj.dirty_children or resized:
+					rend_obj = obj.get_renderable(display_radius)
+					if rend_obj is not rend.obj_list[i]:
+						rend.replace_child(i, rend_obj)
+		if self.dirty:
+			rend.set_transforms(self.transforms)
+			rend.set_style(**dict((opt, getattr(self, opt, None)) for opt in self.graphics_options))
+		return( rend)
+
+
+##############################################################################
+# GraphicsArray class
+# ===================
+# A columnar collection of many objects of the same kind. Each item is
+# a row in a set of parallel arrays instead of a Python object:
+# - centers: the (K,3) untransformed centers of mass
+# - trans_mats: the (K,3,4) transform matrix of each item, or None
+#   when none of the items are moved, which saves 48 bytes per item
+# The style options and the transforms given to the constructor apply
+# to the whole collection.
+class GraphicsArray(BaseGraphicsObj):
+
+	graphics_options = GraphicsObj.graphics_options
+
+	def __init__( self, centers, trans_mats=None, transforms=[], **kwargs):
+		self.centers = np.asarray(centers, dtype=np.float32).reshape(-1,3)
+		if trans_mats is not None:
+			trans_mats = np.asarray(trans_mats, dtype=np.float32).reshape(-1,3,4)
+		self.trans_mats = trans_mats
+		if trans_mats is not None and len(self.centers) != len(trans_mats):
+			name = self.__class__.__name__
+			raise AttributeError("{}.__init__ takes one transform matrix for each center".format(name))
+		super(GraphicsArray, self).__init__(transforms, **kwargs)
+
+	# An array is a leaf of the scene graph, its items are not objects
+	# of their own.
+	obj_list = ()
+
+	def __len__( self):
+		return( len(self.centers))
+
+	# calc_world_centers
+	# ------------------
+	# Returns the (K,3) centers of all the items moved by their own
+	# transform matrix.
+	def calc_world_centers( self):
+		return( self.cached('world_centers', self._calc_world_centers))
+
+	def _calc_world_centers( self):
+		m = self.trans_mats
+		if m is None:
+			return( self.centers)
+		return( np.matmul(m[:,:,:3], self.centers[:,:,np.newaxis])[:,:,0] + m[:,:,3])
+
+	# center_of_mass
+	# --------------
+	# The center of the collection is the mean of the item centers,
+	# which is what transforms of the whole collection are about.
+	def center_of_mass( self, display_radius=None):
+		return( Vec3(self.calc_world_centers().mean(axis=0)))
+
+	# The items of a plain array are points, so the center and area are
+	# the ones of the point cloud they are drawn as.
+	def _calc_center( self, display_radius=None):
+		return( self.trans_mat*self.center_of_mass())
+
+	def _calc_area( self, display_radius=None):
+		return( self.to_renderable(display_radius).calc_area(display_radius))
+
+	# to_renderable
+	# -------------
+	# Draws each item as a point at its center, all in one PointCloud.
+	# Subclasses with a shape of their own, like BoxArray, build their
+	# own renderables. The point options go on the point cloud, and the
+	# style options and the transforms of the collection go on the
+	# container, as for a GraphicsObj.
+	def to_renderable( self, display_radius=None):
+		points = PointCloud(self.calc_world_centers(), **PointCloud.trim_style_options(**self.get_style_options()))
+		return( RenderableGraphicsObj(points, trans=self.transforms, **self.get_style_options()))
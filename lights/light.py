@@ -0,0 +1,144 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+import numpy as np
+
+from ..utils.color import RGBA
+
+__all__ = ['AmbientLight', 'DirectionalLight', 'PointLight', 'SpotLight', 'LightObj']
+
+# rgb function
+# ------------
+# Returns the red, green and blue of a color as a float array, from an
+# RGBA object or a length 3 or 4 sequence.
+def rgb(color):
+  """Returns the (3,) rgb array of a color"""
+  return( np.asarray(getattr(color, 'array', color), dtype=np.float64).flatten()[:3])
+
+def unit(v):
+  v = np.asarray(getattr(v, 'array', v), dtype=np.float64).reshape(3)
+  l = np.linalg.norm(v)
+  if l == 0:
+    raise ValueError("A light direction can not be the 0 vector")
+  return( v/l)
+
+
+#####################################################################
+# Light classes
+# =============
+# Each light is a small record of its parameters. Lights are not
+# changed after they are made, and each has a key, a tuple of all of
+# its parameters, so a set of lights can be compared and hashed by
+# anything that caches lit colors.
+# - AmbientLight: the same light everywhere, from every direction
+# - DirectionalLight: parallel light along a direction, like the sun
+# - PointLight: light from a point, fading with the distance
+# - SpotLight: a point light that only shines in a cone
+class Light:
+  """Base class of the lights"""
+
+  def __init__(self, color=RGBA(1,1,1,1), intensity=1.):
+    self.color = rgb(color)*intensity
+
+  def key(self):
+    """Returns a tuple of the parameters of the light"""
+    return( (self.__class__.__name__,)+tuple(
+      tuple(np.round(np.ravel(v), 12).tolist()) for _, v in sorted(self.__dict__.items())))
+
+  def __eq__(self, other):
+    return( isinstance(other, Light) and self.key() == other.key())
+
+  def __hash__(self):
+    return( hash(self.key()))
+
+class AmbientLight(Light):
+  """Light that reaches every point from every direction"""
+
+class DirectionalLight(Light):
+  """Parallel light shining along a direction"""
+
+  def __init__(self, direction=(0,0,-1), color=RGBA(1,1,1,1), intensity=1.):
+    super(DirectionalLight, self).__init__(color, intensity)
+    self.direction = unit(direction)
+
+# The attenuation of point and spot lights is a tuple (c, l, q), and
+# the light at a distance d is divided by c+l*d+q*d*d.
+class PointLight(Light):
+  """Light shining from a point"""
+
+  def __init__(self, position=(0,0,0), color=RGBA(1,1,1,1), intensity=1., attenuation=(1.,0.,0.)):
+    super(PointLight, self).__init__(color, intensity)
+    self.position = np.asarray(getattr(position, 'array', position), dtype=np.float64).reshape(3)
+    self.attenuation = np.asarray(attenuation, dtype=np.float64).reshape(3)
+
+# A spot light shines in a cone around its direction with a half angle
+# of angle radians. Inside the cone the light falls off as the cosine
+# of the angle from the axis to the power exponent.
+class SpotLight(PointLight):
+  """Light shining from a point in a cone"""
+
+  def __init__(self, position=(0,0,0), direction=(0,0,-1), angle=np.pi/6, exponent=1.,
+               color=RGBA(1,1,1,1), intensity=1., attenuation=(1.,0.,0.)):
+    super(SpotLight, self).__init__(position, color, intensity, attenuation)
+    self.direction = unit(direction)
+    self.angle = float(angle)
+    self.exponent = float(exponent)
+
+
+#####################################################################
+# LightObj class
+# ==============
+# A set of lights, the combined light object of the scene. The lights
+# other than the ambient ones, kept in order in `direct`, are packed
+# into parallel arrays, one row per light, so that shading evaluates
+# all of them at once:
+# - ambient: the (3,) sum of the ambient light colors
+# - colors: the (L,3) light colors
+# - positions: the (L,3) positions of point and spot lights
+# - directions: the (L,3) directions of directional and spot lights
+# - directional: the (L,) bool mask of directional lights
+# - attenuation: the (L,3) attenuation, (1,0,0) for directional lights
+# - spot_cos: the (L,) cosine of the spot cone, -2 if not a spot
+# - spot_exponent: the (L,) fall off inside the spot cone
+class LightObj:
+  """A set of lights packed into arrays"""
+
+  def __init__(self, *lights):
+    """Constructor for the LightObj class"""
+    self.lights = []
+    for light in lights:
+      if isinstance(light, LightObj):
+        self.lights.extend( light.lights)
+      elif isinstance(light, Light):
+        self.lights.append( light)
+      else:
+        raise AttributeError("LightObj takes lights and light objects")
+    ambient = [l for l in self.lights if isinstance(l, AmbientLight)]
+    others = [l for l in self.lights if not isinstance(l, AmbientLight)]
+    self.ambient = np.sum([l.color for l in ambient], axis=0) if ambient else np.zeros(3)
+    self.direct = others
+    n = len(others)
+    self.colors = np.array([l.color for l in others]).reshape(n,3)
+    self.positions = np.array([getattr(l, 'position', np.zeros(3)) for l in others]).reshape(n,3)
+    self.directions = np.array([getattr(l, 'direction', np.zeros(3)) for l in others]).reshape(n,3)
+    self.directional = np.array([isinstance(l, DirectionalLight) for l in others], dtype=bool)
+    self.attenuation = np.array([getattr(l, 'attenuation', (1.,0.,0.)) for l in others]).reshape(n,3)
+    self.spot_cos = np.array([np.cos(l.angle) if isinstance(l, SpotLight) else -2. for l in others])
+    self.spot_exponent = np.array([getattr(l, 'exponent', 0.) for l in others])
+
+  def __len__(self):
+    """Number of lights other than the ambient lights"""
+    return( len(self.colors))
+
+  def __iter__(self):
+    return( iter(self.lights))
+
+  def key(self):
+    """Returns a tuple of the parameters of all the lights"""
+    return( tuple(l.key() for l in self.lights))
+
+  def __eq__(self, other):
+    return( isinstance(other, LightObj) and self.key() == other.key())
+
+  def __hash__(self):
+    return( hash(self.key()))
@@ -0,0 +1,132 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+import numpy as np
+
+from ..utils.color import RGBA
+from .light import LightObj, rgb
+
+__all__ = ['Materials', 'shade']
+
+# The material used for a style without the material options
+default_color = RGBA(0.8,0.8,0.8,1)
+default_specular_color = RGBA(0,0,0,1)
+default_specularity = 32.
+
+# The number of (point, light) pairs shaded at once. Shading a chunk
+# needs a few float32 arrays of this many rows of 3, so the memory used
+# does not grow with the number of points.
+chunk_pairs = 1 << 18
+
+#####################################################################
+# Materials class
+# ===============
+# The material options of a table of styles, packed into arrays with
+# one row for each style id:
+# - diffuse: the (M,3) diffuse color, from the color option
+# - ambient: the (M,3) ambient color, from ambient_color or color
+# - specular: the (M,3) specular color, from specular_color
+# - shininess: the (M,) specular exponent, from specularity
+# - opacity: the (M,) alpha of the diffuse color
+class Materials:
+  """Material options of a style table as arrays"""
+
+  # Materials constructor
+  # ---------------------
+  # Takes a sequence of styles, such as a StyleTable, or of dicts of
+  # style options.
+  def __init__(self, styles):
+    """Constructor for the Materials class"""
+    styles = list(styles)
+    colors = [s.get('color', default_color) for s in styles]
+    self.diffuse = np.array([rgb(c) for c in colors]).reshape(-1,3)
+    self.ambient = np.array([rgb(s.get('ambient_color', c)) for s, c in zip(styles, colors)]).reshape(-1,3)
+    self.specular = np.array([rgb(s.get('specular_color', default_specular_color)) for s in styles]).reshape(-1,3)
+    self.shininess = np.array([float(s.get('specularity', default_specularity)) for s in styles])
+    self.opacity = np.array([float(getattr(c, 'array', c)[3]) if len(c) > 3 else 1. for c in colors])
+
+  def __len__(self):
+    return( len(self.diffuse))
+
+
+# shade function
+# --------------
+# Evaluates Blinn-Phong shading at an array of points for all the
+# lights at once. Takes:
+# - positions: an (N,3) array of world space points
+# - normals: an (N,3) array of unit normals
+# - lights: a LightObj, or a light or list of lights
+# - materials: a Materials table
+# - material_ids: an (N,) array of rows of the table, all 0 if None
+# - eye: the position of the viewer, or
+# - view_dir: the direction the viewer looks in, for an orthographic
+#   view
+# - shadow: an optional (N,L) array of how much of each light reaches
+#   each point, from 0 in full shadow to 1
+# Returns the (N,3) float32 lit colors, clipped to [0,1].
+#
+# For each point and light the direction to the light, the distance
+# attenuation and the spot cone factor are evaluated as (n,L) arrays,
+# n points at a time, so the lights are never looped over in Python.
+def shade(positions, normals, lights, materials, material_ids=None, eye=None, view_dir=None, shadow=None):
+  """Returns the Blinn-Phong lit colors of an array of points"""
+  if not isinstance(lights, LightObj):
+    lights = LightObj(*(lights if isinstance(lights, (list, tuple)) else [lights]))
+  positions = np.asarray(positions, dtype=np.float32).reshape(-1,3)
+  normals = np.asarray(normals, dtype=np.float32).reshape(-1,3)
+  if material_ids is None:
+    material_ids = np.zeros(len(positions), dtype=np.intp)
+  if eye is None and view_dir is None:
+    raise AttributeError("shade takes an eye position or a view direction")
+  out = np.empty((len(positions),3), dtype=np.float32)
+  step = max(chunk_pairs//max(len(lights), 1), 1)
+  for lo in range(0, len(positions), step):
+    hi = min(lo+step, len(positions))
+    out[lo:hi] = shade_chunk(positions[lo:hi], normals[lo:hi], lights, materials,
+                             np.asarray(material_ids)[lo:hi], eye, view_dir,
+                             None if shadow is None else shadow[lo:hi])
+  return( out)
+
+def normalize(v):
+  l = np.sqrt(np.einsum('...i,...i->...', v, v))
+  return( v/np.maximum(l, np.float32(1.e-12))[...,np.newaxis])
+
+def shade_chunk(p, n, lights, materials, ids, eye, view_dir, shadow=None):
+  """Shades one chunk of points"""
+  f4 = np.float32
+  color = (lights.ambient*materials.ambient)[ids].astype(f4)
+  if len(lights) == 0:
+    return( np.clip(color, 0, 1))
+  # Direction to the viewer, (n,3)
+  if eye is not None:
+    v = normalize(np.asarray(getattr(eye, 'array', eye), dtype=f4)-p)
+  else:
+    v = np.broadcast_to(-normalize(np.asarray(getattr(view_dir, 'array', view_dir), dtype=f4)), p.shape)
+  # Direction and distance to each light, (n,L,3) and (n,L)
+  to_light = lights.positions.astype(f4)[np.newaxis]-p[:,np.newaxis]
+  to_light[:,lights.directional] = -lights.directions[lights.directional].astype(f4)
+  dist = np.sqrt(np.einsum('ijk,ijk->ij', to_light, to_light))
+  l = to_light/np.maximum(dist, f4(1.e-12))[...,np.newaxis]
+  att = lights.attenuation.astype(f4)
+  factor = 1./(att[:,0]+dist*(att[:,1]+dist*att[:,2]))
+  factor[:,lights.directional] = 1.
+  # Spot cone
+  spot = lights.spot_cos > -2
+  if np.any(spot):
+    cos = -np.einsum('ijk,jk->ij', l[:,spot], lights.directions[spot].astype(f4))
+    cone = np.where(cos >= lights.spot_cos[spot].astype(f4),
+                    np.maximum(cos, 0)**lights.spot_exponent[spot].astype(f4), 0)
+    factor[:,spot] *= cone
+  if shadow is not None:
+    factor *= shadow
+  # Diffuse and specular terms
+  n_dot_l = np.einsum('ik,ijk->ij', n, l)
+  lit = n_dot_l > 0
+  diffuse = np.where(lit, n_dot_l, 0)*factor
+  h = normalize(l+v[:,np.newaxis])
+  n_dot_h = np.maximum(np.einsum('ik,ijk->ij', n, h), 0)
+  specular = np.where(lit, n_dot_h**materials.shininess[ids].astype(f4)[:,np.newaxis], 0)*factor
+  light_colors = lights.colors.astype(f4)
+  color += materials.diffuse[ids].astype(f4)*np.dot(diffuse, light_colors)
+  color += materials.specular[ids].astype(f4)*np.dot(specular, light_colors)
+  return( np.clip(color, 0, 1))
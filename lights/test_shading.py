@@ -0,0 +1,52 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+from shading import *
+from light import *
+from ..utils.color import RGBA
+
+import unittest
+import numpy as np
+
+class TestShading(unittest.TestCase):
+
+  def setUp(self):
+    self.materials = Materials([{'color': RGBA(1,0,0,1)},
+                                {'color': RGBA(0,1,0,1), 'specular_color': RGBA(1,1,1,1),
+                                 'specularity': 10.}])
+
+  # Test the diffuse and ambient terms of a directional light
+  def test_directional(self):
+    lights = LightObj(AmbientLight(intensity=0.1), DirectionalLight((0,0,-1)))
+    c = shade([[0,0,0],[0,0,0]], [[0,0,1],[0,0,-1]], lights, self.materials, eye=(0,0,5))
+    self.assertTrue(np.allclose(c, [[1,0,0],[0.1,0,0]]))
+
+  # Test that a point light fades with distance and that a spot light
+  # only lights points inside its cone
+  def test_point_and_spot(self):
+    p = [[0,0,0],[3,0,0]]
+    n = [[0,0,1],[0,0,1]]
+    c = shade(p, n, PointLight((0,0,1), attenuation=(0,0,1)), self.materials, eye=(0,0,5))
+    self.assertAlmostEqual(c[0,0], 1.)
+    self.assertAlmostEqual(c[1,0], 0.1/np.sqrt(10), places=5)
+    c = shade(p, n, SpotLight((0,0,1), (0,0,-1), angle=0.5), self.materials, view_dir=(0,0,-1))
+    self.assertAlmostEqual(c[0,0], 1.)
+    self.assertEqual(c[1,0], 0.)
+
+  # Test that the specular highlight uses the material of each point,
+  # and that chunking gives the same colors
+  def test_specular(self):
+    p = np.random.rand(1000,3)
+    n = np.tile([0,0,1.], (1000,1))
+    ids = np.arange(1000) % 2
+    lights = [DirectionalLight((1,0,-1)), PointLight((0,0,2)), SpotLight((0,0,2), (0,0,-1))]
+    c = shade(p, n, lights, self.materials, ids, eye=(0,0,3))
+    self.assertTrue(np.all(c[ids == 0,1] == 0))
+    self.assertTrue(np.all(c[ids == 1,0] > 0))
+    import shading
+    pairs = shading.chunk_pairs
+    shading.chunk_pairs = 30
+    try:
+      self.assertTrue(np.allclose(shade(p, n, lights, self.materials, ids, eye=(0,0,3)), c))
+    finally:
+      shading.chunk_pairs = pairs
@@ -0,0 +1,291 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+import numpy as np
+
+from ..utils.vector import Vec3
+from ..utils.matrix import Mat3x4
+from ..graphics import GraphicsArray
+from ..transforms.transform import batch_trans_mats
+from ..renderables.renderable import RenderableGraphicsObj
+from ..renderables.surface import Surface
+from ..renderables.lineset import LineSet
+from ..renderables.style import Style, StyleTable
+
+__all__ = ['PrimitiveArray', 'BoxArray', 'ItemView']
+
+# The corners of a box as a mask of which coordinates come from pt1,
+# and the faces and edges of the box as indices into the corners. They
+# are in the same order as the ones used by Box.
+box_corner_mask = np.array([[0,0,0], [1,0,0], [1,1,0], [0,1,0],
+							[0,0,1], [1,0,1], [1,1,1], [0,1,1]], dtype=bool)
+box_face_array = np.array([[0,1,2], [0,2,3], # Bottom face
+						   [0,4,5], [0,5,1], # Front face
+						   [1,5,6], [1,6,2], # Left face
+						   [2,6,7], [2,7,3], # Back face
+						   [3,7,4], [3,4,0], # Right face
+						   [4,6,5], [4,7,6]], dtype=np.int32) # Top face
+box_edge_array = np.array([[0,1], [1,2], [2,3], [3,0], # Bottom edges
+						   [0,4], [1,5], [2,6], [3,7], # Side edges
+						   [4,5], [5,6], [6,7], [7,4]], dtype=np.int32) # Top edges
+
+line_options = ('line_color', 'line_width', 'line_style')
+
+##############################################################################
+# ItemView class
+# ==============
+# A view of a single item of a PrimitiveArray. It holds no data of its
+# own, reading an attribute reads the row of the column, and setting an
+# attribute writes the row back and marks the collection as changed.
+# Views are only made when an item is asked for, so a collection of
+# millions of items does not hold millions of Python objects.
+#
+# Example:
+# >>> boxes[3].pt1 = [2,2,2]
+# >>> boxes[3].style = {'color': Red}
+class ItemView:
+	"""Write-through view of one item of a PrimitiveArray"""
+
+	def __init__( self, collection, index):
+		object.__setattr__(self, 'collection', collection)
+		object.__setattr__(self, 'index', index)
+
+	def __getattr__( self, name):
+		return( self.collection.get_item(self.index, name))
+
+	def __setattr__( self, name, value):
+		self.collection.set_item(self.index, name, value)
+
+	def __repr__( self):
+		name = self.collection.__class__.__name__
+		return( "{}[{}]".format(name, self.index))
+
+
+##############################################################################
+# PrimitiveArray class
+# ====================
+# The base class for columnar collections of many primitives of one
+# kind. The parameters of the primitives are parallel (N,3) arrays
+# named in `columns`, and on top of the centers and transform matrices
+# of a GraphicsArray each item has an integer style id into a shared
+# StyleTable. The style options given to the constructor apply to the
+# whole collection, and the style of each item is merged over them.
+# It provides:
+# - Item views that write through to the columns (`[]` operator)
+# - Reading and writing a single item (get_item, set_item)
+# - Grouping of the item indices by style id (group_by_style)
+class PrimitiveArray(GraphicsArray):
+
+	columns = ()
+
+	def __init__( self, centers, trans_mats=None, style_ids=None, styles=None, transforms=[], **kwargs):
+		super(PrimitiveArray, self).__init__(centers, trans_mats, transforms, **kwargs)
+		self.style_table = StyleTable()
+		for style in (styles if styles is not None else [Style()]):
+			if not isinstance(style, Style):
+				style = Style(**style)
+			self.style_table.intern(style)
+		if style_ids is None:
+			self.style_ids = np.zeros(len(self.centers), dtype=np.uint32)
+		else:
+			self.style_ids = np.asarray(style_ids, dtype=np.uint32).flatten()
+		if len(self.style_ids) != len(self.centers):
+			name = self.__class__.__name__
+			raise AttributeError("{}.__init__ takes one style id for each item".format(name))
+		if len(self.style_ids) and self.style_ids.max() >= len(self.style_table):
+			name = self.__class__.__name__
+			raise ValueError("{} style ids must index into the styles".format(name))
+
+	def __getitem__( self, index):
+		"""Returns a view of one item"""
+		if index < 0:
+			index += len(self)
+		if not 0 <= index < len(self):
+			raise IndexError("{} index out of range".format(self.__class__.__name__))
+		return( ItemView(self, index))
+
+	def __iter__( self):
+		"""Returns an iterator over views of the items"""
+		for i in range(len(self)):
+			yield ItemView(self, i)
+
+	# get_item
+	# --------
+	# Returns a column row as a Vec3, the transform matrix as a Mat3x4,
+	# or the style record of a single item.
+	def get_item( self, index, name):
+		"""Returns an attribute of one item"""
+		if name in self.columns:
+			return( Vec3(getattr(self, name)[index]))
+		elif name == 'trans_mat':
+			if self.trans_mats is None:
+				return( Mat3x4(1,0,0,0,0,1,0,0,0,0,1,0, kind='identity'))
+			return( Mat3x4(self.trans_mats[index]))
+		elif name == 'style':
+			return( self.style_table[self.style_ids[index]])
+		raise AttributeError("{} items have no attribute {}".format(self.__class__.__name__, name))
+
+	# set_item
+	# --------
+	# Writes an attribute of a single item into the columns and marks
+	# the collection as changed. The identity transform matrices are
+	# only stored once an item is given a transform matrix of its own.
+	def set_item( self, index, name, value):
+		"""Sets an attribute of one item"""
+		if name in self.columns:
+			getattr(self, name)[index] = Vec3(value).array
+			self.update_center(index)
+		elif name == 'trans_mat':
+			if self.trans_mats is None:
+				self.trans_mats = np.zeros((len(self),3,4), dtype=np.float32)
+				self.trans_mats[:,:,:3] = np.eye(3)
+			self.trans_mats[index] = Mat3x4(value).array
+		elif name == 'style':
+			if not isinstance(value, Style):
+				value = Style(**value)
+			self.style_ids[index] = self.style_table.intern(value)
+		else:
+			raise AttributeError("{} items have no attribute {}".format(self.__class__.__name__, name))
+		self.mark_dirty()
+
+	# update_center
+	# -------------
+	# Recomputes the center of one item after one of its columns was
+	# written.
+	def update_center( self, index):
+		pass
+
+	# group_by_style
+	# --------------
+	# Returns a dictionary from the style id to the array of indices of
+	# the items with that style. A collection with a single style is
+	# not indexed at all.
+	def group_by_style( self):
+		"""Returns the item indices grouped by style id"""
+		ids = np.unique(self.style_ids)
+		if len(ids) == 1:
+			return( {int(ids[0]): slice(None)})
+		order = np.argsort(self.style_ids, kind='stable')
+		bounds = np.searchsorted(self.style_ids[order], ids)
+		groups = np.split(order, bounds[1:])
+		return( dict((int(i), g) for i, g in zip(ids, groups)))
+
+	# transform_rows
+	# --------------
+	# Moves an (M,P,3) array of points, P points for each of the items
+	# in the selection, by the transform matrix of each item.
+	def transform_rows( self, points, select=slice(None)):
+		"""Returns the points of each item moved by its transform matrix"""
+		if self.trans_mats is None:
+			return( points)
+		m = self.trans_mats[select]
+		return( np.matmul(points, np.swapaxes(m[:,:,:3], 1, 2)) + m[:,np.newaxis,:,3])
+
+
+##############################################################################
+# BoxArray class
+# ==============
+# A columnar collection of axis aligned boxes, each given by two
+# opposite corners pt0 and pt1. The renderable is built a whole style
+# group at a time: the corners of all the boxes are made with one
+# `where`, moved with one batched matrix product, and the faces are
+# the faces of one box offset by 8 for each box.
+class BoxArray(PrimitiveArray):
+
+	columns = ('pt0', 'pt1')
+
+	# BoxArray constructor
+	# --------------------
+	# This constructor takes the following arguments:
+	# - pt0, pt1: (N,3) arrays of the opposite corners of the boxes
+	# - trans_mats: an optional (N,3,4) array of transform matrices
+	# - style_ids: an optional (N,) array of indices into styles
+	# - styles: an optional sequence of Styles or style dictionaries
+	# - transforms: a list of transforms for the whole collection
+	# - **kwargs: style options for the whole collection
+	def __init__( self, pt0, pt1=None, trans_mats=None, style_ids=None, styles=None, transforms=[], **kwargs):
+		"""Constructor for the BoxArray class"""
+		self.pt0 = np.array(pt0, dtype=np.float32).reshape(-1,3)
+		if pt1 is None:
+			self.pt1 = np.zeros_like(self.pt0)
+		else:
+			self.pt1 = np.array(pt1, dtype=np.float32).reshape(-1,3)
+		if self.pt0.shape != self.pt1.shape:
+			raise AttributeError("BoxArray.__init__ takes the same number of pt0 and pt1 corners")
+		centers = 0.5*(self.pt0+self.pt1)
+		super(BoxArray, self).__init__(centers, trans_mats, style_ids, styles, transforms, **kwargs)
+
+	# from_arrays
+	# -----------
+	# Builds the collection from the corners and a recipe of batched
+	# transforms about the center of each box (see batch_trans_mats).
+	@classmethod
+	def from_arrays( cls, pt0, pt1, recipe=[], style_ids=None, styles=None, transforms=[], **kwargs):
+		pt0 = np.asarray(pt0, dtype=np.float32).reshape(-1,3)
+		pt1 = np.asarray(pt1, dtype=np.float32).reshape(-1,3)
+		trans_mats = None
+		if recipe:
+			trans_mats = batch_trans_mats(recipe, 0.5*(pt0+pt1))[0]
+		return( cls(pt0, pt1, trans_mats, style_ids, styles, transforms, **kwargs))
+
+	def update_center( self, index):
+		self.centers[index] = 0.5*(self.pt0[index]+self.pt1[index])
+
+	# calc_corners
+	# ------------
+	# Returns the (M,8,3) corners of the selected boxes moved by their
+	# transform matrices.
+	def calc_corners( self, select=slice(None)):
+		"""Returns the transformed corners of the boxes"""
+		pt0 = self.pt0[select][:,np.newaxis,:]
+		pt1 = self.pt1[select][:,np.newaxis,:]
+		corners = np.where(box_corner_mask, pt1, pt0)
+		return( self.transform_rows(corners, select))
+
+	# calc_box_areas
+	# --------------
+	# The faces of a box stay parallelograms under an affine transform,
+	# so the area of each pair of faces is the length of the cross
+	# product of two transformed sides.
+	def calc_box_areas( self):
+		"""Returns the surface area of each box"""
+		d = self.pt1-self.pt0
+		if self.trans_mats is None:
+			return( 2.*np.abs(d[:,0]*d[:,1]+d[:,1]*d[:,2]+d[:,2]*d[:,0]))
+		A = self.trans_mats[:,:,:3]
+		ex, ey, ez = [A[:,:,k]*d[:,k:k+1] for k in range(3)]
+		norm = lambda a, b: np.linalg.norm(np.cross(a, b), axis=1)
+		return( 2.*(norm(ex,ey)+norm(ey,ez)+norm(ez,ex)))
+
+	# The area center of a box is its center, since opposite faces have
+	# the same area, and it is still its center after an affine
+	# transform.
+	def _calc_area( self, display_radius=None):
+		return( float(np.sum(self.calc_box_areas(), dtype=np.float64)))
+
+	def _calc_center( self, display_radius=None):
+		areas = self.calc_box_areas().astype(np.float64)
+		cm = np.dot(areas, self.calc_world_centers())/np.sum(areas)
+		return( self.trans_mat*Vec3(cm))
+
+	# to_renderable
+	# -------------
+	# Builds one Surface, and one LineSet if any of the line options are
+	# set, for each style used by the boxes. The style options of each
+	# group go on its leaves, and the style options of the collection go
+	# on the container so the leaves inherit them.
+	def to_renderable( self, display_radius=None):
+		objs = []
+		collection_style = Style(**self.get_style_options())
+		for style_id, select in self.group_by_style().items():
+			style = self.style_table[style_id]
+			corners = self.calc_corners(select)
+			n = len(corners)
+			offsets = 8*np.arange(n, dtype=np.int32)[:,np.newaxis,np.newaxis]
+			vertices = corners.reshape(-1,3)
+			faces = (box_face_array[np.newaxis]+offsets).reshape(-1,3)
+			objs.append( Surface.from_arrays(vertices, faces, **Surface.trim_style_options(**style.options())))
+			if any(opt in style or opt in collection_style for opt in line_options):
+				edges = (box_edge_array[np.newaxis]+offsets).reshape(-1,2)
+				objs.append( LineSet.from_arrays(vertices, edges, **LineSet.trim_style_options(**style.options())))
+		return( RenderableGraphicsObj(*objs, trans=self.transforms, **self.get_style_options()))
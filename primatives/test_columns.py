@@ -0,0 +1,110 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+from columns import *
+from columns import box_corner_mask, box_face_array
+from ..utils.vector import Vec3
+from ..utils.matrix import Mat3x4
+from ..utils.color import RGBA
+from ..transforms.rotate import RotateX, RotateZ
+from ..transforms.translate import Translate
+from ..renderables.surface import Surface
+from ..renderables.style import Style
+
+import unittest
+import numpy as np
+
+# The transformed corners of one box, found one corner at a time
+def box_corners(pt0, pt1, trans_mat):
+	corners = [Vec3(np.where(mask, pt1, pt0)) for mask in box_corner_mask]
+	return( np.array([(trans_mat*c).array for c in corners]))
+
+class TestColumns(unittest.TestCase):
+
+	def setUp(self):
+		rng = np.random.RandomState(0)
+		self.pt0 = rng.uniform(-2, 0, (5,3)).astype(np.float32)
+		self.pt1 = self.pt0+rng.uniform(.5, 2, (5,3)).astype(np.float32)
+		self.angles = rng.uniform(-np.pi, np.pi, 5)
+		self.vecs = rng.uniform(-2, 2, (5,3))
+		recipe = [(RotateZ, {'angles': self.angles}), (Translate, {'vecs': self.vecs})]
+		styles = [{'color': RGBA(1,0,0,1)}, {'color': RGBA(0,0,1,1), 'line_width': 2}]
+		self.boxes = BoxArray.from_arrays(self.pt0, self.pt1, recipe, style_ids=[0,1,0,1,1], styles=styles)
+
+	# The transform matrix of one box built on its own
+	def box_mat(self, k):
+		center = 0.5*(self.pt0[k]+self.pt1[k])
+		return( Translate(self.vecs[k]).get_mat(None)*RotateZ(self.angles[k], origin=center).get_mat(None))
+
+	# Test that the corners and areas are the same as for the boxes
+	# made one at a time
+	def test_BoxArray(self):
+		corners = self.boxes.calc_corners()
+		areas = self.boxes.calc_box_areas()
+		for k in range(5):
+			c = box_corners(self.pt0[k], self.pt1[k], self.box_mat(k))
+			self.assertTrue(np.allclose(corners[k], c, atol=1e-5))
+			self.assertAlmostEqual(areas[k], Surface.from_arrays(c, box_face_array).calc_area(), places=4)
+		centers = np.array([corners[k].mean(axis=0) for k in range(5)])
+		self.assertTrue(np.allclose(self.boxes.calc_center().array, np.dot(areas, centers)/areas.sum(), atol=1e-5))
+		with self.assertRaises(AttributeError):
+			BoxArray(self.pt0, self.pt1[:3])
+
+	# Test that the renderable has one surface for each style, with the
+	# corners of its boxes, and lines only where a line option is set
+	def test_to_renderable(self):
+		rend = self.boxes.to_renderable()
+		kinds = [obj.__class__.__name__ for obj in rend.obj_list]
+		self.assertEqual(kinds, ['Surface', 'Surface', 'LineSet'])
+		corners = self.boxes.calc_corners()
+		self.assertTrue(np.allclose(rend.obj_list[0].vertex_array, corners[[0,2]].reshape(-1,3)))
+		self.assertTrue(np.allclose(rend.obj_list[1].vertex_array, corners[[1,3,4]].reshape(-1,3)))
+		self.assertEqual(len(rend.obj_list[1].face_array), 36)
+		self.assertTrue(np.all(rend.obj_list[1].color.array == [0,0,1,1]))
+
+	# Test that the item views read and write through to the columns
+	def test_ItemView(self):
+		box = self.boxes[-2]
+		self.assertTrue(np.allclose(box.pt0.array, self.pt0[3]))
+		self.assertTrue(np.allclose(box.trans_mat.array, self.box_mat(3).array, atol=1e-5))
+		self.assertTrue(np.all(box.style['color'].array == [0,0,1,1]))
+		version = self.boxes.version
+		box.pt1 = [5,5,5]
+		self.assertTrue(np.all(self.boxes.pt1[3] == 5))
+		self.assertTrue(np.allclose(self.boxes.centers[3], 0.5*(self.pt0[3]+5)))
+		self.assertGreater(self.boxes.version, version)
+		box.style = {'color': RGBA(0,1,0,1)}
+		self.assertEqual(self.boxes.style_ids[3], 2)
+		self.boxes[0].style = Style(color=RGBA(0,1,0,1))
+		self.assertEqual(self.boxes.style_ids[0], 2)
+		with self.assertRaises(AttributeError):
+			box.radius
+		with self.assertRaises(IndexError):
+			self.boxes[5]
+		self.assertEqual(len(list(self.boxes)), 5)
+
+	# Test that the identity matrices are only stored once an item is
+	# given a matrix of its own
+	def test_trans_mat(self):
+		boxes = BoxArray(self.pt0, self.pt1)
+		self.assertIsNone(boxes.trans_mats)
+		self.assertTrue(np.allclose(boxes.calc_corners()[1], box_corners(self.pt0[1], self.pt1[1], Mat3x4(1,0,0,0,0,1,0,0,0,0,1,0))))
+		m = RotateX(np.pi/2, origin=(0,0,0)).get_mat(None)
+		boxes[1].trans_mat = m
+		self.assertEqual(boxes.trans_mats.shape, (5,3,4))
+		self.assertTrue(np.allclose(boxes.calc_corners()[1], box_corners(self.pt0[1], self.pt1[1], m), atol=1e-5))
+		self.assertTrue(np.allclose(boxes.trans_mats[0], np.eye(3,4)))
+
+	def test_group_by_style(self):
+		groups = self.boxes.group_by_style()
+		self.assertEqual(sorted(groups), [0,1])
+		self.assertEqual(groups[0].tolist(), [0,2])
+		self.assertEqual(groups[1].tolist(), [1,3,4])
+		self.assertEqual(BoxArray(self.pt0, self.pt1).group_by_style(), {0: slice(None)})
+		with self.assertRaises(ValueError):
+			BoxArray(self.pt0, self.pt1, style_ids=[0,0,0,0,1])
+		with self.assertRaises(AttributeError):
+			BoxArray(self.pt0, self.pt1, style_ids=[0,0])
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,55 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+import struct
+import zlib
+import numpy as np
+
+__all__ = ['encode_png', 'iter_png_chunks']
+
+signature = b'\x89PNG\r\n\x1a\n'
+
+# to_rgba8 function
+# -----------------
+# Returns a (height,width,3) or (height,width,4) float image in [0,1]
+# as 8 bit channels. uint8 images are kept as they are.
+def to_rgba8(image):
+  """Returns an image as uint8 channels"""
+  image = np.asarray(image)
+  if image.ndim != 3 or image.shape[2] not in (3,4):
+    raise AttributeError("A PNG image must be a (height,width,3) or (height,width,4) array")
+  if image.dtype == np.uint8:
+    return( image)
+  return( (np.clip(image, 0, 1)*255+0.5).astype(np.uint8))
+
+def png_chunk(kind, data):
+  """Returns a PNG chunk with its length and CRC"""
+  return( struct.pack('>I', len(data))+kind+data+struct.pack('>I', zlib.crc32(kind+data) & 0xFFFFFFFF))
+
+# iter_png_chunks function
+# ------------------------
+# Encodes an image as a PNG file, yielded a piece at a time so it can
+# be streamed while it is encoded: the signature with the header, then
+# an IDAT chunk for each block of rows, then the end chunk. Each block
+# of rows is flushed from the compressor, so a reader can decode it as
+# soon as it arrives. The rows are not filtered, which keeps encoding
+# fast for previews.
+def iter_png_chunks(image, rows=64, level=6):
+  """Yields the chunks of a PNG encoding of an image"""
+  pixels = to_rgba8(image)
+  height, width, channels = pixels.shape
+  color_type = 6 if channels == 4 else 2
+  yield( signature+png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0)))
+  compressor = zlib.compressobj(level)
+  for lo in range(0, height, rows):
+    block = pixels[lo:lo+rows].reshape(-1, width*channels)
+    raw = np.concatenate([np.zeros((len(block),1), dtype=np.uint8), block], axis=1).tobytes()
+    yield( png_chunk(b'IDAT', compressor.compress(raw)+compressor.flush(zlib.Z_SYNC_FLUSH)))
+  yield( png_chunk(b'IDAT', compressor.flush())+png_chunk(b'IEND', b''))
+
+# encode_png function
+# -------------------
+# Returns the PNG file of an image as bytes.
+def encode_png(image, level=6):
+  """Returns an image encoded as a PNG file"""
+  return( b''.join(iter_png_chunks(image, max(len(image), 1), level)))
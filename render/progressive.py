@@ -0,0 +1,227 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+import sys
+import time
+import asyncio
+import numpy as np
+
+from ..renderables.renderable import transform_array
+from ..renderables.surface import Surface
+from ..lights.light import LightObj, DirectionalLight, SpotLight
+from ..lights.shading import Materials, shade
+from ..cameras.camera import Camera
+from .raster import TriangleScene, shade_frame, color_array
+from .raytrace import RayTracer
+from .shadow import ShadowCache
+from .png import encode_png
+
+__all__ = ['render', 'iter_render', 'aiter_render', 'quick_preview', 'splat_preview']
+
+# The most vertices drawn by the first preview. Its cost is set by this
+# number, not by the size of the scene, which keeps it well under 100
+# ms even for scenes with millions of triangles. Scenes with at most
+# preview_faces triangles are rasterized for the preview instead.
+preview_points = 1 << 16
+preview_faces = 1 << 14
+
+#####################################################################
+# Progressive rendering
+# =====================
+# A frame is rendered as a series of updates, each a pair of the
+# (x0, y0, x1, y1) pixel box that changed and its pixels, so a viewer
+# can show something right away and refine it as the render goes on:
+# - a coarse preview, from quick_preview
+# - for the 'raster' method, the rasterized image without shadows, and
+#   then with shadow maps
+# - for the 'raytrace' method, the passes of RayTracer.iter_updates:
+#   coarse previews, each tile as it is finished, the whole image, and
+#   the extra samples that smooth the edges
+# The last update is always the whole finished image. The pixels are a
+# (height,width,4) float32 array, or the bytes of a PNG file with the
+# 'png' output.
+
+# iter_render function
+# --------------------
+# Yields the (box, pixels) updates of a progressive render. Takes:
+# - graphics: a renderable graphics object
+# - lights: a LightObj, or a light or list of lights
+# - camera: a Camera
+# - method: 'raster' or 'raytrace'
+# - output: 'array' or 'png'
+# - shadows: whether the rasterizer draws shadow maps, the ray tracer
+#   always traces shadows
+# - samples: the samples per pixel of the ray tracer
+# - processes: the number of ray tracing worker processes
+# - preview_step: the size in pixels of the cells of the first preview
+# - shadow_cache: a ShadowCache to reuse shadow maps across frames
+def iter_render(graphics, lights, camera, method='raster', output='array', shadows=True, samples=4,
+                processes=1, preview_step=8, background=(1,1,1,0), shadow_cache=None):
+  """Yields progressively refined updates of a rendered image"""
+  if method not in ('raster', 'raytrace'):
+    raise ValueError("The render method must be 'raster' or 'raytrace'")
+  if output not in ('array', 'png'):
+    raise ValueError("The render output must be 'array' or 'png'")
+  if not isinstance(lights, LightObj):
+    lights = LightObj(*(lights if isinstance(lights, (list, tuple)) else [lights]))
+  encode = encode_png if output == 'png' else (lambda pixels: pixels)
+  graphics = graphics.to_renderable()
+  full = (0, 0, camera.width, camera.height)
+  yield( full, encode(quick_preview(graphics, lights, camera, preview_step, background)))
+  scene = TriangleScene(graphics)
+  if method == 'raster':
+    shadowed = shadows and any(isinstance(l, (DirectionalLight, SpotLight)) for l in lights.direct)
+    yield( full, encode(shade_frame(scene, lights, camera, background=background)))
+    if shadowed:
+      shadow_maps = (shadow_cache or ShadowCache()).get_maps(lights, scene)
+      yield( full, encode(shade_frame(scene, lights, camera, shadow_maps, background)))
+  else:
+    tracer = RayTracer(scene, lights, camera, background)
+    steps = [s for s in (4,2) if s < preview_step]
+    for box, pixels in tracer.iter_updates(samples, steps, processes):
+      yield( box, encode(pixels))
+
+# aiter_render function
+# ---------------------
+# The same updates as iter_render, as an asynchronous generator for
+# servers that stream the updates. Each step of the render runs in a
+# worker thread, so the event loop is free while it works.
+async def aiter_render(graphics, lights, camera, **kwargs):
+  """Yields progressively refined updates of a rendered image"""
+  loop = asyncio.get_running_loop()
+  updates = iter_render(graphics, lights, camera, **kwargs)
+  while True:
+    update = await loop.run_in_executor(None, next, updates, None)
+    if update is None:
+      return
+    yield( update)
+
+# render function
+# ---------------
+# Renders a graphics object lit by a set of lights from a camera. With
+# progressive set, returns the iter_render generator of updates,
+# otherwise returns the finished image. Takes the same keyword
+# arguments as iter_render.
+def render(graphics, lights, camera, progressive=False, **kwargs):
+  """Renders a scene to an image"""
+  updates = iter_render(graphics, lights, camera, **kwargs)
+  if progressive:
+    return( updates)
+  for box, pixels in updates:
+    pass
+  return( pixels)
+
+
+# quick_preview function
+# ----------------------
+# A coarse preview image with cells of step by step pixels, made in a
+# time that does not grow with the size of the scene. Small scenes are
+# rasterized at the size of the cells, large ones are splatted.
+def quick_preview(graphics, lights, camera, step=8, background=(1,1,1,0)):
+  """Returns a coarse preview image of the surfaces"""
+  faces = sum(len(leaf.face_array) for leaf in graphics.iter_leaves() if isinstance(leaf, Surface))
+  if faces > preview_faces:
+    return( splat_preview(graphics, lights, camera, step, background))
+  w, h = (camera.width+step-1)//step, (camera.height+step-1)//step
+  coarse = Camera(eye=camera.eye, target=camera.target, up=camera.up, projection=camera.projection,
+                  fov=camera.fov, ortho_height=camera.ortho_height, near=camera.near, far=camera.far,
+                  width=w, height=h)
+  image = shade_frame(TriangleScene(graphics), lights, coarse, background=background)
+  return( np.repeat(np.repeat(image, step, axis=0), step, axis=1)[:camera.height,:camera.width])
+
+# splat_preview function
+# ----------------------
+# A quick preview of the surfaces of a graphics object, whatever their
+# size. At most preview_points vertices are projected into an image
+# with cells of step by step pixels, and the nearest vertex in each
+# cell is kept. The normals are rebuilt from the positions in the
+# neighbouring cells, then each cell is shaded without shadows, and
+# the cells are scaled back up to the full image.
+def splat_preview(graphics, lights, camera, step=8, background=(1,1,1,0)):
+  """Returns a coarse preview image of the surfaces"""
+  width, height = camera.width, camera.height
+  w, h = (width+step-1)//step, (height+step-1)//step
+  table = graphics.resolve_styles()
+  leaves = [(leaf, mat) for leaf, mat in graphics.iter_leaf_mats() if isinstance(leaf, Surface)]
+  total = sum(len(leaf.vertex_array) for leaf, mat in leaves)
+  stride = max(-(-total//preview_points), 1)
+  positions, ids, colors = [], [], []
+  for leaf, mat in leaves:
+    positions.append( transform_array(mat, leaf.vertex_array[::stride]).astype(np.float32))
+    ids.append( np.full(len(positions[-1]), leaf.style_id, dtype=np.int64))
+    if getattr(leaf, 'vertex_colors', None) is not None:
+      colors.append( color_array(leaf.vertex_colors[::stride]))
+    else:
+      colors.append( np.full((len(positions[-1]),4), np.nan, dtype=np.float32))
+  image = np.empty((h,w,4), dtype=np.float32)
+  image[:] = background
+  if total > 0:
+    positions, ids, colors = np.concatenate(positions), np.concatenate(ids), np.concatenate(colors)
+    ndc, screen, inside = camera.project(positions)
+    inside &= (screen[:,0] < w*step) & (screen[:,1] < h*step)
+    k = np.flatnonzero(inside)
+    cell = (screen[k,1]//step).astype(np.int64)*w+(screen[k,0]//step).astype(np.int64)
+    keys = np.full(w*h, np.iinfo(np.uint64).max, dtype=np.uint64)
+    depth = np.round(np.clip(screen[k,2], 0, 1).astype(np.float64)*0xFFFFFFFF).astype(np.uint64)
+    np.minimum.at(keys, cell, (depth << np.uint64(32)) | k.astype(np.uint64))
+    drawn = np.flatnonzero(keys != np.iinfo(np.uint64).max)
+    nearest = (keys[drawn] & np.uint64(0xFFFFFFFF)).astype(np.int64)
+    grid = np.full((h,w,3), np.nan, dtype=np.float32)
+    grid.reshape(-1,3)[drawn] = positions[nearest]
+    normals = grid_normals(grid, camera).reshape(-1,3)[drawn]
+    lit = np.isnan(colors[nearest,0])
+    if camera.projection == 'perspective':
+      viewer = {'eye': camera.eye}
+    else:
+      viewer = {'view_dir': camera.target-camera.eye}
+    materials = Materials(table)
+    pixels = image.reshape(-1,4)
+    m = ids[nearest[lit]]
+    pixels[drawn[lit],:3] = shade(positions[nearest[lit]], normals[lit], lights, materials, m, **viewer)
+    pixels[drawn[lit],3] = materials.opacity[m]
+    pixels[drawn[~lit]] = colors[nearest[~lit]]
+  return( np.repeat(np.repeat(image, step, axis=0), step, axis=1)[:height,:width])
+
+# grid_normals function
+# ---------------------
+# The unit normals of an (h,w,3) grid of positions, NaN where empty,
+# from the differences to the neighbouring cells on either side. A cell
+# without neighbours faces the camera. The normals point towards the
+# camera.
+def grid_normals(grid, camera):
+  """Returns the normals of a grid of positions"""
+  def neighbour(axis, shift):
+    p = np.roll(grid, shift, axis)
+    edge = [slice(None)]*2
+    edge[axis] = 0 if shift > 0 else -1
+    p[tuple(edge)] = np.nan
+    return( np.where(np.isnan(p), grid, p))
+  du = neighbour(1, -1)-neighbour(1, 1)
+  dv = neighbour(0, 1)-neighbour(0, -1)
+  normals = np.cross(du, dv)
+  if camera.projection == 'perspective':
+    view = grid-camera.eye.astype(np.float32)
+  else:
+    view = np.broadcast_to((camera.target-camera.eye).astype(np.float32), grid.shape)
+  l = np.linalg.norm(normals, axis=2)
+  flat = ~(l > 0)
+  normals[flat] = -view[flat]
+  normals *= np.where(np.einsum('ijk,ijk->ij', normals, view) > 0, -1, 1)[...,np.newaxis].astype(np.float32)
+  return( normals/np.maximum(np.linalg.norm(normals, axis=2), 1.e-12)[...,np.newaxis])
+
+
+# Prints the time to the first preview and to the finished image of
+# each mesh file given on the command line, for both methods
+if __name__ == '__main__':
+  from ..fileio.importers import load_surface
+  from ..lights.light import AmbientLight
+  for path in sys.argv[1:]:
+    surface = load_surface(path)
+    center, radius = TriangleScene(surface).calc_bounding_sphere()
+    lights = LightObj(AmbientLight(intensity=0.2), DirectionalLight((-1,-1,-2)))
+    camera = Camera(eye=center+(2*radius,-2*radius,2*radius), target=center, up=(0,0,1))
+    for method in ('raster', 'raytrace'):
+      start = time.perf_counter()
+      times = [time.perf_counter()-start for update in iter_render(surface, lights, camera, method, 'png')]
+      print('{} {}: first preview {:.3f} s, finished {:.3f} s, {} updates'.format(
+        path, method, times[0], times[-1], len(times)))
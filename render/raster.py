@@ -0,0 +1,274 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+import numpy as np
+
+from ..renderables.renderable import transform_array
+from ..renderables.surface import Surface
+from ..lights.shading import Materials, shade
+
+__all__ = ['TriangleScene', 'rasterize', 'interpolate', 'shade_frame']
+
+# The number of candidate pixels tested at once. Rasterizing a chunk
+# needs a few arrays of this length, so the memory used does not grow
+# with the number or the size of the triangles.
+chunk_fragments = 1 << 21
+
+# The empty value of the packed depth buffer
+empty_key = np.iinfo(np.uint64).max
+
+#####################################################################
+# TriangleScene class
+# ===================
+# All the surfaces of a graphics object gathered into one set of world
+# space arrays, ready to be rasterized or ray traced:
+# - positions: the (V,3) world space vertex positions
+# - normals: the (V,3) world space vertex normals
+# - faces: the (F,3) vertex indices of the triangles
+# - face_materials: the (F,) style id of the surface of each triangle
+# - colors: the (V,4) vertex colors, for surfaces that have them
+# - face_colored: the (F,) bool mask of triangles with vertex colors,
+#   which are drawn with their colors instead of being lit
+# - materials: the Materials of the style table
+# - key: a tuple that changes whenever any of the arrays would, made
+#   of the identity, version and world matrix of each surface
+# Only the Surface leaves are gathered.
+class TriangleScene:
+  """The triangles of a graphics object as world space arrays"""
+
+  def __init__(self, graphics):
+    """Constructor for the TriangleScene class"""
+    table = graphics.resolve_styles()
+    positions, normals, faces, materials, colors, colored, key = [], [], [], [], [], [], []
+    offset = 0
+    for leaf, world_mat in graphics.iter_leaf_mats():
+      if not isinstance(leaf, Surface):
+        continue
+      p = transform_array(world_mat, leaf.vertex_array).astype(np.float32)
+      f = leaf.face_array.astype(np.int64)
+      positions.append( p)
+      normals.append( vertex_normals(p, f))
+      faces.append( f+offset)
+      materials.append( np.full(len(f), leaf.style_id, dtype=np.int64))
+      has_colors = getattr(leaf, 'vertex_colors', None) is not None
+      if has_colors:
+        colors.append( color_array(leaf.vertex_colors))
+      else:
+        colors.append( np.zeros((len(p),4), dtype=np.float32))
+      colored.append( np.full(len(f), has_colors))
+      key.append( (id(leaf), leaf.version, world_mat.array.tobytes()))
+      offset += len(p)
+    self.positions = np.concatenate(positions) if positions else np.zeros((0,3), dtype=np.float32)
+    self.normals = np.concatenate(normals) if normals else np.zeros((0,3), dtype=np.float32)
+    self.faces = np.concatenate(faces) if faces else np.zeros((0,3), dtype=np.int64)
+    self.face_materials = np.concatenate(materials) if materials else np.zeros(0, dtype=np.int64)
+    self.colors = np.concatenate(colors) if colors else np.zeros((0,4), dtype=np.float32)
+    self.face_colored = np.concatenate(colored) if colored else np.zeros(0, dtype=bool)
+    self.materials = Materials(table)
+    self.key = tuple(key)
+
+  def __len__(self):
+    """Number of triangles"""
+    return( len(self.faces))
+
+  # calc_bounding_sphere
+  # --------------------
+  # The center of the bounding box and the distance to its corners.
+  def calc_bounding_sphere(self):
+    """Returns the center and radius of a sphere around the scene"""
+    if len(self.positions) == 0:
+      return( np.zeros(3), 1.)
+    lo = self.positions.min(axis=0).astype(np.float64)
+    hi = self.positions.max(axis=0).astype(np.float64)
+    return( 0.5*(lo+hi), max(0.5*np.linalg.norm(hi-lo), 1.e-6))
+
+# color_array function
+# --------------------
+# Vertex colors as an (N,4) float32 array. Baked and loaded colors are
+# already arrays and are only viewed; a list of RGBA objects is
+# unpacked one color at a time.
+def color_array(colors):
+  """Returns the vertex colors as an (N,4) array"""
+  if isinstance(colors, np.ndarray):
+    return( np.asarray(colors, dtype=np.float32).reshape(-1,4))
+  return( np.array([getattr(x, 'array', x) for x in colors], dtype=np.float32).reshape(-1,4))
+
+# vertex_normals function
+# -----------------------
+# The area weighted vertex normals of a triangle mesh, the same as
+# Surface.calc_vertex_normals but from an array of positions.
+def vertex_normals(positions, faces):
+  """Returns the unit vertex normals of a mesh"""
+  p0, p1, p2 = positions[faces[:,0]], positions[faces[:,1]], positions[faces[:,2]]
+  n = np.cross(p1-p0, p2-p0)
+  normals = np.zeros(positions.shape, dtype=np.float32)
+  for k in range(3):
+    np.add.at(normals, faces[:,k], n)
+  l = np.linalg.norm(normals, axis=1)
+  return( normals/np.where(l > 0, l, 1)[:,np.newaxis])
+
+
+# rasterize function
+# ------------------
+# Finds the nearest triangle at the center of every pixel. Takes the
+# (V,3) screen coordinates from Camera.project, pixel x and y and a
+# depth in [0,1], the (F,3) faces, and the size of the image. Returns
+# the (height,width) depth buffer, 1 where no triangle is drawn, and
+# the (height,width) index of the triangle drawn at each pixel, -1
+# where there is none.
+#
+# The triangles are rasterized in bulk: they are grouped by the size
+# of their bounding boxes, rounded up to powers of two, and every pixel
+# of the boxes of a group is tested against the edges of its triangle
+# at once. The depth test is a single scatter minimum of the depth and
+# the triangle index packed into one uint64 per fragment, so the
+# nearest fragment wins whatever order the triangles are in. Triangles
+# with a corner behind the eye are left out, and fragments outside the
+# [0,1] depth range are clipped.
+def rasterize(screen, faces, width, height, cull_back=False):
+  """Returns the depth buffer and the triangle index of every pixel"""
+  keys = np.full(width*height, empty_key, dtype=np.uint64)
+  screen = np.asarray(screen, dtype=np.float32)
+  faces = np.asarray(faces, dtype=np.int64).reshape(-1,3)
+  tri = screen[faces]
+  ok = np.all(np.isfinite(tri), axis=(1,2))
+  tri[~ok] = 0
+  # The pixels with centers in the bounding box of each triangle
+  lo = np.ceil(tri[:,:,:2].min(axis=1)-0.5)
+  hi = np.floor(tri[:,:,:2].max(axis=1)-0.5)
+  x0 = np.clip(lo[:,0], 0, width).astype(np.int64)
+  y0 = np.clip(lo[:,1], 0, height).astype(np.int64)
+  w = np.clip(hi[:,0], -1, width-1).astype(np.int64)-x0+1
+  h = np.clip(hi[:,1], -1, height-1).astype(np.int64)-y0+1
+  area = ((tri[:,1,0]-tri[:,0,0])*(tri[:,2,1]-tri[:,0,1]) -
+          (tri[:,2,0]-tri[:,0,0])*(tri[:,1,1]-tri[:,0,1]))
+  ok &= (w > 0) & (h > 0) & (area != 0)
+  if cull_back:
+    # Screen y points down, so front faces wind clockwise on screen
+    ok &= area < 0
+  ids = np.flatnonzero(ok)
+  size_x = np.ceil(np.log2(np.maximum(w[ids], 1))).astype(np.int64)
+  size_y = np.ceil(np.log2(np.maximum(h[ids], 1))).astype(np.int64)
+  group = size_x*64+size_y
+  order = np.argsort(group, kind='stable')
+  ids, group = ids[order], group[order]
+  starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+  stops = np.r_[starts[1:], len(ids)]
+  for start, stop in zip(starts, stops):
+    bw, bh = 1 << int(group[start]//64), 1 << int(group[start] % 64)
+    step = max(chunk_fragments//(bw*bh), 1)
+    for lo_i in range(start, stop, step):
+      t = ids[lo_i:min(lo_i+step, stop)]
+      rasterize_block(keys, tri[t], t, x0[t], y0[t], w[t], h[t], area[t], bw, bh, width)
+  depth = (keys >> np.uint64(32)).astype(np.float64)/0xFFFFFFFF
+  depth[keys == empty_key] = 1.
+  face = (keys & np.uint64(0xFFFFFFFF)).astype(np.int64)
+  face[keys == empty_key] = -1
+  return( depth.reshape(height, width).astype(np.float32), face.reshape(height, width))
+
+def rasterize_block(keys, tri, t, x0, y0, w, h, area, bw, bh, width):
+  """Rasterizes a chunk of triangles with bounding boxes of bw by bh"""
+  dx = np.tile(np.arange(bw), bh)
+  dy = np.repeat(np.arange(bh), bw)
+  inside = (dx < w[:,np.newaxis]) & (dy < h[:,np.newaxis])
+  k, j = np.nonzero(inside)
+  px = (x0[k]+dx[j]).astype(np.float32)+np.float32(0.5)
+  py = (y0[k]+dy[j]).astype(np.float32)+np.float32(0.5)
+  b = edge_weights(tri[k], px, py, area[k])
+  hit = np.all(b >= 0, axis=1)
+  b, k, px, py = b[hit], k[hit], px[hit], py[hit]
+  z = np.einsum('ij,ij->i', b, tri[k,:,2])
+  front = (z >= 0) & (z <= 1)
+  z, k, px, py = z[front], k[front], px[front], py[front]
+  pixel = py.astype(np.int64)*width+px.astype(np.int64)
+  key = (np.round(z.astype(np.float64)*0xFFFFFFFF).astype(np.uint64) << np.uint64(32)) | t[k].astype(np.uint64)
+  np.minimum.at(keys, pixel, key)
+
+# edge_weights function
+# ---------------------
+# The screen space barycentric weights of points px, py in the
+# triangles tri, from the signed areas of the three sub-triangles.
+# A point is inside its triangle when all three are >= 0.
+def edge_weights(tri, px, py, area):
+  """Returns the (N,3) screen space barycentric weights"""
+  x0, y0 = tri[:,0,0], tri[:,0,1]
+  x1, y1 = tri[:,1,0], tri[:,1,1]
+  x2, y2 = tri[:,2,0], tri[:,2,1]
+  b = np.empty((len(px),3), dtype=np.float32)
+  b[:,0] = (x1-px)*(y2-py)-(x2-px)*(y1-py)
+  b[:,1] = (x2-px)*(y0-py)-(x0-px)*(y2-py)
+  b[:,2] = (x0-px)*(y1-py)-(x1-px)*(y0-py)
+  return( b/area[:,np.newaxis])
+
+
+# interpolate function
+# --------------------
+# Interpolates vertex attributes at the pixels where a triangle was
+# drawn. Takes the screen coordinates and the clip space w of the
+# vertices, the faces, the triangle index buffer from rasterize, and a
+# list of (V,k) vertex attribute arrays. The weights are corrected for
+# perspective with the 1/w of the corners. Returns the flat indices of
+# the covered pixels and one (P,k) array for each attribute.
+def interpolate(screen, w, faces, face_buffer, attributes):
+  """Returns the covered pixels and their interpolated attributes"""
+  height, width = face_buffer.shape
+  pixels = np.flatnonzero(face_buffer.ravel() >= 0)
+  t = face_buffer.ravel()[pixels]
+  f = faces[t]
+  px = (pixels % width).astype(np.float32)+np.float32(0.5)
+  py = (pixels // width).astype(np.float32)+np.float32(0.5)
+  tri = screen[f]
+  area = ((tri[:,1,0]-tri[:,0,0])*(tri[:,2,1]-tri[:,0,1]) -
+          (tri[:,2,0]-tri[:,0,0])*(tri[:,1,1]-tri[:,0,1]))
+  b = edge_weights(tri, px, py, area)/w[f]
+  b /= np.sum(b, axis=1)[:,np.newaxis]
+  values = [np.einsum('ij,ijk->ik', b, a[f]) for a in attributes]
+  return( pixels, values)
+
+
+# shade_frame function
+# --------------------
+# The color pass of the rasterizer. Rasterizes a TriangleScene from a
+# camera, then shades each covered pixel once, with the interpolated
+# world position and normal and the material of its triangle. Pixels
+# of triangles with vertex colors take the interpolated colors instead.
+# Surfaces are lit from both sides, the normals are turned to face the
+# camera.
+# If shadow maps are given, one for each light of the LightObj or None,
+# each light is scaled by its shadow. Returns the (height,width,4)
+# float32 image, with the background color where nothing is drawn.
+def shade_frame(scene, lights, camera, shadow_maps=None, background=(1,1,1,0)):
+  """Returns a rendered image of the scene"""
+  width, height = camera.width, camera.height
+  image = np.empty((height*width,4), dtype=np.float32)
+  image[:] = background
+  if len(scene) == 0:
+    return( image.reshape(height, width, 4))
+  clip = camera.to_clip(scene.positions)
+  ndc, screen, inside = camera.project(scene.positions)
+  depth, face_buffer = rasterize(screen, scene.faces, width, height)
+  pixels, (positions, normals, colors) = interpolate(screen, clip[:,3], scene.faces, face_buffer,
+                                                     [scene.positions, scene.normals, scene.colors])
+  t = face_buffer.ravel()[pixels]
+  normals /= np.maximum(np.linalg.norm(normals, axis=1), 1.e-12)[:,np.newaxis]
+  if camera.projection == 'perspective':
+    view = positions-camera.eye.astype(np.float32)
+  else:
+    view = (camera.target-camera.eye).astype(np.float32)
+  normals *= np.where(np.einsum('ij,ij->i', normals, np.broadcast_to(view, normals.shape)) > 0,
+                      -1, 1)[:,np.newaxis].astype(np.float32)
+  lit = ~scene.face_colored[t]
+  ids = scene.face_materials[t][lit]
+  shadow = None
+  if shadow_maps is not None:
+    from .shadow import calc_shadow_factors
+    shadow = calc_shadow_factors(shadow_maps, positions[lit], normals[lit])
+  if camera.projection == 'perspective':
+    viewer = {'eye': camera.eye}
+  else:
+    viewer = {'view_dir': camera.target-camera.eye}
+  image[pixels[lit],:3] = shade(positions[lit], normals[lit], lights, scene.materials, ids,
+                                shadow=shadow, **viewer)
+  image[pixels[lit],3] = scene.materials.opacity[ids]
+  image[pixels[~lit]] = colors[~lit]
+  return( image.reshape(height, width, 4))
@@ -0,0 +1,448 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+import sys
+import time
+import multiprocessing
+import numpy as np
+
+from ..lights.light import LightObj
+from ..lights.shading import shade
+from .raster import TriangleScene
+
+__all__ = ['BVH', 'RayTracer', 'measure_rays']
+
+# The number of rays traced at once. The traversal keeps a few arrays
+# of (ray, node) pairs for each packet, so the memory used does not
+# grow with the size of the image.
+packet_size = 1 << 13
+
+# The side of the square tiles of pixels handed out to worker processes
+tile_size = 32
+
+#####################################################################
+# BVH class
+# =========
+# A bounding volume hierarchy over the triangles of a mesh, for tracing
+# arrays of rays. The triangles are sorted along a Morton curve through
+# their centers, and every node of the tree holds a contiguous range of
+# the sorted triangles, split in half at each level down to leaves of
+# at most leaf_size triangles. The tree is built a whole level at a
+# time, with the node bounds as reductions over the ranges.
+#
+# The nodes are stored as parallel arrays:
+# - lo, hi: the (N,3) corners of the bounding box of each node
+# - start, stop: the range of the sorted triangles of each node
+# - left: the index of the first child, the second is left+1, or -1
+#   for a leaf
+# and the sorted triangles as the first corner v0 and the two edges e1
+# and e2, ready for the Moller-Trumbore test. order maps the sorted
+# triangles back to the faces of the mesh, and rank the faces to the
+# sorted triangles.
+class BVH:
+  """A bounding volume hierarchy of triangles"""
+
+  def __init__(self, positions, faces, leaf_size=4):
+    """Constructor for the BVH class"""
+    tri = np.asarray(positions, dtype=np.float32)[np.asarray(faces, dtype=np.int64).reshape(-1,3)]
+    lo, hi = tri.min(axis=1), tri.max(axis=1)
+    self.order = np.argsort(morton_codes(0.5*(lo+hi)), kind='stable')
+    tri, lo, hi = tri[self.order], lo[self.order], hi[self.order]
+    self.v0 = tri[:,0]
+    self.e1 = tri[:,1]-tri[:,0]
+    self.e2 = tri[:,2]-tri[:,0]
+    self.rank = np.empty_like(self.order)
+    self.rank[self.order] = np.arange(len(self.order))
+    # Pad the bounds with an empty box, so every range can be reduced
+    lo = np.concatenate([lo, np.full((1,3), np.inf, dtype=np.float32)])
+    hi = np.concatenate([hi, np.full((1,3), -np.inf, dtype=np.float32)])
+    nodes = {'lo': [], 'hi': [], 'start': [], 'stop': [], 'left': []}
+    start, stop = np.zeros(min(len(tri), 1), dtype=np.int64), np.full(min(len(tri), 1), len(tri))
+    first = 0
+    while len(start):
+      n = len(start)
+      bounds = np.stack([start, stop], axis=1).ravel()
+      split = stop-start > leaf_size
+      left = np.full(n, -1, dtype=np.int64)
+      left[split] = first+n+2*np.arange(np.count_nonzero(split))
+      nodes['lo'].append( np.minimum.reduceat(lo, bounds)[::2])
+      nodes['hi'].append( np.maximum.reduceat(hi, bounds)[::2])
+      nodes['start'].append( start)
+      nodes['stop'].append( stop)
+      nodes['left'].append( left)
+      mid = (start[split]+stop[split])//2
+      start, stop = np.stack([start[split], mid], axis=1).ravel(), np.stack([mid, stop[split]], axis=1).ravel()
+      first += n
+    for name, values in nodes.items():
+      setattr(self, name, np.concatenate(values) if values else np.zeros((0,3) if name in ('lo', 'hi') else 0))
+
+  def __len__(self):
+    """Number of nodes"""
+    return( len(self.left))
+
+  # intersect method
+  # ----------------
+  # Traces (N,3) arrays of ray origins and unit directions through the
+  # tree. Returns the (N,) distance to the nearest hit, inf for a miss,
+  # and the (N,) index of the face that was hit, -1 for a miss. Only
+  # hits closer than t_max count. With any_hit the search for a ray
+  # stops at its first hit, which is all a shadow ray needs.
+  #
+  # All the rays go down the tree together, as an array of (ray, node)
+  # pairs. At each step the pairs whose ray misses the box of its node,
+  # or only reaches it beyond the nearest hit found so far, are
+  # dropped, the pairs at leaves test their ray against every triangle
+  # of the leaf, and the pairs at inner nodes are replaced by two pairs
+  # for the children.
+  def intersect(self, origins, directions, t_max=np.inf, any_hit=False):
+    """Returns the nearest hit distance and face of each ray"""
+    origins = np.asarray(origins, dtype=np.float32).reshape(-1,3)
+    directions = np.asarray(directions, dtype=np.float32).reshape(-1,3)
+    t_best = np.empty(len(origins), dtype=np.float32)
+    t_best[:] = t_max
+    hit = np.full(len(origins), -1, dtype=np.int64)
+    if len(self) == 0:
+      return( np.where(hit < 0, np.float32(np.inf), t_best), hit)
+    with np.errstate(divide='ignore', invalid='ignore'):
+      inverse = np.float32(1)/directions
+    r = np.arange(len(origins))
+    n = np.zeros(len(origins), dtype=np.int64)
+    while len(r):
+      # Slab test of the rays against the boxes of their nodes
+      with np.errstate(invalid='ignore'):
+        t0 = (self.lo[n]-origins[r])*inverse[r]
+        t1 = (self.hi[n]-origins[r])*inverse[r]
+      near = np.fmax.reduce(np.fmin(t0, t1), axis=1)
+      far = np.fmin.reduce(np.fmax(t0, t1), axis=1)
+      keep = (near <= far) & (far >= 0) & (near < t_best[r])
+      if any_hit:
+        keep &= hit[r] < 0
+      r, n = r[keep], n[keep]
+      leaf = self.left[n] < 0
+      if np.any(leaf):
+        self.intersect_leaves(origins, directions, r[leaf], n[leaf], t_best, hit)
+      r, n = np.repeat(r[~leaf], 2), np.repeat(self.left[n[~leaf]], 2)
+      n[1::2] += 1
+    return( np.where(hit < 0, np.float32(np.inf), t_best), hit)
+
+  def intersect_leaves(self, origins, directions, r, n, t_best, hit):
+    """Tests rays against all the triangles of their leaves"""
+    counts = self.stop[n]-self.start[n]
+    r = np.repeat(r, counts)
+    t = np.repeat(self.start[n]-np.cumsum(counts)+counts, counts)+np.arange(len(r))
+    d, u, v = moller_trumbore(origins[r], directions[r], self.v0[t], self.e1[t], self.e2[t])
+    ok = (u >= 0) & (v >= 0) & (u+v <= 1) & (d > 0) & (d < t_best[r])
+    r, t, d = r[ok], t[ok], d[ok]
+    np.minimum.at(t_best, r, d)
+    nearest = d == t_best[r]
+    hit[r[nearest]] = self.order[t[nearest]]
+
+  # calc_barycentrics method
+  # ------------------------
+  # Returns the (N,3) barycentric weights of the corners of the faces
+  # hit by an array of rays.
+  def calc_barycentrics(self, origins, directions, faces):
+    """Returns the barycentric weights of the hit points"""
+    t = self.rank[faces]
+    d, u, v = moller_trumbore(np.asarray(origins, dtype=np.float32), np.asarray(directions, dtype=np.float32),
+                              self.v0[t], self.e1[t], self.e2[t])
+    return( np.stack([1-u-v, u, v], axis=1))
+
+# moller_trumbore function
+# ------------------------
+# The Moller-Trumbore ray triangle test over arrays of rays and
+# triangles, one triangle per ray. Returns the distance along each ray
+# to the plane of its triangle and the barycentric u and v of the hit
+# point, which is inside the triangle when u, v and 1-u-v are all >= 0.
+# Rays parallel to their triangle get a distance of inf.
+def moller_trumbore(origins, directions, v0, e1, e2):
+  """Returns the hit distance and barycentric u and v of each ray"""
+  p = np.cross(directions, e2)
+  det = np.einsum('ij,ij->i', e1, p)
+  with np.errstate(divide='ignore', invalid='ignore'):
+    inverse = np.float32(1)/det
+    s = origins-v0
+    u = np.einsum('ij,ij->i', s, p)*inverse
+    q = np.cross(s, e1)
+    v = np.einsum('ij,ij->i', directions, q)*inverse
+    d = np.einsum('ij,ij->i', e2, q)*inverse
+  d[det == 0] = np.inf
+  return( d, u, v)
+
+# morton_codes function
+# ---------------------
+# The 30 bit Morton codes of an (N,3) array of points, 10 bits for each
+# axis over their bounding box.
+def morton_codes(points):
+  """Returns the Morton codes of an array of points"""
+  if len(points) == 0:
+    return( np.zeros(0, dtype=np.uint64))
+  lo, hi = points.min(axis=0), points.max(axis=0)
+  q = ((points-lo)/np.maximum(hi-lo, 1.e-30)*1023).astype(np.uint64)
+  code = np.zeros(len(points), dtype=np.uint64)
+  for axis in range(3):
+    x = q[:,axis]
+    x = (x | (x << np.uint64(16))) & np.uint64(0x030000FF)
+    x = (x | (x << np.uint64(8))) & np.uint64(0x0300F00F)
+    x = (x | (x << np.uint64(4))) & np.uint64(0x030C30C3)
+    x = (x | (x << np.uint64(2))) & np.uint64(0x09249249)
+    code |= x << np.uint64(axis)
+  return( code)
+
+
+#####################################################################
+# RayTracer class
+# ===============
+# Ray traces a TriangleScene from a camera. For each pixel a ray from
+# the camera is traced through the BVH, the hit point is shaded with
+# the same Blinn-Phong shading and material options as the rasterizer,
+# and every light other than the ambient ones is tested for shadow with
+# a shadow ray from the hit point. Surfaces are lit from both sides.
+#
+# Frames are refined progressively (iter_frames): a few preview passes
+# trace a coarse grid of the pixels and fill the gaps, then the rest of
+# the pixels are traced, then more samples at offsets inside each pixel
+# are averaged in. The pixels of each pass are split into square tiles,
+# which can be shared out to worker processes.
+class RayTracer:
+  """Ray traces a triangle scene"""
+
+  # RayTracer constructor
+  # ---------------------
+  # Takes a TriangleScene or a graphics object, the lights, a Camera,
+  # and the background color of pixels where nothing is hit.
+  def __init__(self, scene, lights, camera, background=(1,1,1,0)):
+    """Constructor for the RayTracer class"""
+    if not isinstance(scene, TriangleScene):
+      scene = TriangleScene(scene)
+    if not isinstance(lights, LightObj):
+      lights = LightObj(*(lights if isinstance(lights, (list, tuple)) else [lights]))
+    self.scene = scene
+    self.lights = lights
+    self.camera = camera
+    self.background = np.asarray(background, dtype=np.float32)
+    self.bvh = BVH(scene.positions, scene.faces)
+    self.epsilon = 1.e-4*scene.calc_bounding_sphere()[1]
+    self.ray_count = 0
+
+  # trace method
+  # ------------
+  # Returns the (N,4) float32 colors seen along (N,3) arrays of ray
+  # origins and directions, traced in packets of packet_size rays.
+  def trace(self, origins, directions):
+    """Returns the colors seen along an array of rays"""
+    colors = np.empty((len(origins),4), dtype=np.float32)
+    for lo in range(0, len(origins), packet_size):
+      hi = min(lo+packet_size, len(origins))
+      colors[lo:hi] = self.trace_packet(origins[lo:hi], directions[lo:hi])
+    return( colors)
+
+  def trace_packet(self, origins, directions):
+    """Returns the colors seen along one packet of rays"""
+    scene = self.scene
+    colors = np.empty((len(origins),4), dtype=np.float32)
+    colors[:] = self.background
+    t, faces = self.bvh.intersect(origins, directions)
+    self.ray_count += len(origins)
+    hit = np.flatnonzero(faces >= 0)
+    if len(hit) == 0:
+      return( colors)
+    o, d, faces = origins[hit], directions[hit], faces[hit]
+    b = self.bvh.calc_barycentrics(o, d, faces)
+    corners = scene.faces[faces]
+    positions = o+t[hit,np.newaxis]*d
+    normals = np.einsum('ij,ijk->ik', b, scene.normals[corners])
+    normals /= np.maximum(np.linalg.norm(normals, axis=1), 1.e-12)[:,np.newaxis]
+    normals *= np.where(np.einsum('ij,ij->i', normals, d) > 0, -1, 1)[:,np.newaxis].astype(np.float32)
+    lit = ~scene.face_colored[faces]
+    ids = scene.face_materials[faces][lit]
+    shadow = self.calc_visibility(positions[lit]+self.epsilon*normals[lit])
+    if self.camera.projection == 'perspective':
+      viewer = {'eye': self.camera.eye}
+    else:
+      viewer = {'view_dir': self.camera.target-self.camera.eye}
+    colors[hit[lit],:3] = shade(positions[lit], normals[lit], self.lights, scene.materials, ids,
+                                shadow=shadow, **viewer)
+    colors[hit[lit],3] = scene.materials.opacity[ids]
+    colors[hit[~lit]] = np.einsum('ij,ijk->ik', b[~lit], scene.colors[corners[~lit]])
+    return( colors)
+
+  # calc_visibility method
+  # ----------------------
+  # Returns the (N,L) float32 visibility of an array of points for each
+  # light other than the ambient ones, 0 if a shadow ray from the point
+  # to the light is blocked and 1 if not.
+  def calc_visibility(self, points):
+    """Returns the shadow ray visibility of the points for each light"""
+    lights = self.lights
+    visibility = np.ones((len(points), len(lights)), dtype=np.float32)
+    for i in range(len(lights)):
+      if lights.directional[i]:
+        directions = np.broadcast_to(-lights.directions[i].astype(np.float32), points.shape)
+        t_max = np.inf
+      else:
+        directions = lights.positions[i].astype(np.float32)-points
+        t_max = np.linalg.norm(directions, axis=1)
+        directions = directions/np.maximum(t_max, 1.e-12)[:,np.newaxis]
+        t_max = t_max*np.float32(1-1.e-4)
+      t, faces = self.bvh.intersect(points, directions, t_max, any_hit=True)
+      visibility[faces >= 0,i] = 0
+      self.ray_count += len(points)
+    return( visibility)
+
+  # trace_pixels method
+  # -------------------
+  # Returns the (N,4) colors of the rays from the camera through (N,)
+  # arrays of pixel x and y positions.
+  def trace_pixels(self, px, py):
+    """Returns the colors of the camera rays through pixel positions"""
+    return( self.trace(*self.camera.calc_rays(px, py)))
+
+  # trace_tiles method
+  # ------------------
+  # Traces one pass over a set of pixels, at an offset inside each
+  # pixel. The pixels are split into tiles which are traced here, or
+  # by the workers of a multiprocessing pool. Yields the (N,) flat
+  # indices and (N,4) colors of each tile as it is finished.
+  def trace_tiles(self, pixels, offset=(0.5,0.5), pool=None):
+    """Yields the colors of the tiles of a pass as they finish"""
+    width = self.camera.width
+    x, y = pixels % width, pixels // width
+    tile = (y//tile_size)*((width+tile_size-1)//tile_size)+x//tile_size
+    order = np.argsort(tile, kind='stable')
+    bounds = np.flatnonzero(np.diff(tile[order]))+1
+    tiles = [(p, tx+offset[0], ty+offset[1]) for p, tx, ty in
+             zip(*[np.split(a[order], bounds) for a in (pixels, x, y)])]
+    if pool is None:
+      for p, px, py in tiles:
+        yield( p, self.trace_pixels(px, py))
+    else:
+      for p, colors, rays in pool.imap_unordered(trace_tile, tiles):
+        self.ray_count += rays
+        yield( p, colors)
+
+  # iter_updates method
+  # -------------------
+  # Renders a frame progressively, yielding each update as a pair of
+  # the (x0, y0, x1, y1) box of the pixels that changed and the float32
+  # image of that box:
+  # - one preview pass for each step of preview_steps, which traces the
+  #   pixels on a grid of that spacing and fills each cell with the
+  #   color of its corner
+  # - a pass over the rest of the pixels, at their centers, which
+  #   yields each tile as it is finished and then the whole image
+  # - samples-1 more passes at offsets inside the pixels, averaged into
+  #   the image to smooth the edges
+  # The pixels traced for a preview are not traced again. With more
+  # than one process, the tiles of each pass are traced by a pool of
+  # worker processes.
+  def iter_updates(self, samples=4, preview_steps=(8,4,2), processes=1):
+    """Yields progressively refined regions of the image"""
+    width, height = self.camera.width, self.camera.height
+    full = (0, 0, width, height)
+    pool = None
+    if processes > 1:
+      pool = multiprocessing.Pool(processes, initializer=init_worker, initargs=(self,))
+    try:
+      image = np.zeros((height*width,4), dtype=np.float32)
+      done = np.zeros(height*width, dtype=bool)
+      grid = np.arange(height*width).reshape(height, width)
+      for step in list(preview_steps)+[1]:
+        pixels = grid[::step,::step].ravel()
+        pixels = pixels[~done[pixels]]
+        for p, colors in self.trace_tiles(pixels, pool=pool):
+          image[p] = colors
+          if step == 1:
+            x, y = p % width, p // width
+            x0, y0, x1, y1 = int(x.min()), int(y.min()), int(x.max())+1, int(y.max())+1
+            yield( (x0, y0, x1, y1), image.reshape(height, width, 4)[y0:y1,x0:x1].copy())
+        done[pixels] = True
+        coarse = image.reshape(height, width, 4)[::step,::step]
+        yield( full, np.repeat(np.repeat(coarse, step, axis=0), step, axis=1)[:height,:width].copy())
+      total = image.copy()
+      for k in range(1, samples):
+        offset = (halton(k, 2), halton(k, 3))
+        for p, colors in self.trace_tiles(grid.ravel(), offset, pool):
+          total[p] += colors
+        yield( full, (total/(k+1)).reshape(height, width, 4))
+    finally:
+      if pool is not None:
+        pool.terminate()
+
+  # iter_frames method
+  # ------------------
+  # Yields the whole image after each pass of iter_updates.
+  def iter_frames(self, samples=4, preview_steps=(8,4,2), processes=1):
+    """Yields progressively refined images of the scene"""
+    full = (0, 0, self.camera.width, self.camera.height)
+    for box, image in self.iter_updates(samples, preview_steps, processes):
+      if box == full:
+        yield( image)
+
+  # render method
+  # -------------
+  # Returns the final image of iter_frames.
+  def render(self, samples=4, processes=1):
+    """Returns the ray traced image of the scene"""
+    for image in self.iter_frames(samples, (), processes):
+      pass
+    return( image)
+
+# The ray tracer of a worker process
+worker_tracer = None
+
+def init_worker(tracer):
+  global worker_tracer
+  worker_tracer = tracer
+
+def trace_tile(tile):
+  """Traces a tile in a worker process"""
+  p, px, py = tile
+  rays = worker_tracer.ray_count
+  colors = worker_tracer.trace_pixels(px, py)
+  return( p, colors, worker_tracer.ray_count-rays)
+
+# halton function
+# ---------------
+# The k-th number of the Halton sequence in a base, well spread points
+# in [0,1) for the sample offsets inside a pixel.
+def halton(k, base):
+  """Returns the k-th Halton number"""
+  x, f = 0., 1.
+  while k > 0:
+    f /= base
+    x += f*(k % base)
+    k //= base
+  return( x)
+
+
+# measure_rays function
+# ---------------------
+# Ray traces a frame and returns the image and the throughput in rays
+# per second per process, counting the camera rays and the shadow
+# rays. The time to build the BVH is not counted.
+def measure_rays(graphics, lights, camera, samples=1, processes=1):
+  """Returns a ray traced image and the rays per second per core"""
+  tracer = RayTracer(graphics, lights, camera)
+  start = time.perf_counter()
+  image = tracer.render(samples, processes)
+  seconds = time.perf_counter()-start
+  return( image, tracer.ray_count/max(seconds, 1e-9)/processes)
+
+
+# Prints the ray tracing throughput for each mesh file given on the
+# command line, lit by a directional and a point light
+if __name__ == '__main__':
+  from ..fileio.importers import load_surface
+  from ..cameras.camera import Camera
+  from ..lights.light import AmbientLight, DirectionalLight, PointLight
+  processes = multiprocessing.cpu_count()
+  for path in sys.argv[1:]:
+    surface = load_surface(path)
+    scene = TriangleScene(surface)
+    center, radius = scene.calc_bounding_sphere()
+    lights = LightObj(AmbientLight(intensity=0.2), DirectionalLight((-1,-1,-2)),
+                      PointLight(center+(0,0,3*radius)))
+    camera = Camera(eye=center+(2*radius,-2*radius,2*radius), target=center, up=(0,0,1))
+    image, rate = measure_rays(surface, lights, camera, processes=processes)
+    print('{}: {} faces, {:.0f} rays/s/core on {} cores'.format(path, len(scene), rate, processes))
@@ -0,0 +1,231 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+import sys
+import time
+import numpy as np
+
+from ..cameras.camera import Camera
+from ..lights.light import LightObj, DirectionalLight, SpotLight
+from .raster import TriangleScene, rasterize, shade_frame
+
+__all__ = ['ShadowMap', 'ShadowCache', 'calc_shadow_factors', 'measure_passes']
+
+#####################################################################
+# ShadowMap class
+# ===============
+# The depth of a scene seen from a light. The scene is rasterized from
+# a camera at the light with the same depth rasterizer as the color
+# pass, but only the depth buffer is kept:
+# - DirectionalLight: an orthographic camera looking along the light,
+#   framing the bounding sphere of the scene
+# - SpotLight: a perspective camera at the light, with the cone of the
+#   spot as its field of view
+# Point lights shine in every direction and have no shadow map.
+#
+# The depth buffer is stored as the distance from the light along its
+# view direction, so the depth bias is a world space distance:
+# `bias` texels of the map at the depth of each point. Lookups use
+# percentage closer filtering, the fraction of the (2*pcf+1)**2 texels
+# around a point that are not nearer to the light than the point.
+class ShadowMap:
+  """The depth of a scene seen from a light"""
+
+  # ShadowMap constructor
+  # ---------------------
+  # Takes a directional or spot light, a TriangleScene, the size of
+  # the square map in texels, the depth bias in texels and the radius
+  # of the filter in texels.
+  def __init__(self, light, scene, size=1024, bias=2., pcf=1):
+    """Constructor for the ShadowMap class"""
+    self.light = light
+    self.size = int(size)
+    self.bias = float(bias)
+    self.pcf = int(pcf)
+    self.camera = light_camera(light, scene, self.size)
+    self.depth = self.calc_depth_map(scene)
+
+  # calc_depth_map method
+  # ---------------------
+  # The depth-only pass: rasterizes the scene from the light and
+  # returns the (size,size) float32 distances, inf where nothing is
+  # drawn.
+  def calc_depth_map(self, scene):
+    """Returns the distance map of the scene seen from the light"""
+    ndc, screen, inside = self.camera.project(scene.positions)
+    depth, face_buffer = rasterize(screen, scene.faces, self.size, self.size)
+    distance = linear_depth(self.camera, depth)
+    distance[face_buffer < 0] = np.inf
+    return( distance)
+
+  # texel_size method
+  # -----------------
+  # The world space size of one texel at a distance from the light.
+  def texel_size(self, distance):
+    """Returns the size of a texel at a distance from the light"""
+    c = self.camera
+    if c.projection == 'orthographic':
+      return( np.full(np.shape(distance), c.ortho_height/self.size, dtype=np.float32))
+    return( (2.*np.tan(0.5*c.fov)/self.size*distance).astype(np.float32))
+
+  # lookup method
+  # -------------
+  # Returns the (N,) float32 fraction of the light that reaches each of
+  # an (N,3) array of world space points, from 0 in full shadow to 1.
+  # Points outside the map are lit. If the (N,3) unit normals of the
+  # points are given, the points are also moved off their surface by
+  # the bias along the normals, which keeps surfaces at a steep angle
+  # to the light from shadowing themselves.
+  def lookup(self, points, normals=None):
+    """Returns the filtered light visibility of an array of points"""
+    points = np.asarray(points, dtype=np.float32).reshape(-1,3)
+    if normals is not None:
+      distance = -self.camera.to_view(points)[:,2]
+      offset = self.bias*self.texel_size(distance)[:,np.newaxis]
+      points = points+offset*np.asarray(normals, dtype=np.float32).reshape(-1,3)
+    ndc, screen, inside = self.camera.project(points)
+    distance = -self.camera.to_view(points)[:,2]
+    covered = np.isfinite(screen[:,0]) & (screen[:,0] >= 0) & (screen[:,0] < self.size) & \
+              (screen[:,1] >= 0) & (screen[:,1] < self.size)
+    visible = np.ones(len(points), dtype=np.float32)
+    x = np.floor(screen[covered,0]).astype(np.int64)
+    y = np.floor(screen[covered,1]).astype(np.int64)
+    d = distance[covered]-self.bias*self.texel_size(distance[covered])
+    total = np.zeros(len(x), dtype=np.float32)
+    r = self.pcf
+    for dy in range(-r, r+1):
+      for dx in range(-r, r+1):
+        sx = np.clip(x+dx, 0, self.size-1)
+        sy = np.clip(y+dy, 0, self.size-1)
+        total += d <= self.depth[sy,sx]
+    visible[covered] = total/(2*r+1)**2
+    return( visible)
+
+# light_camera function
+# ---------------------
+# The camera of a shadow map, looking at the whole scene from a light.
+def light_camera(light, scene, size):
+  """Returns the camera that sees a scene from a light"""
+  center, radius = scene.calc_bounding_sphere()
+  direction = light.direction
+  up = np.eye(3)[np.argmin(np.abs(direction))]
+  if isinstance(light, DirectionalLight):
+    return( Camera(eye=center-2*radius*direction, target=center, up=up, projection='orthographic',
+                   ortho_height=2*radius, near=0.5*radius, far=3.5*radius, width=size, height=size))
+  elif isinstance(light, SpotLight):
+    reach = np.linalg.norm(center-light.position)+radius
+    near = max(np.dot(center-light.position, direction)-radius, 1.e-3*reach)
+    fov = min(2*light.angle, np.radians(170.))
+    return( Camera(eye=light.position, target=light.position+direction, up=up, fov=fov,
+                   near=near, far=max(reach, 2*near), width=size, height=size))
+  raise AttributeError("Only directional and spot lights have shadow maps")
+
+# linear_depth function
+# ---------------------
+# Turns the [0,1] depth buffer of a camera back into distances from the
+# camera along its view direction.
+def linear_depth(camera, depth):
+  """Returns the view space distances of a depth buffer"""
+  n, f = camera.near, camera.far
+  if camera.projection == 'orthographic':
+    return( (n+depth*(f-n)).astype(np.float32))
+  z = 2.*depth.astype(np.float64)-1
+  return( (2.*f*n/((f+n)-z*(f-n))).astype(np.float32))
+
+
+# calc_shadow_factors function
+# ----------------------------
+# Returns the (N,L) float32 visibility of an (N,3) array of points for
+# a list of shadow maps, one for each light other than the ambient
+# ones. A light with None instead of a map is never shadowed. The
+# normals of the points are optional, as for ShadowMap.lookup.
+def calc_shadow_factors(shadow_maps, points, normals=None):
+  """Returns the visibility of the points for each light"""
+  points = np.asarray(points, dtype=np.float32).reshape(-1,3)
+  factors = np.ones((len(points), len(shadow_maps)), dtype=np.float32)
+  for i, shadow_map in enumerate(shadow_maps):
+    if shadow_map is not None:
+      factors[:,i] = shadow_map.lookup(points, normals)
+  return( factors)
+
+
+#####################################################################
+# ShadowCache class
+# =================
+# Keeps the shadow maps of a set of lights from one frame to the next.
+# A map is made again only if its light, the scene or the map options
+# changed: the key of a map is the key of its light, the key of the
+# TriangleScene, which follows the version and world matrix of every
+# surface, and the size, bias and filter radius. The maps that are not
+# asked for in a frame are dropped.
+class ShadowCache:
+  """Shadow maps reused across frames"""
+
+  def __init__(self, size=1024, bias=2., pcf=1):
+    """Constructor for the ShadowCache class"""
+    self.size = size
+    self.bias = bias
+    self.pcf = pcf
+    self.maps = {}
+    self.hits = 0
+    self.misses = 0
+
+  # get_maps method
+  # ---------------
+  # Returns the list of shadow maps for the lights of a LightObj, in
+  # the order of its direct lights, with None for the point lights.
+  def get_maps(self, lights, scene):
+    """Returns the shadow maps of a set of lights"""
+    if not isinstance(lights, LightObj):
+      lights = LightObj(*(lights if isinstance(lights, (list, tuple)) else [lights]))
+    maps = {}
+    shadow_maps = []
+    for light in lights.direct:
+      if not isinstance(light, (DirectionalLight, SpotLight)):
+        shadow_maps.append( None)
+        continue
+      key = (light.key(), scene.key, self.size, self.bias, self.pcf)
+      if key in self.maps:
+        self.hits += 1
+        maps[key] = self.maps[key]
+      elif key not in maps:
+        self.misses += 1
+        maps[key] = ShadowMap(light, scene, self.size, self.bias, self.pcf)
+      shadow_maps.append( maps[key])
+    self.maps = maps
+    return( shadow_maps)
+
+
+# measure_passes function
+# -----------------------
+# Times the two passes of a shadowed frame separately: the depth-only
+# passes that make the shadow maps of the lights, and the color pass
+# that rasterizes and shades the image. Returns the image and the two
+# times in seconds.
+def measure_passes(graphics, lights, camera, size=1024):
+  """Returns a shadowed image and the depth and color pass times"""
+  scene = TriangleScene(graphics)
+  start = time.perf_counter()
+  shadow_maps = ShadowCache(size).get_maps(lights, scene)
+  depth_seconds = time.perf_counter()-start
+  start = time.perf_counter()
+  image = shade_frame(scene, lights, camera, shadow_maps)
+  color_seconds = time.perf_counter()-start
+  return( image, depth_seconds, color_seconds)
+
+
+# Prints the depth and color pass times of each mesh file given on the
+# command line, lit by a directional and a spot light
+if __name__ == '__main__':
+  from ..fileio.importers import load_surface
+  from ..lights.light import AmbientLight
+  for path in sys.argv[1:]:
+    surface = load_surface(path)
+    scene = TriangleScene(surface)
+    center, radius = scene.calc_bounding_sphere()
+    lights = LightObj(AmbientLight(intensity=0.2), DirectionalLight((-1,-1,-2)),
+                      SpotLight(center+(0,0,3*radius), (0,0,-1), angle=np.pi/8))
+    camera = Camera(eye=center+(2*radius,-2*radius,2*radius), target=center, up=(0,0,1))
+    image, depth_seconds, color_seconds = measure_passes(surface, lights, camera)
+    print('{}: {} faces, depth passes {:.3f} s, color pass {:.3f} s'.format(
+      path, len(scene), depth_seconds, color_seconds))
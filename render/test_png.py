@@ -0,0 +1,47 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+from png import *
+
+import struct
+import zlib
+import unittest
+import numpy as np
+
+# Reads the size and the pixels back out of an unfiltered PNG file
+def decode(data):
+  chunks, i = {}, 8
+  while i < len(data):
+    length, = struct.unpack('>I', data[i:i+4])
+    kind = data[i+4:i+8]
+    chunks[kind] = chunks.get(kind, b'')+data[i+8:i+8+length]
+    crc, = struct.unpack('>I', data[i+8+length:i+12+length])
+    assert crc == zlib.crc32(data[i+4:i+8+length]) & 0xFFFFFFFF
+    i += 12+length
+  width, height, depth, color_type = struct.unpack('>IIBB', chunks[b'IHDR'][:10])
+  channels = 4 if color_type == 6 else 3
+  raw = np.frombuffer(zlib.decompress(chunks[b'IDAT']), dtype=np.uint8)
+  rows = raw.reshape(height, 1+width*channels)
+  assert np.all(rows[:,0] == 0)
+  return( rows[:,1:].reshape(height, width, channels))
+
+class TestPNG(unittest.TestCase):
+
+  def test_encode_png(self):
+    image = np.random.RandomState(0).uniform(size=(7,5,4)).astype(np.float32)
+    data = encode_png(image)
+    self.assertEqual(data[:8], b'\x89PNG\r\n\x1a\n')
+    self.assertTrue(np.array_equal(decode(data), (image*255+0.5).astype(np.uint8)))
+    rgb = np.zeros((2,3,3), dtype=np.uint8)
+    self.assertTrue(np.array_equal(decode(encode_png(rgb)), rgb))
+    with self.assertRaises(AttributeError):
+      encode_png(np.zeros((4,4)))
+
+  def test_iter_png_chunks(self):
+    image = np.linspace(0, 1, 100*3*4).reshape(100,3,4)
+    chunks = list(iter_png_chunks(image, rows=16))
+    self.assertEqual(len(chunks), 9)
+    self.assertTrue(np.array_equal(decode(b''.join(chunks)), decode(encode_png(image))))
+
+if __name__ == '__main__':
+  unittest.main()
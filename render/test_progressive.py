@@ -0,0 +1,64 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+from progressive import *
+from ..cameras.camera import Camera
+from ..lights.light import *
+from ..renderables.surface import Surface
+from ..renderables.renderable import RenderableGraphicsObj
+
+import asyncio
+import unittest
+import numpy as np
+
+class TestProgressive(unittest.TestCase):
+
+  def setUp(self):
+    ground = Surface([[-2,-2,0],[2,-2,0],[2,2,0],[-2,2,0]], [[0,1,2],[0,2,3]])
+    roof = Surface([[-.5,-.5,1],[.5,-.5,1],[.5,.5,1],[-.5,.5,1]], [[0,1,2],[0,2,3]])
+    self.graphics = RenderableGraphicsObj(ground, roof)
+    self.lights = LightObj(AmbientLight(intensity=0.1), DirectionalLight((0,0,-1)))
+    self.camera = Camera(eye=(0,-4,4), target=(0,0,0), up=(0,0,1), width=48, height=32)
+
+  # Test that the preview is close to the finished image, and that the
+  # raster updates end with the shadowed image
+  def test_iter_render(self):
+    updates = list(iter_render(self.graphics, self.lights, self.camera))
+    self.assertEqual(len(updates), 3)
+    self.assertTrue(all(box == (0,0,48,32) for box, pixels in updates))
+    preview, final = updates[0][1], updates[-1][1]
+    self.assertEqual(preview.shape, (32,48,4))
+    self.assertTrue(np.mean(np.abs(preview-final)[...,:3] > 0.1) < 0.2)
+    self.assertTrue(np.any(final[...,0] < updates[1][1][...,0]-0.5))
+    self.assertTrue(np.allclose(final, render(self.graphics, self.lights, self.camera)))
+    with self.assertRaises(ValueError):
+      render(self.graphics, self.lights, self.camera, method='photon')
+
+  # Test that the splatted preview of a large scene looks like it
+  def test_splat_preview(self):
+    u, v = np.meshgrid(np.linspace(-1, 1, 200), np.linspace(-1, 1, 200))
+    vertices = np.stack([u.ravel(), v.ravel(), 0.2*u.ravel()**2], axis=1)
+    i = np.arange(199*199)+np.arange(199*199)//199
+    faces = np.concatenate([np.stack([i, i+1, i+201], axis=1), np.stack([i, i+201, i+200], axis=1)])
+    surface = Surface.from_arrays(vertices, faces)
+    camera = Camera(eye=(0,0,4), target=(0,0,0), width=160, height=120)
+    preview = quick_preview(surface, self.lights, camera, step=4)
+    final = render(surface, self.lights, camera, shadows=False)
+    self.assertTrue(np.mean(np.abs(preview-final) > 0.1) < 0.2)
+
+  # Test that ray traced renders yield finished tiles, and png output
+  def test_raytrace(self):
+    updates = list(render(self.graphics, self.lights, self.camera, progressive=True,
+                          method='raytrace', samples=1, output='png'))
+    self.assertTrue(all(pixels[:8] == b'\x89PNG\r\n\x1a\n' for box, pixels in updates))
+    boxes = [box for box, pixels in updates]
+    self.assertIn((32,0,48,32), boxes)
+    self.assertEqual(boxes[-1], (0,0,48,32))
+
+  def test_aiter_render(self):
+    async def collect():
+      return( [update async for update in aiter_render(self.graphics, self.lights, self.camera)])
+    self.assertEqual(len(asyncio.run(collect())), 3)
+
+if __name__ == '__main__':
+  unittest.main()
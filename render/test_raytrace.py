@@ -0,0 +1,68 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+from raster import *
+from raytrace import *
+from raytrace import moller_trumbore
+from ..cameras.camera import Camera
+from ..lights.light import *
+from ..renderables.surface import Surface
+from ..renderables.renderable import RenderableGraphicsObj
+
+import unittest
+import numpy as np
+
+class TestRayTrace(unittest.TestCase):
+
+  def setUp(self):
+    ground = Surface([[-2,-2,0],[2,-2,0],[2,2,0],[-2,2,0]], [[0,1,2],[0,2,3]])
+    roof = Surface([[-.5,-.5,1],[.5,-.5,1],[.5,.5,1],[-.5,.5,1]], [[0,1,2],[0,2,3]])
+    self.scene = TriangleScene(RenderableGraphicsObj(ground, roof))
+    self.lights = LightObj(AmbientLight(intensity=0.1), DirectionalLight((0,0,-1)))
+
+  # Test the BVH against testing every ray with every triangle
+  def test_BVH(self):
+    rng = np.random.RandomState(0)
+    positions = rng.uniform(-1, 1, (300,3))
+    faces = np.arange(300).reshape(-1,3)
+    bvh = BVH(positions, faces, leaf_size=2)
+    origins = rng.uniform(-1, 1, (200,3))
+    directions = rng.normal(size=(200,3))
+    directions /= np.linalg.norm(directions, axis=1)[:,np.newaxis]
+    t, hit = bvh.intersect(origins, directions)
+    v0, e1, e2 = [np.repeat(a[np.newaxis], 200, axis=0).reshape(-1,3) for a in
+                  (positions[faces[:,0]], positions[faces[:,1]]-positions[faces[:,0]],
+                   positions[faces[:,2]]-positions[faces[:,0]])]
+    d, u, v = moller_trumbore(np.repeat(origins, 100, axis=0), np.repeat(directions, 100, axis=0), v0, e1, e2)
+    d = np.where((u >= 0) & (v >= 0) & (u+v <= 1) & (d > 0), d, np.inf).reshape(200,100)
+    self.assertTrue(np.allclose(t, d.min(axis=1), rtol=1e-4))
+    self.assertTrue(np.all(hit[np.isfinite(t)] == d.argmin(axis=1)[np.isfinite(t)]))
+    self.assertTrue(np.all(hit[~np.isfinite(t)] == -1))
+    t, hit = bvh.intersect(origins, directions, 0.1, any_hit=True)
+    self.assertTrue(np.all((hit >= 0) == (d.min(axis=1) < 0.1)))
+
+  # Test that the ray traced image is close to the rasterized one, and
+  # that the roof casts a shadow on the ground
+  def test_RayTracer(self):
+    camera = Camera(eye=(0,0,4), target=(0,0,0), width=40, height=30)
+    tracer = RayTracer(self.scene, self.lights, camera)
+    image = tracer.render(samples=1)
+    self.assertTrue(np.mean(np.abs(image-shade_frame(self.scene, self.lights, camera)) > 0.05) < 0.05)
+    colors = tracer.trace(np.array([[0,0,.5],[1.5,1.5,.5]], dtype=np.float32),
+                          np.array([[0,0,-1],[0,0,-1]], dtype=np.float32))
+    self.assertTrue(np.allclose(colors[:,0], [0.08,0.88]))
+
+  # Test that the preview frames come first and that the tiles give the
+  # same image from worker processes
+  def test_iter_frames(self):
+    camera = Camera(eye=(0,-4,4), target=(0,0,0), up=(0,0,1), width=48, height=40)
+    tracer = RayTracer(self.scene, self.lights, camera)
+    frames = list(tracer.iter_frames(samples=2, preview_steps=(8,2)))
+    self.assertEqual(len(frames), 4)
+    self.assertTrue(np.all(frames[0][:8,:8] == frames[0][0,0]))
+    self.assertTrue(np.allclose(frames[2][::2,::2], frames[1][::2,::2]))
+    image = RayTracer(self.scene, self.lights, camera).render(samples=2, processes=2)
+    self.assertTrue(np.allclose(image, frames[-1]))
+
+if __name__ == '__main__':
+  unittest.main()
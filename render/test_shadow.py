@@ -0,0 +1,74 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+from raster import *
+from shadow import *
+from ..utils.color import RGBA
+from ..lights.light import *
+from ..renderables.surface import Surface
+from ..renderables.renderable import RenderableGraphicsObj
+
+import unittest
+import numpy as np
+
+class TestShadow(unittest.TestCase):
+
+  def setUp(self):
+    ground = Surface([[-2,-2,0],[2,-2,0],[2,2,0],[-2,2,0]], [[0,1,2],[0,2,3]])
+    roof = Surface([[-.5,-.5,1],[.5,-.5,1],[.5,.5,1],[-.5,.5,1]], [[0,1,2],[0,2,3]])
+    self.graphics = RenderableGraphicsObj(ground, roof)
+    self.scene = TriangleScene(self.graphics)
+
+  def test_rasterize(self):
+    screen = np.array([[1,1,.5],[9,1,.5],[9,9,.25],[1,9,.5]])
+    depth, face_buffer = rasterize(screen, [[0,1,2],[0,2,3]], 10, 10)
+    self.assertEqual(np.sum(face_buffer >= 0), 64)
+    self.assertTrue(np.all(face_buffer[0] == -1))
+    self.assertTrue(np.all(depth[face_buffer < 0] == 1))
+    self.assertEqual(face_buffer[1,8], 0)
+    self.assertEqual(face_buffer[8,1], 1)
+    self.assertTrue(depth[8,8] < depth[1,1])
+
+  # Test that vertex colors given as an array or as RGBA objects give
+  # the same scene colors
+  def test_vertex_colors(self):
+    colors = np.array([[1,0,0,1],[0,1,0,1],[0,0,1,1],[1,1,1,.5]], dtype=np.float64)
+    for c in [colors, [RGBA(*x) for x in colors]]:
+      ground = self.graphics.obj_list[0]
+      ground.vertex_colors = c
+      scene = TriangleScene(self.graphics)
+      self.assertEqual(scene.colors.dtype, np.float32)
+      self.assertTrue(np.allclose(scene.colors[:4], colors))
+      self.assertTrue(np.all(scene.face_colored[:2]))
+
+  def test_ShadowMap(self):
+    points = [[0,0,0],[1.5,1.5,0],[0,0,1],[5,5,0]]
+    for light in [DirectionalLight((0,0,-1)), SpotLight((0,0,3), (0,0,-1), angle=np.pi/4)]:
+      shadow_map = ShadowMap(light, self.scene, size=128)
+      self.assertTrue(np.allclose(shadow_map.lookup(points), [0,1,1,1]))
+    with self.assertRaises(AttributeError):
+      ShadowMap(PointLight((0,0,3)), self.scene)
+
+  def test_pcf(self):
+    shadow_map = ShadowMap(DirectionalLight((0,0,-1)), self.scene, size=128, pcf=2)
+    x = np.linspace(0.3, 0.7, 9)
+    v = shadow_map.lookup(np.stack([x, np.zeros(9), np.zeros(9)], axis=1))
+    self.assertEqual(v[0], 0)
+    self.assertEqual(v[-1], 1)
+    self.assertTrue(np.all(np.diff(v) >= 0))
+    self.assertTrue(np.any((v > 0) & (v < 1)))
+
+  def test_ShadowCache(self):
+    cache = ShadowCache(size=64)
+    lights = LightObj(AmbientLight(), DirectionalLight((0,0,-1)), PointLight((0,0,3)))
+    maps = cache.get_maps(lights, self.scene)
+    self.assertIsNone(maps[1])
+    self.assertIs(cache.get_maps(lights, TriangleScene(self.graphics))[0], maps[0])
+    self.assertEqual((cache.hits, cache.misses), (1, 1))
+    self.graphics.obj_list[1].set_style(color=RGBA(1,0,0,1))
+    self.assertIsNot(cache.get_maps(lights, TriangleScene(self.graphics))[0], maps[0])
+    factors = calc_shadow_factors(maps, [[0,0,0],[1.5,1.5,0]])
+    self.assertTrue(np.allclose(factors, [[0,1],[1,1]]))
+
+if __name__ == '__main__':
+  unittest.main()
@@ -1,10 +1,24 @@
 # Author: Jef Wagner
 # Date: 14-02-2015
 
-class Billboard(RenderableGraphicsObj)
+from ..utils.vector import Vec2, Vec3
+from .renderable import RenderableGraphicsObj
+from .pointcloud import PointCloud
+
+class Billboard(RenderableGraphicsObj):
 
   def __init__(self, vertex, size, texture_id, transforms=[], **kwargs):
     self.size = Vec2( size)
-    self.vertex = Vec3(vertex):
+    self.vertex = Vec3(vertex)
     self.texture_id = texture_id
-    super(Billboard, self).__init__(transforms, **kwargs)
+    super(Billboard, self).__init__(trans=transforms, **kwargs)
+
+# BillboardSet class
+# ------------------
+# Many billboards stored as one PointCloud, each with a position, a
+# size and a texture id, which is exported as a single instanced
+# buffer instead of one object per billboard.
+class BillboardSet(PointCloud):
+
+  def __init__(self, vertices, sizes, texture_ids, transforms=[], **kwargs):
+    super(BillboardSet, self).__init__(vertices, sizes=sizes, texture_ids=texture_ids, transforms=transforms, **kwargs)
@@ -1,6 +1,10 @@
 # Author: Jef Wagner
 # Date: 14-02-2015
 
+import numpy as np
+
+from ..utils.vector import Vec3, IVec2, index_dtype, restart_index, reduction_dtype
+from .renderable import RenderableGraphicsObj, transform_array, index_array, calc_dx_from_line_width
 
 class Edge(IVec2):
 
@@ -17,6 +21,17 @@ class Edge(IVec2):
     pt0, pt1 = self.pts( vertices, trans_mat)
     return( (pt0-pt1).mag())
 
+#####################################################################
+# LineSet class
+# =============
+# A set of line segments between the vertices in an (V,3) vertex
+# array. The segments are stored in one of two ways:
+# - edges: an (E,2) array of vertex indices, one row per segment
+# - strips: an (S+1,) array of offsets into the vertex array, where
+#   polyline s runs through the vertices offsets[s] to offsets[s+1]-1
+#   in order, and is closed back to its first vertex if strip_closed[s]
+# A strip costs one offset per polyline instead of two indices per
+# segment, and its edges are only made when they are asked for.
 class LineSet(RenderableGraphicsObj):
 
   graphics_options = ['line_color',
@@ -24,41 +39,276 @@ class LineSet(RenderableGraphicsObj):
                       'line_style',
                       'vertex_colors']
 
+  trans_cache_keys = RenderableGraphicsObj.trans_cache_keys+('edge_lengths', 'edge_center_of_masses', 'length_sums')
+
   def __init__(self, vertices, edges, transforms=[], **kwargs):
-    self.vertices = []
-    for v in vertices:
-      self.vertices.append( Vec3(v))
-    self.edges = []
-    for e in edges:
-      self.edges.append( Edge(e))
-    super(LineSet, self).__init__(transforms, **kwargs)
+    self.vertex_array = np.array([Vec3(v).array for v in vertices], dtype=np.float32).reshape(-1,3)
+    edges = np.array([Edge(e).array for e in edges], dtype=np.int64).reshape(-1,2)
+    self.set_edge_array(edges.astype(index_dtype(len(self.vertex_array))))
+    super(LineSet, self).__init__(trans=transforms, **kwargs)
+
+  # from_arrays method
+  # ------------------
+  # Builds a line set straight from an (V,3) array of vertices and an
+  # (E,2) array of edge indices, without building any Vec3 or Edge
+  # objects.
+  @classmethod
+  def from_arrays(cls, vertices, edges, transforms=[], **kwargs):
+    self = cls.__new__(cls)
+    self.vertex_array = np.asarray(vertices, dtype=np.float32).reshape(-1,3)
+    self.set_edge_array(index_array(edges, 2))
+    super(LineSet, self).__init__(trans=transforms, **kwargs)
+    return( self)
+
+  # from_strips method
+  # ------------------
+  # Builds a line set of polylines from an (V,3) array of vertices and
+  # an (S+1,) array of increasing offsets into it. The closed argument
+  # is either one bool for all of the polylines or one for each.
+  #
+  # Example:
+  # >>> LineSet.from_strips(vertices, [0, 1000, 2000], closed=True)
+  @classmethod
+  def from_strips(cls, vertices, offsets, closed=False, transforms=[], **kwargs):
+    self = cls.__new__(cls)
+    self.vertex_array = np.asarray(vertices, dtype=np.float32).reshape(-1,3)
+    self.set_strips(offsets, closed)
+    super(LineSet, self).__init__(trans=transforms, **kwargs)
+    return( self)
+
+  def set_edge_array(self, edges):
+    self.stored_edge_array = edges
+    self.strip_offsets = None
+    self.strip_closed = None
+
+  def set_strips(self, offsets, closed=False):
+    offsets = np.asarray(offsets, dtype=np.int64).flatten()
+    if len(offsets) < 1 or np.any(np.diff(offsets) < 0):
+      raise AttributeError("LineSet strip offsets must be an increasing sequence")
+    if offsets[0] < 0 or offsets[-1] > len(self.vertex_array):
+      raise ValueError("LineSet strip offsets must be inside the vertex array")
+    self.stored_edge_array = None
+    self.strip_offsets = offsets
+    self.strip_closed = np.broadcast_to(np.asarray(closed, dtype=bool), (len(offsets)-1,)).copy()
+
+  def is_strips(self):
+    return( self.strip_offsets is not None)
+
+  # edge_array attribute
+  # --------------------
+  # The (E,2) array of edges. For strips it is made from the offsets
+  # the first time it is asked for.
+  @property
+  def edge_array(self):
+    if self.is_strips():
+      return( self.cached('edge_array', self.calc_strip_edges))
+    return( self.stored_edge_array)
+
+  @property
+  def vertices(self):
+    return( [Vec3(v) for v in self.vertex_array])
+
+  @property
+  def edges(self):
+    return( [Edge(e) for e in self.edge_array])
+
+  # calc_strip_mask
+  # ---------------
+  # Returns a bool array with one entry for each pair of consecutive
+  # vertices, which is True if the pair is a segment of a strip.
+  def calc_strip_mask(self):
+    offsets = self.strip_offsets
+    mask = np.zeros(max(len(self.vertex_array)-1, 0), dtype=bool)
+    mask[offsets[0]:max(offsets[-1]-1, offsets[0])] = True
+    ends = offsets[1:-1]
+    mask[ends[ends > 0]-1] = False
+    return( mask)
+
+  # calc_closing_edges
+  # ------------------
+  # Returns the first and last vertex of each closed strip that has at
+  # least 3 vertices.
+  def calc_closing_edges(self):
+    starts = self.strip_offsets[:-1]
+    stops = self.strip_offsets[1:]
+    closing = self.strip_closed & (stops-starts > 2)
+    return( stops[closing]-1, starts[closing])
+
+  def calc_strip_edges(self):
+    """Returns the (E,2) array of the edges of the strips"""
+    first = np.flatnonzero(self.calc_strip_mask())
+    last, start = self.calc_closing_edges()
+    edges = np.concatenate([np.stack([first, first+1], axis=1),
+                            np.stack([last, start], axis=1)])
+    return( edges.astype(index_dtype(len(self.vertex_array))))
+
+  def calc_vertices(self):
+    return( self.vertices)
+
+  def calc_vertex_array(self, world_mat):
+    return( transform_array(world_mat, self.vertex_array))
 
+  # iter_strip_segments
+  # -------------------
+  # Yields the two end points of the segments of the strips as pairs
+  # of (E,3) arrays, a block of chunk_size vertices at a time, so the
+  # metrics of very large strips never need more than a block of
+  # transformed vertices. The segments between consecutive vertices are
+  # taken with one mask, without making the edge array.
+  chunk_size = 1 << 20
+
+  def iter_strip_segments(self):
+    mask = self.calc_strip_mask()
+    for lo in range(0, len(mask), self.chunk_size):
+      hi = min(lo+self.chunk_size, len(mask))
+      m = mask[lo:hi]
+      if m.any():
+        vertices = transform_array(self.trans_mat, self.vertex_array[lo:hi+1])
+        yield vertices[:-1][m], vertices[1:][m]
+    last, start = self.calc_closing_edges()
+    if len(last):
+      yield (transform_array(self.trans_mat, self.vertex_array[last]),
+             transform_array(self.trans_mat, self.vertex_array[start]))
+
+  # iter_segments
+  # -------------
+  # Yields the end points of all the segments, strips or edges, as
+  # pairs of (E,3) arrays. For edges the vertex array is transformed
+  # once and the end points are gathered with the (E,2) index array, a
+  # block of chunk_size edges at a time, so a vertex shared by many
+  # edges is only transformed once.
+  def iter_segments(self):
+    if self.is_strips():
+      for item in self.iter_strip_segments():
+        yield item
+      return
+    vertices = transform_array(self.trans_mat, self.vertex_array)
+    edges = self.edge_array
+    for lo in range(0, len(edges), self.chunk_size):
+      e = edges[lo:lo+self.chunk_size]
+      yield vertices[e[:,0]], vertices[e[:,1]]
+
+  # Segment metrics
+  # ---------------
+  # The edge lengths, the edge centers, and the total length and
+  # length weighted sum of the centers are cached until the line set is
+  # changed through set_vertices, set_edges, set_polylines or
+  # set_transforms. The center and the area both use the same sums.
   def gen_edge_lengths(self):
-    if not hasattr(self, 'edge_lengths'):
-      self.edge_lengths = [e.length(self.vertices, self.trans_mat) for e in self.edges]
-    return( self.edge_lengths)
+    return( self.cached('edge_lengths', self._gen_edge_lengths))
+
+  def _gen_edge_lengths(self):
+    lengths = [np.linalg.norm(pt1-pt0, axis=1) for pt0, pt1 in self.iter_segments()]
+    return( np.concatenate(lengths) if lengths else np.zeros(0, dtype=np.float32))
 
   def gen_edge_center_of_masses(self):
-    if not hasattr(self, 'edge_center_of_masses')
-      self.edge_center_of_masses = [e.center_of_mass(self.vertices, self.trans_mat) for e in self.edges]
-    return( self.edge_lengths)
+    return( self.cached('edge_center_of_masses', self._gen_edge_center_of_masses))
+
+  def _gen_edge_center_of_masses(self):
+    cms = [0.5*(pt0+pt1) for pt0, pt1 in self.iter_segments()]
+    return( np.concatenate(cms) if cms else np.zeros((0,3), dtype=np.float32))
+
+  def gen_length_sums(self):
+    return( self.cached('length_sums', self._gen_length_sums))
+
+  # The sums are added up one block at a time in double precision. If
+  # the edge lengths are already cached they are not computed again.
+  def _gen_length_sums(self):
+    num = np.zeros(3, dtype=reduction_dtype)
+    denom = 0.
+    start = 0
+    for pt0, pt1 in self.iter_segments():
+      if 'edge_lengths' in self.cache:
+        lengths = self.cache['edge_lengths'][start:start+len(pt0)]
+      else:
+        lengths = np.linalg.norm(pt1-pt0, axis=1)
+      start += len(pt0)
+      lengths = lengths.astype(reduction_dtype)
+      num += np.dot(lengths, 0.5*(pt0+pt1))
+      denom += np.sum(lengths)
+    return( num, denom)
 
+  # center_of_mass
+  # --------------
+  # The length weighted center of the segments.
   def center_of_mass(self, display_radius = None):
-    csm = self.gen_edge_center_of_masses()
-    lengths = self.gen_line_lengths()
-    num = sum( [cm*l for cm, l in zip(cms, lengths)])
-    denom = sum( [l for l in lengths])
-    return( num/denom)
+    num, denom = self.gen_length_sums()
+    return( Vec3(num/denom))
 
+  # area
+  # ----
+  # The total length of the segments times the width of the lines at
+  # the display radius.
   def area(self, display_radius = None):
-    dx = calc_dx_from_line_width( self.line_width, display_radius)
-    return( dx*sum( self.gen_line_lengths))
+    num, denom = self.gen_length_sums()
+    dx = calc_dx_from_line_width( getattr(self, 'line_width', 1.), display_radius)
+    return( dx*denom)
+
+  # Mutation
+  # --------
+  # The vertices and segments are only changed through these methods,
+  # which mark the line set dirty and so drop the cached metrics.
+  def set_vertices(self, vertices):
+    """Replaces the vertex array"""
+    vertices = np.asarray(vertices, dtype=np.float32).reshape(-1,3)
+    if self.is_strips() and self.strip_offsets[-1] > len(vertices):
+      raise ValueError("LineSet strip offsets must be inside the vertex array")
+    self.vertex_array = vertices
+    self.mark_dirty()
+
+  def set_edges(self, edges):
+    """Replaces the segments with an array of edges"""
+    self.set_edge_array(np.asarray(edges).reshape(-1,2).astype(index_dtype(len(self.vertex_array))))
+    self.mark_dirty()
+
+  def set_polylines(self, offsets, closed=False):
+    """Replaces the segments with strips"""
+    self.set_strips(offsets, closed)
+    self.mark_dirty()
+
+  def calc_center(self, display_radius=None):
+    return( self.center_of_mass(display_radius))
+
+  def calc_area(self, display_radius=None):
+    return( self.area(display_radius))
+
+  # export_strips
+  # -------------
+  # Returns an index buffer that draws the line set as line strips,
+  # with the restart index of the index type between the strips. The
+  # type is the smallest one for the number of vertices, uint16 when it
+  # fits, unless one is given. A closed polyline repeats its first
+  # vertex at the end. A set of edges is exported as one strip of two
+  # vertices per edge.
+  def export_strips(self, dtype=None):
+    """Returns the line strip index buffer with primitive restarts"""
+    dtype = dtype or index_dtype(len(self.vertex_array))
+    restart = restart_index(dtype)
+    if not self.is_strips():
+      out = np.empty((len(self.edge_array),3), dtype=dtype)
+      out[:,:2] = self.edge_array
+      out[:,2] = restart
+      return( out.ravel()[:-1])
+    starts = self.strip_offsets[:-1]
+    lengths = np.diff(self.strip_offsets)
+    closing = self.strip_closed & (lengths > 2)
+    slots = lengths+closing+1
+    out_starts = np.cumsum(slots)-slots
+    out = np.full(int(np.sum(slots)), restart, dtype=dtype)
+    is_vertex = np.ones(len(out), dtype=bool)
+    is_vertex[out_starts+slots-1] = False
+    is_vertex[(out_starts+lengths)[closing]] = False
+    out[is_vertex] = np.arange(self.strip_offsets[0], self.strip_offsets[-1], dtype=dtype)
+    out[(out_starts+lengths)[closing]] = starts[closing]
+    return( out[:-1])
+
 
+# Line class
+# ----------
+# A single polyline through the vertices, stored as one strip.
 class Line(LineSet):
 
   def __init__(self, vertices, closed=False, transforms=[], **kwargs):
-    n = len(vertices)-1
-    self.edges = [ Edge(i,i+1) for i in range(n)]
-    if closed:
-      self.edges.append( Edge(n,0))
-    super(Line, self).__init__(transforms, **kwargs)
+    self.vertex_array = np.array([Vec3(v).array for v in vertices], dtype=np.float32).reshape(-1,3)
+    self.set_strips([0, len(self.vertex_array)], closed)
+    super(LineSet, self).__init__(trans=transforms, **kwargs)
@@ -0,0 +1,176 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+import numpy as np
+
+from ..utils.vector import Vec3
+from ..utils.color import RGBA
+from .renderable import RenderableGraphicsObj, transform_array, calc_dx_from_point_size
+
+__all__ = ['PointCloud', 'instance_dtype']
+
+# The layout of one point in the instanced buffer. The colors are
+# stored as normalized bytes, so a point takes 28 bytes.
+instance_dtype = np.dtype([('position', np.float32, 3),
+                           ('size', np.float32, 2),
+                           ('color', np.uint8, 4),
+                           ('texture_id', np.int32)])
+
+# Defaults used for the points when neither the point nor the style
+# gives a value
+default_point_size = 4.
+default_point_color = RGBA(0,0,0,1)
+
+#####################################################################
+# PointCloud class
+# ================
+# A set of points or billboards stored as parallel arrays instead of
+# one object per point:
+# - positions: an (N,3) array of positions
+# - sizes: an optional (N,2) array of sizes in pixels
+# - colors: an optional (N,4) array of colors
+# - texture_ids: an optional (N,) array of texture ids
+# Points without sizes or colors use the point_size and point_color
+# style options. It provides:
+# - The transformed positions of the points (calc_vertex_array)
+# - The total center and area (calc_center, calc_area)
+# - A back to front ordering for alpha blending (calc_sort_order)
+# - Export as a single buffer of instances (export_instanced)
+class PointCloud(RenderableGraphicsObj):
+
+  graphics_options = ['point_color',
+                      'point_size',
+                      'point_style']
+
+  trans_cache_keys = RenderableGraphicsObj.trans_cache_keys+('world_positions',)
+
+  # PointCloud constructor
+  # ----------------------
+  # This constructor takes 1 positional argument and a set of keyword
+  # arguments:
+  # - positions: a sequence of N length-3 positions
+  # - sizes: N sizes, each one number or a width and height
+  # - colors: N colors, as RGBA objects or length-4 sequences
+  # - texture_ids: N integer texture ids
+  # - transforms: an optional list of transformations
+  # - **kwargs: a set of style parameters specified by keywords
+  def __init__(self, positions, sizes=None, colors=None, texture_ids=None, transforms=[], **kwargs):
+    """Constructor for the PointCloud class"""
+    self.positions = np.asarray(positions, dtype=np.float32).reshape(-1,3)
+    n = len(self.positions)
+    self.sizes = None
+    if sizes is not None:
+      sizes = np.asarray(sizes, dtype=np.float32)
+      if sizes.ndim == 1:
+        sizes = np.repeat(sizes[:,np.newaxis], 2, axis=1)
+      self.sizes = sizes.reshape(-1,2)
+    self.colors = None
+    if colors is not None:
+      if len(colors) and isinstance(colors[0], RGBA):
+        colors = [c.array for c in colors]
+      self.colors = np.asarray(colors, dtype=np.float32).reshape(-1,4)
+      if np.any(self.colors < 0) or np.any(self.colors > 1):
+        raise ValueError("All color components must be between 0 and 1")
+    self.texture_ids = None
+    if texture_ids is not None:
+      self.texture_ids = np.asarray(texture_ids, dtype=np.int32).flatten()
+    for name in ('sizes', 'colors', 'texture_ids'):
+      column = getattr(self, name)
+      if column is not None and len(column) != n:
+        raise AttributeError("PointCloud.__init__ takes one of each of the {} for each position".format(name))
+    super(PointCloud, self).__init__(trans=transforms, **kwargs)
+
+  def __len__(self):
+    return( len(self.positions))
+
+  # calc_vertices
+  # -------------
+  # This method returns all the positions as a list of Vec3 objects.
+  def calc_vertices(self):
+    """Returns a list of vertices"""
+    return( [Vec3(p) for p in self.positions])
+
+  def calc_vertex_array(self, world_mat):
+    """Returns an array of the transformed vertices"""
+    return( transform_array(world_mat, self.positions))
+
+  # calc_world_positions
+  # --------------------
+  # The positions moved by the transforms of the point cloud, cached
+  # until the point cloud is changed.
+  def calc_world_positions(self):
+    """Returns the transformed positions"""
+    return( self.cached('world_positions', transform_array, self.trans_mat, self.positions))
+
+  # calc_center
+  # -----------
+  # Every point is given the same area, so the center is the mean
+  # position.
+  def calc_center(self, display_radius=None):
+    """Returns the center of the point cloud"""
+    return( Vec3(self.calc_world_positions().mean(axis=0, dtype=np.float64)))
+
+  # calc_area
+  # ---------
+  # The area covered by the points at the display radius.
+  def calc_area(self, display_radius=None):
+    """Returns the area covered by the points"""
+    if self.sizes is None:
+      dx = calc_dx_from_point_size(getattr(self, 'point_size', default_point_size), display_radius)
+      return( len(self)*dx*dx)
+    dx = calc_dx_from_point_size(1., display_radius)
+    return( float(np.sum(np.prod(self.sizes, axis=1, dtype=np.float64)))*dx*dx)
+
+  # calc_sort_order
+  # ---------------
+  # Returns the indices of the points from the farthest to the nearest
+  # to the eye, the order to draw them in for alpha blending. If a
+  # view direction is given the points are sorted by their depth along
+  # it instead of their distance from the eye. The positions to sort
+  # default to the positions moved by the point cloud's own transforms.
+  def calc_sort_order(self, eye, direction=None, positions=None):
+    """Returns the indices of the points sorted back to front"""
+    if positions is None:
+      positions = self.calc_world_positions()
+    if direction is None:
+      d = positions-np.asarray(Vec3(eye).array, dtype=np.float32)
+      depth = np.einsum('ij,ij->i', d, d)
+    else:
+      depth = np.dot(positions, np.asarray(Vec3(direction).array, dtype=np.float32))
+    return( np.argsort(-depth))
+
+  # export_instanced
+  # ----------------
+  # Returns the points as one structured array with the layout of
+  # instance_dtype, ready to be uploaded as an instance buffer, and the
+  # style of the points. The positions are moved by the world matrix,
+  # and the style is the style inherited from the ancestors with the
+  # options of the point cloud merged over it, which gives the sizes,
+  # colors and point_style of points without their own. If an eye is
+  # given the instances are sorted back to front.
+  def export_instanced(self, eye=None, direction=None, inherited=None):
+    """Returns a buffer of point instances and the style of the points"""
+    if inherited is None:
+      inherited = self.calc_inherited_style()
+    style = inherited.merge(**self.get_style_options()).trim(self.graphics_options)
+    if self.parent is None:
+      positions = self.calc_world_positions()
+    else:
+      positions = self.calc_vertex_array(self.calc_world_mat())
+    buf = np.empty(len(self), dtype=instance_dtype)
+    buf['position'] = positions
+    if self.sizes is None:
+      buf['size'] = style.get('point_size', default_point_size)
+    else:
+      buf['size'] = self.sizes
+    if self.colors is None:
+      buf['color'] = np.round(255*style.get('point_color', default_point_color).array)
+    else:
+      buf['color'] = np.round(255*self.colors)
+    if self.texture_ids is None:
+      buf['texture_id'] = -1
+    else:
+      buf['texture_id'] = self.texture_ids
+    if eye is not None or direction is not None:
+      buf = buf[self.calc_sort_order(eye, direction, positions)]
+    return( buf, style)
@@ -1,7 +1,11 @@
 # Author: Jef Wagner
 # Date: 19-02-2015
 
+import numbers
+import numpy as np
+
 from ..graphics import BaseGraphicsObj
+from .style import Style, StyleTable
 
 ##############################################################################
 # Renderable Graphic Object class
@@ -14,6 +18,11 @@ from ..graphics import BaseGraphicsObj
 # - A method for getting a list of surface vertices (calc_vertices)
 # - A method for getting a list of surface vertex normals (calc_vertex_normals)
 # - A method for getting a list of surface vertex attributes (calc_vertex_attr)
+# - A top-down pass that resolves the style of every leaf (resolve_styles)
+# - A method for grouping the leaves by style (group_by_style)
+# - Packed vertex buffers for all leaves (pack_buffers), which can be
+#   brought up to date by rewriting only the changed ranges
+#   (update_buffers)
 class RenderableGraphicsObj(BaseGraphicsObj):
 
 	graphics_options = ['color',
@@ -32,21 +41,37 @@ class RenderableGraphicsObj(BaseGraphicsObj):
 	# object list.
 	def __init__( self, *args, trans=[], **kwargs):
 		"""Creates a combined graphics object"""
-		obj_list = []
+		self.obj_list = []
 		for obj in args:
-			if isinstance(RenderableGraphicsObj, obj):
+			if isinstance(obj, RenderableGraphicsObj):
 				self.obj_list.append(obj)
 			else:
 				name = self.__class__.__name__
-				raise AttributeError("{}.__init__ takes and array of RenderableGraphicsObjs")
-		super(RenderableGraphicsObjs, self).__init__(trans, **kwargs)
+				raise AttributeError("{}.__init__ takes and array of RenderableGraphicsObjs".format(name))
+		super(RenderableGraphicsObj, self).__init__(trans, **kwargs)
+		for obj in self.obj_list:
+			obj.parent = self
 
 	# to_renderable
 	# -------------
-	# This is a dummy method. When `to_renderable` is called it simply returns
-	# itself.
+	# A leaf is its own renderable. A container asks each of its children
+	# for its renderable at the display radius, and if any of them picks
+	# another level of detail, returns a container of those instead, with
+	# the same transforms and style and under the same parent. The
+	# children that are unchanged stay in this tree.
 	def to_renderable(self, display_radius=None):
-		return( self)
+		if not self.obj_list:
+			return( self)
+		rend_obj_list = [obj.to_renderable(display_radius) for obj in self.obj_list]
+		if all(rend is obj for rend, obj in zip(rend_obj_list, self.obj_list)):
+			return( self)
+		parents = [obj.parent for obj in rend_obj_list]
+		rend = RenderableGraphicsObj(*rend_obj_list, trans=self.transforms, **self.get_style_options())
+		for obj, parent in zip(rend_obj_list, parents):
+			if parent is not None:
+				obj.parent = parent
+		rend.parent = self.parent
+		return( rend)
 
 	# calc_vertices
 	# -------------
@@ -72,14 +97,288 @@ class RenderableGraphicsObj(BaseGraphicsObj):
 
 	# calc_vertex_attr
 	# ----------------
-	# This returns a lsit of vertex attributes for each vertex in all the 
-	# surfaces in all the graphics objects in the object list.
+	# A leaf returns the id of its resolved style, since the value of an
+	# attribute from a style is the same for all of its vertices. A
+	# container returns the attribute values and an (N,) uint32 index of
+	# every packed vertex into them: the first values are the attribute
+	# of each style in the style table, and leaves with per-vertex values
+	# of their own have them appended, so no per-vertex list of values is
+	# ever built for a uniform attribute.
 	def calc_vertex_attr(self, attr, default):
-		"""Returns a list of vertex attributes"""
-		attr_list = []
-		if hasattr(self, attr):
-			current_default = getattr(self, attr)
+		"""Returns the style id, or the attribute values and vertex index"""
+		if not self.obj_list:
+			return( self.style_id)
+		vertices, changed = self.update_buffers()
+		values = [style.get(attr, default) for style in self.style_table]
+		sizes = [stop-start for _, start, stop in self.packed_leaves]
+		index = np.repeat(self.packed_style_ids, sizes)
+		for leaf, start, stop in self.packed_leaves:
+			leaf_values = leaf.calc_vertex_attr(attr, default)
+			if not isinstance(leaf_values, numbers.Integral):
+				index[start:stop] = np.arange(len(values), len(values)+stop-start)
+				values += list(leaf_values)
+		return( values, index)
+
+	# iter_leaves
+	# -----------
+	# Yields all the renderable objects at the bottom of the tree, the
+	# ones that do not hold an object list of their own.
+	def iter_leaves(self):
+		"""Returns an iterator over the leaf objects"""
+		if self.obj_list:
+			for obj in self.obj_list:
+				for leaf in obj.iter_leaves():
+					yield leaf
 		else:
-			current_default = default
-		for obj in self.obj_list:
-			attr_list += obj.calc_vertex_attr( attr, current_default)
\ No newline at end of file
+			yield self
+
+	# resolve_styles
+	# --------------
+	# A single top-down pass over the tree. Each object merges its own
+	# style options over the style inherited from its parent, and each
+	# leaf interns the options it can use into the style table and
+	# keeps only the integer id. Leaves with identical effective styles
+	# share the same style record. A pass started below the root
+	# inherits the styles of the ancestors. Returns the style table.
+	def resolve_styles(self, table=None, inherited=None):
+		"""Resolves the effective style of every leaf"""
+		if table is None:
+			table = StyleTable()
+		if inherited is None:
+			inherited = self.calc_inherited_style()
+		style = inherited.merge(**self.get_style_options())
+		if self.obj_list:
+			for obj in self.obj_list:
+				obj.resolve_styles(table, style)
+		else:
+			self.style_id = table.intern(style.trim(self.graphics_options))
+		return( table)
+
+	# calc_inherited_style
+	# --------------------
+	# Returns the style options of all the ancestors merged from the root
+	# down, the style an object inherits from above it.
+	def calc_inherited_style(self):
+		"""Returns the merged style of the ancestors"""
+		ancestors = []
+		obj = self.parent
+		while obj is not None:
+			ancestors.append( obj)
+			obj = obj.parent
+		style = Style()
+		for obj in reversed(ancestors):
+			style = style.merge(**obj.get_style_options())
+		return( style)
+
+	# group_by_style
+	# --------------
+	# Resolves the styles and returns a dictionary from the style id to
+	# the list of leaves with that style, so an exporter can draw all
+	# the objects with the same style in a single batch.
+	def group_by_style(self, table=None):
+		"""Returns the style table and the leaves grouped by style id"""
+		table = self.resolve_styles(table)
+		groups = {}
+		for leaf in self.iter_leaves():
+			groups.setdefault(leaf.style_id, []).append(leaf)
+		return( table, groups)
+
+	# calc_vertex_array
+	# -----------------
+	# Returns the vertices of a leaf as an (N,3) array, transformed by
+	# the world matrix of the leaf.
+	def calc_vertex_array(self, world_mat):
+		"""Returns an array of the transformed vertices"""
+		vertices = np.array([v.array for v in self.calc_vertices()], dtype=np.float32).reshape(-1,3)
+		return( transform_array(world_mat, vertices))
+
+	# calc_bounds
+	# -----------
+	# Returns the lower and upper corners of the axis aligned bounding
+	# box of all the vertices. The result is cached until something in
+	# the tree changes.
+	def calc_bounds(self):
+		"""Returns the min and max corners of the bounding box"""
+		return( self.cached('bounds', self._calc_bounds))
+
+	def _calc_bounds(self):
+		vertices, changed = self.update_buffers()
+		return( vertices.min(axis=0), vertices.max(axis=0))
+
+	# pack_buffers
+	# ------------
+	# Packs the world space vertices of all the leaves into a single
+	# (N,3) array, ready to be sent to an exporter. The range of each
+	# leaf in the packed array and its style id are kept, so that
+	# update_buffers can later rewrite only the leaves that changed.
+	def pack_buffers(self):
+		"""Packs the vertices of all the leaves into one array"""
+		self.style_table = self.resolve_styles()
+		self.packed_leaves = []
+		chunks = []
+		start = 0
+		for leaf, world_mat in self.iter_leaf_mats():
+			vertices = leaf.calc_vertex_array(world_mat)
+			leaf.packed_slot = len(self.packed_leaves)
+			self.packed_leaves.append( [leaf, start, start+len(vertices)])
+			chunks.append( vertices)
+			start += len(vertices)
+		if chunks:
+			self.packed_vertices = np.concatenate(chunks)
+		else:
+			self.packed_vertices = np.zeros((0,3), dtype=np.float32)
+		self.packed_style_ids = np.array([leaf.style_id for leaf, _, _ in self.packed_leaves], dtype=np.uint32)
+		self.packed_index = dict((id(leaf), i) for i, (leaf, _, _) in enumerate(self.packed_leaves))
+		self.mark_clean()
+		return( self.packed_vertices)
+
+	# replace_child
+	# -------------
+	# A leaf that replaces another leaf takes over its slot in the
+	# packed buffers, so it only needs its own range rewritten if it has
+	# the same number of vertices.
+	def replace_child(self, index, obj):
+		"""Replaces the object at an index of the object list"""
+		old = self.obj_list[index]
+		super(RenderableGraphicsObj, self).replace_child(index, obj)
+		if not old.obj_list and not obj.obj_list and hasattr(old, 'packed_slot'):
+			obj.packed_slot = old.packed_slot
+
+	# iter_leaf_mats
+	# --------------
+	# Yields each leaf with its world matrix, the product of the
+	# transform matrices of all its ancestors and itself.
+	def iter_leaf_mats(self, parent_mat=None):
+		"""Returns an iterator over the leaves and their world matrices"""
+		world_mat = self.trans_mat if parent_mat is None else parent_mat*self.trans_mat
+		if self.obj_list:
+			for obj in self.obj_list:
+				for item in obj.iter_leaf_mats(world_mat):
+					yield item
+		else:
+			yield self, world_mat
+
+	# calc_world_mat
+	# --------------
+	# Returns the world matrix of an object found from its own side, by
+	# walking up the parent chain, for when it is not reached through
+	# iter_leaf_mats from the root.
+	def calc_world_mat(self):
+		"""Returns the product of the ancestor and own transform matrices"""
+		world_mat = self.trans_mat
+		obj = self.parent
+		while obj is not None:
+			world_mat = obj.trans_mat*world_mat
+			obj = obj.parent
+		return( world_mat)
+
+	# Lighting baked into the leaves below an object depends on where
+	# the object puts them, so it is dropped when the object changes.
+	def mark_dirty(self):
+		"""Marks the object as changed and drops baked lighting below it"""
+		super(RenderableGraphicsObj, self).mark_dirty()
+		if self.obj_list:
+			for leaf in self.iter_leaves():
+				if getattr(leaf, 'is_baked', None) is not None and leaf.is_baked():
+					leaf.drop_baked()
+
+	# update_buffers
+	# --------------
+	# Brings the packed buffers up to date after the tree was changed
+	# through set_transforms, set_style or replace_child. Only the dirty
+	# parts of the tree are walked, and only the ranges of the leaves
+	# below a dirty object are rewritten. If a leaf changed its number of
+	# vertices, or a leaf was replaced, everything is packed again.
+	# Returns the packed vertices and a list of the (start, stop) ranges
+	# that changed.
+	def update_buffers(self):
+		"""Rewrites the changed ranges of the packed buffers"""
+		if not hasattr(self, 'packed_vertices'):
+			self.pack_buffers()
+			return( self.packed_vertices, [(0, len(self.packed_vertices))])
+		changed = []
+		if not self._update_buffers(self, None, self.calc_inherited_style(), False, changed):
+			self.pack_buffers()
+			return( self.packed_vertices, [(0, len(self.packed_vertices))])
+		self.mark_clean()
+		return( self.packed_vertices, changed)
+
+	# Walks down the dirty parts of the tree. Returns False as soon as
+	# it finds a leaf that does not fit in its old range, in which case
+	# the whole tree has to be packed again.
+	def _update_buffers(self, root, parent_mat, inherited, stale, changed):
+		world_mat = self.trans_mat if parent_mat is None else parent_mat*self.trans_mat
+		style = inherited.merge(**self.get_style_options())
+		stale = stale or self.dirty
+		if self.obj_list:
+			for obj in self.obj_list:
+				if stale or obj.dirty or obj.dirty_children:
+					if not obj._update_buffers(root, world_mat, style, stale, changed):
+						return( False)
+			return( True)
+		index = root.packed_index.get(id(self), getattr(self, 'packed_slot', None))
+		if index is None:
+			return( False)
+		leaf, start, stop = root.packed_leaves[index]
+		vertices = self.calc_vertex_array(world_mat)
+		if len(vertices) != stop-start:
+			return( False)
+		if leaf is not self:
+			del root.packed_index[id(leaf)]
+			root.packed_leaves[index][0] = self
+			root.packed_index[id(self)] = index
+		root.packed_vertices[start:stop] = vertices
+		self.style_id = root.style_table.intern(style.trim(self.graphics_options))
+		root.packed_style_ids[index] = self.style_id
+		changed.append( (start, stop))
+		return( True)
+
+
+# transform_array function
+# ------------------------
+# Applies an affine matrix to an (N,3) array of points in one step,
+# instead of one Vec3 at a time. The kind of the matrix decides the
+# work: the identity is skipped, and a pure translation is an addition
+# instead of a matrix product.
+def transform_array(mat, points):
+	"""Returns the array of points transformed by an affine matrix"""
+	if mat.kind == 'identity':
+		return( points)
+	b = mat.array[:, 3]
+	if mat.kind == 'translation':
+		return( points + b)
+	A = mat.array[:, :3]
+	return( np.dot(points, A.T) + b)
+
+
+# Pixel sizes
+# -----------
+# Point sizes and line widths are given in pixels. To turn them into
+# lengths in the scene, the display is taken to show a sphere of the
+# display radius across display_pixels pixels. Without a display
+# radius points and lines take up no area.
+display_pixels = 1000
+
+def calc_dx_from_point_size(point_size, display_radius=None):
+	"""Returns the length in the scene of a point size in pixels"""
+	if display_radius is None:
+		return( 0.)
+	return( point_size*2.*display_radius/display_pixels)
+
+def calc_dx_from_line_width(line_width, display_radius=None):
+	"""Returns the length in the scene of a line width in pixels"""
+	if display_radius is None:
+		return( 0.)
+	return( line_width*2.*display_radius/display_pixels)
+
+# index_array function
+# --------------------
+# Returns an (N,width) array of vertex indices. Arrays that already
+# hold integers, signed or unsigned, are used as they are, so index
+# arrays read from a file or shared with another object are not copied.
+def index_array(indices, width):
+	"""Returns an integer index array without copying integer arrays"""
+	indices = np.asarray(indices)
+	if indices.dtype.kind not in 'iu':
+		indices = indices.astype(np.int32)
+	return( indices.reshape(-1,width))
@@ -0,0 +1,328 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+import numpy as np
+
+__all__ = ['simplify_arrays', 'simplify', 'build_lod_chain']
+
+#####################################################################
+# Quadric error metric simplification
+# ===================================
+# Surfaces are simplified by collapsing edges, each edge to a single
+# vertex placed where it adds the least error. The error of a position
+# is the sum of the squared distances to the planes of the faces
+# around the original vertices, kept for every vertex as a symmetric
+# 4x4 quadric (Garland and Heckbert, 1997). The quadrics are stored
+# packed as the 10 entries of the upper triangle, in the order
+#   0:(0,0) 1:(0,1) 2:(0,2) 3:(0,3) 4:(1,1)
+#   5:(1,2) 6:(1,3) 7:(2,2) 8:(2,3) 9:(3,3)
+#
+# Instead of popping one edge at a time off a global heap, the edges
+# are collapsed in rounds. In each round every edge is given its cost,
+# and an edge is collapsed if it is the cheapest edge of both of its
+# vertices. These edges never share a vertex, so a whole round is
+# applied with a few array operations, and the cheapest collapses
+# still go first.
+
+triu_rows, triu_cols = np.triu_indices(4)
+
+# The fraction of the edges, cheapest first, that can be collapsed in
+# one round.
+round_fraction = 0.25
+
+# Boundary edges get a plane through the edge, at right angles to its
+# face, weighted by this factor times the squared edge length, so the
+# outline of an open surface is kept.
+boundary_weight = 100.
+
+# face_planes function
+# --------------------
+# Returns the unit normals, the offsets and the areas of the planes of
+# the faces. Degenerate faces are given a zero normal.
+def face_planes(vertices, faces):
+  """Returns the planes and areas of the faces"""
+  p0 = vertices[faces[:,0]]
+  n = np.cross(vertices[faces[:,1]]-p0, vertices[faces[:,2]]-p0)
+  area2 = np.linalg.norm(n, axis=1)
+  n /= np.where(area2 > 0, area2, 1.)[:,np.newaxis]
+  d = -np.einsum('ij,ij->i', n, p0)
+  return( n, d, 0.5*area2)
+
+# plane_quadrics function
+# -----------------------
+# Returns the (K,10) packed quadrics w*p*p^T of the planes p = (n,d).
+def plane_quadrics(n, d, w):
+  """Returns the packed quadrics of an array of planes"""
+  p = np.concatenate([n, d[:,np.newaxis]], axis=1)
+  return( w[:,np.newaxis]*p[:,triu_rows]*p[:,triu_cols])
+
+# vertex_quadrics function
+# ------------------------
+# Adds up the area weighted quadrics of the faces around each vertex,
+# and the boundary planes of the open edges. The open edges are given
+# by their index among the sides of the faces, side k of face f being
+# 3*f+k.
+def vertex_quadrics(vertices, faces, open_edges):
+  """Returns the (V,10) packed quadrics of the vertices"""
+  n, d, area = face_planes(vertices, faces)
+  fq = plane_quadrics(n, d, area)
+  e = faces[:,[0,1,1,2,2,0]].reshape(-1,2)
+  if len(open_edges):
+    be = e[open_edges]
+    side = vertices[be[:,1]]-vertices[be[:,0]]
+    bn = np.cross(side, n[open_edges//3])
+    length = np.linalg.norm(bn, axis=1)
+    bn /= np.where(length > 0, length, 1.)[:,np.newaxis]
+    bd = -np.einsum('ij,ij->i', bn, vertices[be[:,0]])
+    bq = plane_quadrics(bn, bd, boundary_weight*np.einsum('ij,ij->i', side, side))
+    index = np.concatenate([faces.ravel(), be.ravel()])
+    q = np.concatenate([np.repeat(fq, 3, axis=0), np.repeat(bq, 2, axis=0)])
+  else:
+    index = faces.ravel()
+    q = np.repeat(fq, 3, axis=0)
+  Q = np.empty((len(vertices),10))
+  for k in range(10):
+    Q[:,k] = np.bincount(index, weights=q[:,k], minlength=len(vertices))
+  return( Q)
+
+# collapse_positions function
+# ---------------------------
+# Returns the best position and its error for the collapse of each
+# edge with the summed quadric Q. The best position solves the 3x3
+# system of the quadric, done in closed form with the adjugate. When
+# the system is close to singular, as it is on flat and straight parts
+# of the surface, the midpoint is used instead.
+def collapse_positions(Q, pa, pb):
+  """Returns the collapsed positions and their errors"""
+  a00, a01, a02, b0, a11, a12, b1, a22, b2, c = np.ascontiguousarray(Q.T)
+  c00 = a11*a22-a12*a12
+  c01 = a02*a12-a01*a22
+  c02 = a01*a12-a02*a11
+  det = a00*c00+a01*c01+a02*c02
+  scale = np.maximum(np.abs(a00)+np.abs(a11)+np.abs(a22), 1.e-300)
+  ok = np.abs(det) > 1.e-9*scale**3
+  inv_det = 1./np.where(ok, det, 1.)
+  c11 = a00*a22-a02*a02
+  c12 = a01*a02-a00*a12
+  c22 = a00*a11-a01*a01
+  X = np.where(ok, -(c00*b0+c01*b1+c02*b2)*inv_det, 0.5*(pa[:,0]+pb[:,0]))
+  Y = np.where(ok, -(c01*b0+c11*b1+c12*b2)*inv_det, 0.5*(pa[:,1]+pb[:,1]))
+  Z = np.where(ok, -(c02*b0+c12*b1+c22*b2)*inv_det, 0.5*(pa[:,2]+pb[:,2]))
+  err = (a00*X*X+a11*Y*Y+a22*Z*Z+2*(a01*X*Y+a02*X*Z+a12*Y*Z)
+         +2*(b0*X+b1*Y+b2*Z)+c)
+  return( np.stack([X, Y, Z], axis=1), np.maximum(err, 0.))
+
+# simplify_arrays function
+# ------------------------
+# Simplifies a mesh given as a (V,3) vertex array and an (F,3) face
+# array until it has at most target_faces faces, or until every
+# remaining collapse would add more than max_error. Returns the new
+# vertex and face arrays, with the unused vertices removed, and the
+# largest error of the collapses that were made. The edges are taken
+# from the Topology of the mesh if one is given.
+#
+# The edges, their collapse positions and their costs are kept from
+# round to round. After a round only the edges touching a collapsed
+# vertex get new costs, and the edges that became duplicates are only
+# removed every few rounds.
+def simplify_arrays(vertices, faces, target_faces=None, max_error=None, topology=None):
+  """Simplifies a mesh by quadric error edge collapses"""
+  V = np.array(vertices, dtype=np.float64).reshape(-1,3)
+  F = np.array(faces, dtype=np.int64).reshape(-1,3)
+  if target_faces is None and max_error is None:
+    raise AttributeError("simplify takes a target face count or a maximum error")
+  if target_faces is None:
+    target_faces = 0
+  n = len(V)
+  if topology is None:
+    E, first, counts = unique_edges(F, n)
+    open_edges = first[counts == 1]
+  else:
+    E = topology.edges.copy()
+    open_edges = np.flatnonzero(topology.edge_face_count[topology.face_edges.ravel()] == 1)
+  Q = vertex_quadrics(V, F, open_edges)
+  x, cost = collapse_positions(Q[E[:,0]]+Q[E[:,1]], V[E[:,0]], V[E[:,1]])
+  worst = 0.
+  rounds = 0
+  while len(F) > target_faces and len(E):
+    rounds += 1
+    e0, e1 = E[:,0], E[:,1]
+    if max_error is None:
+      c = cost.copy()
+    else:
+      c = np.where(cost <= max_error, cost, np.inf)
+    chosen = pick_collapses(V, F, E, c, x, n, (len(F)-target_faces+1)//2)
+    if len(chosen) == 0:
+      break
+    a, b = e0[chosen], e1[chosen]
+    worst = max(worst, float(c[chosen].max()))
+    V[a] = x[chosen]
+    Q[a] += Q[b]
+    remap = np.arange(n)
+    remap[b] = a
+    F = remap[F]
+    F = F[(F[:,0] != F[:,1]) & (F[:,1] != F[:,2]) & (F[:,2] != F[:,0])]
+    E = remap[E]
+    keep = E[:,0] != E[:,1]
+    if rounds % 8 == 0:
+      keep &= first_of_duplicates(E, n)
+    E, x, cost = E[keep], x[keep], cost[keep]
+    changed = np.zeros(n, dtype=bool)
+    changed[a] = True
+    dirty = np.flatnonzero(changed[E[:,0]] | changed[E[:,1]])
+    d0, d1 = E[dirty,0], E[dirty,1]
+    x[dirty], cost[dirty] = collapse_positions(Q[d0]+Q[d1], V[d0], V[d1])
+  used = np.zeros(n, dtype=bool)
+  used[F] = True
+  remap = np.cumsum(used)-1
+  return( V[used].astype(np.float32), remap[F].astype(np.int32), worst)
+
+# pick_collapses function
+# -----------------------
+# Returns the edges to collapse in one round: a matching of the
+# cheapest edges, at most needed of them since each collapse removes
+# about 2 faces, without the collapses that would flip a face over.
+# If all the picked collapses flip, those edges get an infinite cost
+# for the round and the next cheapest are picked, so an empty result
+# means no edge with a finite cost can be collapsed. The costs c are
+# changed in place.
+def pick_collapses(V, F, E, c, x, n, needed):
+  """Returns the edges to collapse in one round"""
+  e0, e1 = E[:,0], E[:,1]
+  while True:
+    # Only the cheapest edges are collapsed in a round
+    finite = np.isfinite(c)
+    if not finite.any():
+      return( np.zeros(0, dtype=np.int64))
+    k = int(round_fraction*(finite.sum()-1))
+    limit = np.partition(c[finite], k)[k]
+    chosen = match_edges(E, c, finite & (c <= limit), n)
+    if len(chosen) > needed:
+      chosen = chosen[np.argpartition(c[chosen], needed-1)[:needed]]
+    # Drop the collapses that would flip a face over. Dropping a
+    # collapse can turn another face around, so check again until none
+    # are left.
+    touched = np.zeros(n, dtype=bool)
+    touched[e0[chosen]] = True
+    touched[e1[chosen]] = True
+    S = F[touched[F].any(axis=1)]
+    dropped = []
+    while len(chosen):
+      flipped = find_flips(V, S, e0[chosen], e1[chosen], x[chosen])
+      if len(flipped) == 0:
+        break
+      # Only the faces around the dropped collapses change
+      touched[:] = False
+      touched[e0[chosen[flipped]]] = True
+      touched[e1[chosen[flipped]]] = True
+      S = S[touched[S].any(axis=1)]
+      dropped.append( chosen[flipped])
+      chosen = np.delete(chosen, flipped)
+    if len(chosen):
+      return( chosen)
+    c[np.concatenate(dropped)] = np.inf
+
+# match_edges function
+# --------------------
+# Returns the indices of a set of edges that share no vertices, taken
+# from the candidate edges cheapest first. In each pass an edge is
+# taken if it is the cheapest candidate of both its vertices, with ties
+# going to the lowest edge index, and then the candidates touching a
+# taken vertex are removed.
+def match_edges(E, c, candidate, n, passes=8):
+  """Returns a matching of cheap edges"""
+  e0, e1 = E[:,0], E[:,1]
+  taken = np.zeros(n, dtype=bool)
+  matched = []
+  for k in range(passes):
+    cand = np.flatnonzero(candidate & ~taken[e0] & ~taken[e1])
+    if len(cand) == 0:
+      break
+    a, b, cc = e0[cand], e1[cand], c[cand]
+    best = np.full(n, np.inf)
+    np.minimum.at(best, a, cc)
+    np.minimum.at(best, b, cc)
+    cand = cand[(cc == best[a]) & (cc == best[b])]
+    first = np.full(n, len(E), dtype=np.int64)
+    np.minimum.at(first, e0[cand], cand)
+    np.minimum.at(first, e1[cand], cand)
+    cand = cand[(first[e0[cand]] == cand) & (first[e1[cand]] == cand)]
+    taken[e0[cand]] = True
+    taken[e1[cand]] = True
+    matched.append( cand)
+  return( np.concatenate(matched) if matched else np.zeros(0, dtype=np.int64))
+
+# unique_edges function
+# ---------------------
+# Returns the (E,2) array of the edges of the faces, each edge once,
+# with the index of the first side of a face along each edge and the
+# number of faces that use it.
+def unique_edges(F, n):
+  """Returns the unique edges of an array of faces"""
+  e = F[:,[0,1,1,2,2,0]].reshape(-1,2)
+  key = np.minimum(e[:,0], e[:,1])*n+np.maximum(e[:,0], e[:,1])
+  key, first, counts = np.unique(key, return_index=True, return_counts=True)
+  return( np.stack([key//n, key%n], axis=1), first, counts)
+
+# first_of_duplicates function
+# ----------------------------
+# Returns a mask that is True for the first copy of each edge.
+def first_of_duplicates(E, n):
+  key = np.minimum(E[:,0], E[:,1])*n+np.maximum(E[:,0], E[:,1])
+  mask = np.zeros(len(E), dtype=bool)
+  mask[np.unique(key, return_index=True)[1]] = True
+  return( mask)
+
+# find_flips function
+# -------------------
+# Returns the indices of the collapses (a[i],b[i]) -> x[i] that would
+# turn one of the faces F around, by comparing the normal of every
+# face that moves and survives before and after the collapses.
+def find_flips(V, F, a, b, x):
+  n = len(V)
+  collapse = np.full(n, -1, dtype=np.int64)
+  collapse[a] = np.arange(len(a))
+  collapse[b] = np.arange(len(b))
+  moved = (collapse[F] >= 0).any(axis=1)
+  S = F[moved]
+  remap = np.arange(n)
+  remap[b] = a
+  R = remap[S]
+  survive = (R[:,0] != R[:,1]) & (R[:,1] != R[:,2]) & (R[:,2] != R[:,0])
+  S, R = S[survive], R[survive]
+  old = np.cross(V[S[:,1]]-V[S[:,0]], V[S[:,2]]-V[S[:,0]])
+  c = collapse[R]
+  P = np.where((c >= 0)[:,:,np.newaxis], x[c], V[R])
+  new = np.cross(P[:,1]-P[:,0], P[:,2]-P[:,0])
+  flipped = np.zeros(len(a), dtype=bool)
+  ids = collapse[S[np.einsum('ij,ij->i', old, new) <= 0]].ravel()
+  flipped[ids[ids >= 0]] = True
+  return( np.flatnonzero(flipped))
+
+# simplify function
+# -----------------
+# Returns a simplified copy of a Surface, with the same transforms and
+# style options. Per-vertex colors do not survive the collapses and
+# are dropped.
+def simplify(surface, target_faces=None, max_error=None):
+  """Returns a simplified copy of a Surface"""
+  vertices, faces, error = simplify_arrays(surface.vertex_array, surface.face_array,
+                                           target_faces, max_error, surface.calc_topology())
+  return( surface.copy_with_arrays(vertices, faces))
+
+# build_lod_chain function
+# ------------------------
+# Returns a list of (face count, Surface) pairs, from the full surface
+# down, where each level has about ratio times the faces of the one
+# before it. Each level is simplified from the one before it, and the
+# chain stops at min_faces.
+def build_lod_chain(surface, ratio=0.25, min_faces=1000):
+  """Returns a chain of simplified copies of a Surface"""
+  chain = [(len(surface.face_array), surface)]
+  vertices, faces = surface.vertex_array, surface.face_array
+  while len(faces)*ratio >= min_faces:
+    vertices, faces, error = simplify_arrays(vertices, faces, int(len(faces)*ratio))
+    if len(faces) >= chain[-1][0]:
+      break
+    chain.append( (len(faces), surface.copy_with_arrays(vertices, faces)))
+  return( chain)
@@ -0,0 +1,174 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+import numpy as np
+
+from ..utils.vector import BaseVec
+
+__all__ = ['Style', 'StyleTable']
+
+# The per-element style options hold one value per face, edge or
+# vertex. They can not be shared between objects, so they stay on the
+# renderable objects and are never part of a style record.
+per_element_options = ('face_colors', 'edge_colors', 'vertex_colors')
+
+# freeze_option function
+# ----------------------
+# Turns a style option value into something hashable. Color objects
+# are mutable wrappers around numpy arrays, so they are replaced by
+# their class name and a tuple of their components. Arrays only hold
+# per-element options, which are trimmed before a style is interned,
+# so they are keyed by identity rather than hashing their contents.
+def freeze_option(value):
+  """Returns a hashable key for a style option value"""
+  if isinstance(value, BaseVec):
+    return( (value.__class__.__name__, tuple(float(x) for x in value)))
+  elif isinstance(value, np.ndarray):
+    return( ('ndarray', id(value)))
+  elif isinstance(value, (list, tuple)):
+    return( tuple(freeze_option(v) for v in value))
+  else:
+    return( value)
+
+
+#####################################################################
+# Style class
+# ===========
+# A style is an immutable record of the resolved style options for
+# a renderable object. Two styles with the same options compare and
+# hash equal, so they can be interned in a StyleTable and shared by
+# all the objects that use them. It provides:
+# - Look up of an option (get, `[]` and `in` operators)
+# - A new style with some options overridden (merge)
+# - A new style with only some options kept (trim)
+class Style:
+  """Immutable record of style options"""
+
+  # Style constructor
+  # -----------------
+  # Takes the style options as keyword arguments. Options with a
+  # value of None are dropped.
+  def __init__(self, **kwargs):
+    """Constructor for the Style class"""
+    options = dict((k, v) for k, v in kwargs.items() if v is not None)
+    key = tuple(sorted((k, freeze_option(v)) for k, v in options.items()))
+    object.__setattr__(self, '_options', options)
+    object.__setattr__(self, '_key', key)
+    object.__setattr__(self, '_hash', hash(key))
+
+  # __setattr__ method
+  # ------------------
+  # Styles are shared between many objects, so they can not be
+  # changed after they are created.
+  def __setattr__(self, name, value):
+    raise AttributeError("Style objects are immutable")
+
+  def __getitem__(self, option):
+    """Retrieve the value of a style option"""
+    return( self._options[option])
+
+  def __contains__(self, option):
+    """Test if a style option is set"""
+    return( option in self._options)
+
+  def __len__(self):
+    """Number of options set in the style"""
+    return( len(self._options))
+
+  def __eq__(self, other):
+    """Equality comparison operator"""
+    return( isinstance(other, Style) and self._key == other._key)
+
+  def __hash__(self):
+    return( self._hash)
+
+  def __repr__(self):
+    """Defines how the class is printed or shown in the command line"""
+    opts = ", ".join("{}={}".format(k, self._options[k]) for k, _ in self._key)
+    return( "Style({})".format(opts))
+
+  # get method
+  # ----------
+  # Returns the value of an option, or the default if the option is
+  # not set.
+  def get(self, option, default=None):
+    """Retrieve the value of a style option with a default"""
+    return( self._options.get(option, default))
+
+  # options method
+  # --------------
+  # Returns a copy of the options as a dictionary.
+  def options(self):
+    """Returns a dictionary of the style options"""
+    return( dict(self._options))
+
+  # merge method
+  # ------------
+  # Returns a new style where the options given override the options
+  # of this style. This is how a child inherits the style of its
+  # parent.
+  #
+  # Example:
+  # >>> s = Style(color=Red, line_width=2)
+  # >>> s.merge(color=Blue)
+  # Style(color=Blue, line_width=2)
+  def merge(self, **kwargs):
+    """Returns a new style with some options overridden"""
+    if not kwargs:
+      return( self)
+    options = dict(self._options)
+    options.update(kwargs)
+    return( Style(**options))
+
+  # trim method
+  # -----------
+  # Returns a new style keeping only the options in the sequence of
+  # option names. The per-element options are always dropped.
+  def trim(self, option_names):
+    """Returns a new style with only the given options"""
+    options = dict((k, v) for k, v in self._options.items()
+                   if k in option_names and k not in per_element_options)
+    return( Style(**options))
+
+
+#####################################################################
+# StyleTable class
+# ================
+# A table of interned styles. Each unique style is stored once and
+# given an integer id, so renderable objects only need to hold the
+# id of their style. It provides:
+# - Intern a style and get its id (intern)
+# - Look up a style by its id (`[]` operator)
+# - The number of unique styles (`len`)
+class StyleTable:
+  """Table of unique styles indexed by integer ids"""
+
+  def __init__(self):
+    """Constructor for the StyleTable class"""
+    self.styles = []
+    self.ids = {}
+
+  # intern method
+  # -------------
+  # Returns the id of the style, adding it to the table if an equal
+  # style has not been seen before.
+  def intern(self, style):
+    """Returns the integer id of the style"""
+    style_id = self.ids.get(style)
+    if style_id is None:
+      style_id = len(self.styles)
+      self.styles.append(style)
+      self.ids[style] = style_id
+    return( style_id)
+
+  def __getitem__(self, style_id):
+    """Retrieve the style with the given id"""
+    return( self.styles[style_id])
+
+  def __len__(self):
+    """Number of unique styles"""
+    return( len(self.styles))
+
+  def __iter__(self):
+    """Returns an iterator over the styles"""
+    return( iter(self.styles))
@@ -3,8 +3,14 @@
 
 import numpy as np
 
-from ..utils.vector import IVec2, IVec3
-from renderable import RenderableGraphicsObj
+from ..utils.vector import Vec3, IVec2, IVec3, index_dtype, reduction_dtype
+from .renderable import RenderableGraphicsObj, transform_array, index_array, display_pixels
+from .style import per_element_options
+from .simplify import simplify, build_lod_chain
+from .topology import Topology
+from .lineset import LineSet
+from ..lights.light import LightObj
+from ..lights.shading import Materials, shade
 
 __all__ = ['Face','Surface']
 
@@ -69,23 +75,28 @@ class Face(IVec3):
 #####################################################################
 # Surface class
 # =============
-# This class defines a smooth surface. It holds a list of vertices and
-# faces. The vertices is a list of Vec3 objects, and the faces is a 
-# list of Face objects. It provides the following methods:
-# - Calculate area of each face (gen_face_areas)
-# - Calculate the center of mass of each face (gen_face_calc_center)
-# - Calculate the normal of each face (gen_face_normals)
-# - Calculate the normal of each vertex (gen_vertex_normals)
+# This class defines a smooth surface. It holds an (V,3) array of
+# vertex positions and an (F,3) array of vertex indices for the
+# triangular faces. Lists of Vec3 and Face objects are only built when
+# the `vertices` and `faces` attributes are asked for. It provides the
+# following methods:
+# - Construction straight from arrays (from_arrays)
+# - Calculate area of each face (calc_face_areas)
+# - Calculate the center of mass of each face (calc_face_centers)
+# - Calculate the normal of each face (calc_face_normals)
+# - Calculate the normal of each vertex (calc_vertex_normals)
 # - Caclulate the total area center of mass (calc_center)
-# - Calculate the total surface area (area)
+# - Calculate the total surface area (calc_area)
 class Surface(RenderableGraphicsObj):
 
   # Accepts the following style options:
   # - color: The diffusive color of the object
+  # - ambient_color: The color under ambient light, color if not given
   # - specular color: The specular color of the object
   # - specularity: The sharpness of the specular highlights
   # - vertex_colors: Also possible to specify a per-vertex color
   graphics_options = ['color',
+                      'ambient_color',
                       'specular_color',
                       'specularity',
                       'vertex_colors']
@@ -100,15 +111,16 @@ class Surface(RenderableGraphicsObj):
   # - **kwargs: a set of style parameters specified by keywords 
   #
   # The vertices argument should be a list of length-3 sequence of
-  # numbers. Each element of the list is used to create a Vec3 object,
+  # numbers. Each element of the list is a row in the vertex array,
   # which represents the position of that vertex in 3-D space.
   #
   # The faces arguments should be a list of length-3 sequence of
-  # integers. Each element of the list is used to create a Face
-  # object. The integers in the Face object corresponds to the  the
-  # index in the vertices list. The constructor checks that each
-  # integer in the face arguments is less than length of the vertices
-  # list, if not it raises an exception.
+  # integers. Each element of the list is a row in the face array.
+  # The integers correspond to the index in the vertices list. The
+  # constructor checks the whole face array at once for indices that
+  # are negative or not less than the length of the vertices list, and
+  # for faces that use the same index twice. If there are any it raises
+  # one exception listing all of them.
   #
   # In addition if any vertex is not referenced in the face list, it
   # is removed from vertices list, and the face indices are re-
@@ -118,81 +130,123 @@ class Surface(RenderableGraphicsObj):
   # classes constructor.
   def __init__(self, vertices, faces, trans=[], **kwargs):
     """Constructor for the Surface class"""
-    # Add all vertices to self.vertices as Vec3 objects
-    self.vertices = []
-    for v in vertices:
-      self.vertices.append( Vec3(v))
-    # Find max possible index, create an empty set of all indices,
-    # create an empty list of faces
-    max_index = len(self.vertices)-1
-    index_set = set()
-    self.faces = []
-    for f in faces:
-      for index in f:
-        # Check that index points to a vertex
-        if index > max_index:
-          raise AttributeError("Face({}) references index {}, which is not in the vertex list".format(f,index))
-        # Add that index to an index_set
-        index_set.add(index)
-      # Add faces to self.faces as Face objects
-      self.faces.append( Face(f))
-    # From the back of the list, if the index in not reference,
-    # then remove it from the index list, and shift down the indices
-    # in the face list.
-    for index in reversed(range(max_index+1)):
-      if index not in index_set:
-        self.vertices.pop(index)
-        self.faces = [f.reduce(index) for f in self.faces]
-    super(Surface, self).__init__(trans, **kwargs)
+    vertex_array = stack_rows(vertices, np.float32, 3)
+    face_array = stack_rows(faces, np.int64, 3)
+    check_faces(face_array, len(vertex_array), 'Surface.__init__')
+    # Remove the vertices no face uses, and shift down the indices
+    used = np.zeros(len(vertex_array), dtype=bool)
+    used[face_array.ravel()] = True
+    if not np.all(used):
+      new_index = np.cumsum(used)-1
+      vertex_array = vertex_array[used]
+      face_array = new_index[face_array]
+    self.vertex_array = vertex_array
+    self.face_array = face_array.astype(index_dtype(len(vertex_array)))
+    super(Surface, self).__init__(trans=trans, **kwargs)
+
+  # from_arrays method
+  # ------------------
+  # Builds a surface straight from an (V,3) array of vertices and an
+  # (F,3) array of face indices, without building any Vec3 or Face
+  # objects. The arrays are used as they are when they already have the
+  # right type, so several objects can share the same vertex array. The
+  # faces are only checked if check is True, in the same way as by the
+  # constructor.
+  @classmethod
+  def from_arrays(cls, vertices, faces, trans=[], check=False, **kwargs):
+    """Builds a surface from a vertex array and a face array"""
+    self = cls.__new__(cls)
+    self.vertex_array = np.asarray(vertices, dtype=np.float32).reshape(-1,3)
+    self.face_array = index_array(faces, 3)
+    if check:
+      check_faces(self.face_array, len(self.vertex_array), 'Surface.from_arrays')
+    super(Surface, self).__init__(trans=trans, **kwargs)
+    return( self)
+
+  # copy_with_arrays method
+  # -----------------------
+  # Returns a new surface with other vertex and face arrays, but the
+  # same transforms and style options. The per-element options are
+  # left out since they do not fit the new arrays.
+  def copy_with_arrays(self, vertices, faces):
+    """Returns a surface with the same style and new arrays"""
+    options = dict((k, v) for k, v in self.get_style_options().items()
+                   if k not in per_element_options)
+    return( Surface.from_arrays(vertices, faces, trans=self.transforms, **options))
+
+  # vertices and faces attributes
+  # -----------------------------
+  # Lists of Vec3 and Face objects, built from the arrays each time
+  # they are asked for.
+  @property
+  def vertices(self):
+    return( [Vec3(v) for v in self.vertex_array])
+
+  @property
+  def faces(self):
+    return( [Face(f) for f in self.face_array])
+
+  # calc_face_corners method
+  # ------------------------
+  # Returns three (F,3) arrays with the transformed positions of the
+  # corners of every face. The vertex array is transformed once, then
+  # the corners are gathered with the face indices.
+  def calc_face_corners(self):
+    """Returns the transformed corners of each face"""
+    vertices = transform_array(self.trans_mat, self.vertex_array)
+    f = self.face_array
+    return( vertices[f[:,0]], vertices[f[:,1]], vertices[f[:,2]])
+
+  # calc_face_cross method
+  # ----------------------
+  # Returns the (F,3) array of cross products of two sides of each
+  # face. Its length is twice the area of the face, and it points along
+  # the face normal.
+  def calc_face_cross(self):
+    """Returns the cross product of two sides of each face"""
+    pt0, pt1, pt2 = self.calc_face_corners()
+    return( np.cross(pt1-pt0, pt2-pt0))
 
   # calc_face_areas method
   # ---------------------
-  # This method returns a list of surface areas for each face in the 
-  # faces list.
+  # This method returns an array of surface areas for each face in the 
+  # faces array.
   def calc_face_areas(self):
     """Returns the area of each face"""
-    face_areas = [f.calc_area(self.vertices, self.trans_mat) for f in self.faces]
-    return( face_areas)
+    return( 0.5*np.linalg.norm(self.calc_face_cross(), axis=1))
 
   # calc_face_centers method
   # --------------------------------
-  # This method returns a list of area center of mass for each face in
-  # the  faces list. 
+  # This method returns an (F,3) array of area center of mass for each
+  # face in the faces array.
   def calc_face_centers(self):
     """Returns the center of each face"""
-    face_centers = [f.calc_center(self.vertices, self.trans_mat) for f in self.faces]
-    return( face_centers)
+    pt0, pt1, pt2 = self.calc_face_corners()
+    return( (pt0+pt1+pt2)/3.)
 
   # calc_face_normals method
   # --------------------------------
-  # This method returns a list of normal vectors for each face in
-  # the  faces list. 
+  # This method returns an (F,3) array of unit normal vectors for each
+  # face in the faces array.
   def calc_face_normals(self):
     """Returns the normal vectors for each face"""
-    face_normals = [f.calc_normal(self.vertices, self.trans_mat) for f in self.faces]
-    return( face_normals)
+    n = self.calc_face_cross()
+    return( n/np.linalg.norm(n, axis=1)[:,np.newaxis])
 
   # calc_vertex_normals method
   # --------------------------
-  # This method returns a list of normal vectors for each vertex. The
-  # normal vectors are calculated an area weighted average of each
-  # face normal.
+  # This method returns an (V,3) array of normal vectors for each
+  # vertex. The normal vectors are calculated an area weighted average
+  # of each face normal. The cross product of a face is already its
+  # normal times twice its area, so it is added to each of its corners
+  # and the sums are normalized.
   def calc_vertex_normals(self):
     """Returns normal vectors for each of the vertices"""
-    vertex_normals = [None]*len(self.vertices)
-    weights = [None]*len(self.vertices)
-    fns = self.calc_face_normals()
-    areas = self.calc_face_areas()
-    for (f, fn, a) in zip(self.faces, fns, areas):
-      for index in f:
-        if vertex_normals[index] == None:
-          vertex_normals[index] = fn
-          weights[index] = a
-        else:
-          vertex_normals[index] = (weights[index]*vertex_normals[index]+a*fn)/(weights[index]+a)
-          weights[index] = w[index]+a
-    vertex_normals = [vn.unit() for vn in vertex_normals]
-    return( vertex_normals)
+    n = self.calc_face_cross()
+    vertex_normals = np.zeros(self.vertex_array.shape, dtype=n.dtype)
+    for k in range(3):
+      np.add.at(vertex_normals, self.face_array[:,k], n)
+    return( vertex_normals/np.linalg.norm(vertex_normals, axis=1)[:,np.newaxis])
 
   # calc_center
   # -----------
@@ -200,18 +254,15 @@ class Surface(RenderableGraphicsObj):
   def calc_center(self, display_radius=None):
     """Returns the center of the surface"""
     cms = self.calc_face_centers()
-    areas = self.calc_face_areas()
-    num = sum( [cm*area for cm, area in zip(cms, areas)])
-    denom = sum( areas)
-    return( num/denom)
+    areas = self.calc_face_areas().astype(reduction_dtype)
+    return( Vec3(np.dot(areas, cms)/np.sum(areas)))
 
   # calc_area
   # ---------
   # This method returns the total surface area.
   def calc_area(self, display_radius=None):
     """Returns the total surface area"""
-    areas = self.calc_face_areas()
-    return( sum(areas))
+    return( float(np.sum(self.calc_face_areas(), dtype=reduction_dtype)))
 
   # calc_vertices
   # -------------
@@ -220,18 +271,255 @@ class Surface(RenderableGraphicsObj):
     """Returns a list of vertices"""
     return( self.vertices)
 
-  # cald_vertex_attr
+  # calc_topology
+  # -------------
+  # Returns the Topology index of the faces. It is built the first time
+  # it is asked for and kept until the faces change.
+  def calc_topology(self):
+    """Returns the connectivity index of the surface"""
+    return( self.cached('topology', Topology, self.face_array, len(self.vertex_array)))
+
+  # to_lineset method
   # ----------------
-  # This method returns a list of attributes for each vertex.
+  # Returns a LineSet of the edges of the surface, each edge once, that
+  # shares the vertex array of the surface and has the same transforms.
+  # If a feature angle is given, only the boundary edges and the
+  # creases where the normals of the two faces differ by more than the
+  # angle, in radians, are kept. The keywords are the style options of
+  # the line set.
+  #
+  # Example:
+  # >>> outline = surf.to_lineset(np.pi/6, line_color=Black)
+  def to_lineset(self, feature_angle=None, **kwargs):
+    """Returns a wireframe of the surface"""
+    topology = self.calc_topology()
+    edges = topology.edges
+    if feature_angle is not None:
+      normals = self.calc_face_normals()
+      f0, f1 = topology.edge_faces[:,0], topology.edge_faces[:,1]
+      cos = np.einsum('ij,ij->i', normals[f0], normals[f1])
+      keep = (f1 < 0) | (topology.edge_face_count > 2) | (cos < np.cos(feature_angle))
+      edges = edges[keep]
+    return( LineSet.from_arrays(self.vertex_array, edges, transforms=self.transforms, **kwargs))
+
+  # Mutation
+  # --------
+  # The vertices and faces are only changed through these methods,
+  # which mark the surface dirty and so drop everything cached on it.
+  # Moving the vertices does not change the connectivity, so the
+  # topology index is kept.
+  def set_vertices(self, vertices):
+    """Replaces the vertex array"""
+    vertices = np.asarray(vertices, dtype=np.float32).reshape(-1,3)
+    if vertices.shape != self.vertex_array.shape:
+      raise AttributeError("Surface.set_vertices takes the same number of vertices")
+    topology = self.cache.get('topology')
+    self.vertex_array = vertices
+    self.mark_dirty()
+    if topology is not None:
+      self.cache['topology'] = topology
+
+  def set_faces(self, faces):
+    """Replaces the face array"""
+    faces = np.asarray(faces).reshape(-1,3)
+    check_faces(faces, len(self.vertex_array), 'Surface.set_faces')
+    self.face_array = faces.astype(index_dtype(len(self.vertex_array)))
+    self.mark_dirty()
+
+  # Baked lighting
+  # --------------
+  # For a surface that does not move under lights that do not change,
+  # the lit color of every vertex only has to be found once. The baked
+  # colors are kept in the cache with a key of the surface version, the
+  # lights and the material style, and the viewer if specular light is
+  # baked in, and the world matrix of the surface. They are stored as
+  # the vertex_colors of the surface, so exporters use them without
+  # lighting the surface again. Changing the surface, its transforms,
+  # its style or any of its ancestors drops them, and baking again with
+  # other lights or another material recomputes them.
+  def bake_lighting(self, lights, eye=None, view_dir=None, style=None):
+    """Returns the (V,4) lit vertex colors, baked once"""
+    if not isinstance(lights, LightObj):
+      lights = LightObj(*(lights if isinstance(lights, (list, tuple)) else [lights]))
+    if style is None:
+      style = self.calc_inherited_style().merge(**self.get_style_options()).trim(self.graphics_options)
+    viewer = tuple(np.ravel(getattr(x, 'array', x)).tolist() if x is not None else None
+                   for x in (eye, view_dir))
+    world_mat = self.calc_world_mat()
+    key = (self.version, world_mat.array.tobytes(), lights.key(), style, viewer)
+    baked = self.cache.get('baked_lighting')
+    if baked is None or baked[0] != key:
+      baked = (key, self.calc_lit_colors(lights, style, eye, view_dir, world_mat))
+      self.cache['baked_lighting'] = baked
+    self.__dict__['vertex_colors'] = baked[1]
+    return( baked[1])
+
+  # calc_lit_colors
+  # ---------------
+  # Shades the vertices in world space, with the positions and vertex
+  # normals moved by the world matrix of the surface. Without a viewer
+  # only the ambient and diffuse light is found, which does not depend
+  # on where the surface is seen from.
+  def calc_lit_colors(self, lights, style, eye=None, view_dir=None, world_mat=None):
+    """Returns the (V,4) lit colors of the vertices"""
+    if world_mat is None:
+      world_mat = self.calc_world_mat()
+    materials = Materials([style])
+    if eye is None and view_dir is None:
+      materials.specular[:] = 0
+      view_dir = (0,0,-1)
+    positions = transform_array(world_mat, self.vertex_array)
+    normals = self.calc_vertex_normals() @ np.linalg.inv(world_mat.array[:,:3]).astype(np.float32)
+    normals /= np.maximum(np.linalg.norm(normals, axis=1), 1.e-12)[:,np.newaxis]
+    colors = np.empty((len(positions),4), dtype=np.float32)
+    colors[:,:3] = shade(positions, normals, lights, materials, eye=eye, view_dir=view_dir)
+    colors[:,3] = materials.opacity[0]
+    return( colors)
+
+  def is_baked(self):
+    """Tests if the vertex colors are baked lighting"""
+    baked = self.cache.get('baked_lighting')
+    return( baked is not None and getattr(self, 'vertex_colors', None) is baked[1])
+
+  def drop_baked(self):
+    """Removes the baked vertex colors"""
+    if self.is_baked():
+      del self.vertex_colors
+    self.cache.pop('baked_lighting', None)
+
+  # Baked vertex colors do not outlive the cache they are kept in.
+  def mark_dirty(self):
+    self.drop_baked()
+    super(Surface, self).mark_dirty()
+
+  # Level of detail
+  # ---------------
+  # Surfaces with more than lod_min_faces faces get a chain of
+  # simplified copies, each with lod_ratio times the faces of the one
+  # before, down to lod_floor_faces faces. The chain is built the first
+  # time it is needed and dropped when the surface changes.
+  # to_renderable picks the coarsest level that still has
+  # lod_faces_per_pixel faces for each pixel the surface covers at the
+  # display radius. Setting lod_min_faces to None turns this off.
+  lod_min_faces = 20000
+  lod_floor_faces = 1000
+  lod_ratio = 0.25
+  lod_faces_per_pixel = 0.5
+
+  def simplify(self, target_faces=None, max_error=None):
+    """Returns a simplified copy of the surface"""
+    return( simplify(self, target_faces, max_error))
+
+  def calc_lod_chain(self):
+    """Returns the list of (face count, Surface) levels of detail"""
+    return( self.cached('lod_chain', build_lod_chain, self, self.lod_ratio, self.lod_floor_faces))
+
+  def select_lod(self, display_radius=None):
+    """Returns the level of detail to draw at a display radius"""
+    if display_radius is None or self.lod_min_faces is None or len(self.face_array) <= self.lod_min_faces:
+      return( self)
+    vertices = self.calc_vertex_array(self.trans_mat)
+    size = np.max(vertices.max(axis=0)-vertices.min(axis=0))
+    pixels = min(size/(2.*display_radius), 1.)*display_pixels
+    budget = self.lod_faces_per_pixel*pixels*pixels
+    choice = self
+    for count, level in self.calc_lod_chain():
+      if count >= budget:
+        choice = level
+    return( choice)
+
+  # to_renderable
+  # -------------
+  # Returns the level of detail for the display radius, which is the
+  # surface itself for small surfaces or without a display radius.
+  def to_renderable(self, display_radius=None):
+    return( self.select_lod(display_radius))
+
+  # calc_vertex_array
+  # -----------------
+  # Returns the vertex array transformed by the world matrix, without
+  # building any Vec3 objects.
+  def calc_vertex_array(self, world_mat):
+    """Returns an array of the transformed vertices"""
+    return( transform_array(world_mat, self.vertex_array))
+
+  # export_faces
+  # ------------
+  # Returns the face indices as one flat index buffer of the smallest
+  # index type for the number of vertices, uint16 when it fits.
+  def export_faces(self):
+    """Returns the triangle index buffer"""
+    return( self.face_array.astype(index_dtype(len(self.vertex_array)), copy=False).ravel())
+
+  # calc_vertex_attr
+  # ----------------
+  # The vertex colors are the only attribute a surface holds for each
+  # vertex. Any other attribute comes from the resolved style, so only
+  # the style id is returned.
   def calc_vertex_attr(self, attr, default):
-    """Returns a list of attribute values for each vertex"""
+    """Returns the vertex colors, or the style id"""
     if attr == 'color' and hasattr(self, 'vertex_colors'):
       return( self.vertex_colors)
-    else:
-      size = len(self.vertices)
-      if hasattr( self, attr):
-        val = getattr(self, attr)
-        return( [val]*size)
-      else:
-        return( [default]*size)
-        
\ No newline at end of file
+    return( self.style_id)
+
+
+# stack_rows function
+# -------------------
+# Returns an (N,width) array from a sequence of rows, which can be
+# vector objects or length-width sequences. Arrays are converted in one
+# step.
+def stack_rows(rows, dtype, width):
+  """Returns a 2-D array of a sequence of rows"""
+  if not isinstance(rows, np.ndarray):
+    rows = [getattr(r, 'array', r) for r in rows]
+  return( np.asarray(rows, dtype=dtype).reshape(-1,width))
+
+# find_bad_faces function
+# -----------------------
+# Returns the indices of the faces with a corner index outside of the
+# vertex array.
+def find_bad_faces(faces, num_vertices):
+  """Returns the indices of the faces with out of range indices"""
+  faces = np.asarray(faces)
+  bad = faces >= num_vertices
+  if faces.dtype.kind == 'i':
+    bad |= faces < 0
+  return( np.flatnonzero(bad.any(axis=1)))
+
+# find_degenerate_faces function
+# ------------------------------
+# Returns the indices of the faces that use the same vertex for two
+# of their corners.
+def find_degenerate_faces(faces):
+  """Returns the indices of the faces with a repeated index"""
+  f = np.asarray(faces)
+  return( np.flatnonzero((f[:,0] == f[:,1]) | (f[:,1] == f[:,2]) | (f[:,2] == f[:,0])))
+
+# find_face_errors function
+# -------------------------
+# Checks a whole face array and returns a list of messages, one for
+# each kind of problem, each listing every face with that problem. The
+# list is empty if the faces are good.
+def find_face_errors(faces, num_vertices):
+  """Returns the problems with a face array"""
+  errors = []
+  bad = find_bad_faces(faces, num_vertices)
+  if len(bad):
+    errors.append( "faces {} reference indices which are not in the vertex list".format(format_face_list(bad)))
+  degenerate = find_degenerate_faces(faces)
+  if len(degenerate):
+    errors.append( "faces {} use the same vertex twice".format(format_face_list(degenerate)))
+  return( errors)
+
+# check_faces function
+# --------------------
+# Raises one exception listing every problem with a face array, for
+# the constructor, from_arrays and set_faces to share.
+def check_faces(faces, num_vertices, name):
+  """Raises an AttributeError if a face array has bad faces"""
+  errors = find_face_errors(faces, num_vertices)
+  if errors:
+    raise AttributeError("{} got bad faces: {}".format(name, '; '.join(errors)))
+
+def format_face_list(faces):
+  return( ', '.join(str(f) for f in faces))
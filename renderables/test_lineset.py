@@ -0,0 +1,68 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+from lineset import *
+from ..transforms.transform import Transform
+from ..transforms.translate import Translate
+from ..transforms.rotate import RotateZ
+
+import unittest
+import numpy as np
+
+class TestLineSet(unittest.TestCase):
+
+  # Test that the edges of strips are only made from the offsets, and
+  # that closed strips get a closing edge
+  def test_strips(self):
+    v = np.arange(27).reshape(9,3)
+    s = LineSet.from_strips(v, [0,2,2,5,9], closed=[False,True,True,True])
+    self.assertEqual(s.edge_array.tolist(),
+                     [[0,1],[2,3],[3,4],[5,6],[6,7],[7,8],[4,2],[8,5]])
+    r = 0xFFFF
+    self.assertEqual(s.export_strips().dtype, np.uint16)
+    self.assertEqual(s.export_strips().tolist(),
+                     [0,1,r,r,2,3,4,2,r,5,6,7,8,5])
+    r = 0xFFFFFFFF
+    self.assertEqual(s.export_strips(np.uint32).tolist(),
+                     [0,1,r,r,2,3,4,2,r,5,6,7,8,5])
+
+  # Test that a closed Line is one strip with the same metrics as the
+  # same square given as edges
+  def test_Line(self):
+    sq = [[0,0,0],[1,0,0],[1,1,0],[0,1,0]]
+    l = Line(sq, closed=True)
+    e = LineSet(sq, [[0,1],[1,2],[2,3],[3,0]])
+    self.assertEqual(l.export_strips().tolist(), [0,1,2,3,0])
+    self.assertTrue(np.allclose(l.gen_edge_lengths(), e.gen_edge_lengths()))
+    self.assertTrue(np.allclose(l.center_of_mass().array, e.center_of_mass().array))
+  # Test that the metrics are cached, and dropped when the vertices
+  # are changed
+  def test_metrics(self):
+    e = LineSet([[0,0,0],[1,0,0],[1,1,0]], [[0,1],[1,2],[2,0]], line_width=2)
+    self.assertAlmostEqual(e.area(500.), 2*(2+np.sqrt(2)), places=5)
+    self.assertIn('length_sums', e.cache)
+    e.set_vertices([[0,0,0],[2,0,0],[2,2,0]])
+    self.assertNotIn('length_sums', e.cache)
+    self.assertTrue(np.allclose(e.gen_edge_lengths(), [2,2,2*np.sqrt(2)]))
+
+  # Test that a rotation about the center of mass is about the center
+  # moved by the transforms before it, and that setting the same
+  # transforms again gives the same matrix
+  def test_set_transforms(self):
+    v = np.array([[0,0,0],[2,0,0],[2,1,0]], dtype=np.float32)
+    trans = [Transform(Translate((1,4,0))), Transform(RotateZ(np.pi/2))]
+    s = LineSet(v, [[0,1],[1,2]], transforms=trans)
+    c = s.center_of_mass().array
+    mats = []
+    for k in range(3):
+      s.set_transforms(trans)
+      mats.append( s.trans_mat.array)
+    self.assertTrue(np.allclose(mats[0], mats[1]))
+    self.assertTrue(np.allclose(mats[0], mats[2]))
+    self.assertTrue(np.allclose(s.center_of_mass().array, c, atol=1e-5))
+    cm = np.array([(1+1.5*2)/3+1, 4+.5/3, 0])
+    self.assertTrue(np.allclose(c, cm, atol=1e-5))
+    LineSet(v, [[0,1],[1,2]], transforms=[Transform(Translate((1,4,0)), RotateZ(np.pi/2))])
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,51 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+from pointcloud import *
+from renderable import RenderableGraphicsObj
+from ..utils.color import RGBA
+from ..transforms.transform import Transform
+from ..transforms.translate import Translate
+
+import unittest
+import numpy as np
+
+class TestPointCloud(unittest.TestCase):
+
+  # Test that points without their own sizes and colors take them
+  # from the style, and that the export is one buffer
+  def test_export_instanced(self):
+    p = PointCloud([[0,0,0],[1,0,0],[2,0,0]], point_size=5, point_color=RGBA(1,0,0,1))
+    buf, style = p.export_instanced()
+    self.assertEqual(buf.dtype, instance_dtype)
+    self.assertEqual(len(buf), 3)
+    self.assertTrue(np.all(buf['size'] == 5))
+    self.assertEqual(list(buf['color'][0]), [255,0,0,255])
+    self.assertTrue(np.all(buf['texture_id'] == -1))
+    self.assertEqual(style['point_size'], 5)
+
+  # Test that a point cloud in a group is exported where the packed
+  # buffers put it, with the style of the group
+  def test_export_parent(self):
+    p = PointCloud([[0,0,0],[1,0,0],[2,0,0]])
+    group = RenderableGraphicsObj(p, trans=[Transform(Translate((10,0,0)))],
+                                  point_color=RGBA(1,0,0,1), point_size=8)
+    buf, style = p.export_instanced(eye=[20,0,0])
+    self.assertTrue(np.allclose(buf['position'], group.pack_buffers()))
+    self.assertTrue(np.all(buf['size'] == 8))
+    self.assertEqual(list(buf['color'][0]), [255,0,0,255])
+
+  # Test that sorting for alpha blending puts the farthest point first
+  def test_sort(self):
+    p = PointCloud([[0,0,0],[5,0,0],[2,0,0]], sizes=[1,2,3], texture_ids=[7,8,9])
+    buf, style = p.export_instanced(eye=[-1,0,0])
+    self.assertEqual(list(buf['texture_id']), [8,9,7])
+    buf, style = p.export_instanced(direction=[-1,0,0])
+    self.assertEqual(list(buf['texture_id']), [7,9,8])
+
+  def test_Constructor(self):
+    self.assertRaises(AttributeError, PointCloud, [[0,0,0],[1,0,0]], sizes=[1])
+    self.assertRaises(ValueError, PointCloud, [[0,0,0]], colors=[[2,0,0,1]])
+
+if __name__ == '__main__':
+  unittest.main()
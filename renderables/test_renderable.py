@@ -0,0 +1,137 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+from renderable import *
+from surface import Surface
+from ..utils.vector import Vec3
+from ..utils.matrix import Mat3x4
+from ..utils.color import RGBA
+from ..transforms.transform import Transform
+from ..transforms.translate import Translate
+from ..transforms.rotate import RotateZ
+
+import unittest
+import numpy as np
+
+def tetrahedron(offset, **kwargs):
+  vertices = np.array([[0,0,0],[1,0,0],[0,1,0],[0,0,1]], dtype=np.float32)+offset
+  return( Surface.from_arrays(vertices, [[0,2,1],[0,1,3],[0,3,2],[1,2,3]], **kwargs))
+
+# A leaf with its center of mass at the point (1,0,0) moved by its
+# transform matrix
+class Body(RenderableGraphicsObj):
+  def center_of_mass(self):
+    return( self.trans_mat*Vec3(1,0,0))
+
+# The vertices of every leaf found one object at a time, from the
+# world matrix of the leaf itself
+def leaf_vertices(root):
+  return( np.concatenate([transform_array(leaf.calc_world_mat(), leaf.vertex_array)
+                          for leaf in root.iter_leaves()]))
+
+class TestRenderable(unittest.TestCase):
+
+  def setUp(self):
+    self.a = tetrahedron(0)
+    self.b = tetrahedron(2, color=RGBA(1,0,0,1))
+    self.c = tetrahedron(-3)
+    self.group = RenderableGraphicsObj(self.b, self.c, trans=[Transform(Translate((0,0,5)))])
+    self.root = RenderableGraphicsObj(self.a, self.group)
+
+  # Test that the packed buffers hold the world space vertices and the
+  # style ids of the leaves
+  def test_pack_buffers(self):
+    vertices = self.root.pack_buffers()
+    self.assertTrue(np.allclose(vertices, leaf_vertices(self.root)))
+    self.assertEqual(self.root.packed_style_ids.tolist(), [self.a.style_id, self.b.style_id, self.c.style_id])
+    self.assertNotEqual(self.a.style_id, self.b.style_id)
+
+  # Test that only the ranges of the changed leaves are rewritten, and
+  # that the result is the same as packing again
+  def test_update_buffers(self):
+    self.root.pack_buffers()
+    vertices, changed = self.root.update_buffers()
+    self.assertEqual(changed, [])
+    self.c.set_transforms([Transform(RotateZ(np.pi/3, origin=(0,0,0)))])
+    vertices, changed = self.root.update_buffers()
+    self.assertEqual(changed, [(8,12)])
+    self.assertTrue(np.allclose(vertices, leaf_vertices(self.root), atol=1e-6))
+    self.group.set_transforms([])
+    self.group.set_style(color=RGBA(0,0,1,1))
+    vertices, changed = self.root.update_buffers()
+    self.assertEqual(changed, [(4,8),(8,12)])
+    self.assertTrue(np.allclose(vertices, leaf_vertices(self.root), atol=1e-6))
+    self.assertTrue(np.all(self.root.style_table[self.c.style_id]['color'].array == [0,0,1,1]))
+    self.assertTrue(np.all(self.root.style_table[self.b.style_id]['color'].array == [1,0,0,1]))
+
+  # Test that a leaf with another number of vertices packs everything
+  # again
+  def test_replace_child(self):
+    self.root.pack_buffers()
+    self.group.replace_child(0, Surface.from_arrays([[0,0,0],[1,0,0],[0,1,0]], [[0,1,2]]))
+    vertices, changed = self.root.update_buffers()
+    self.assertEqual(changed, [(0,11)])
+    self.assertTrue(np.allclose(vertices, leaf_vertices(self.root)))
+
+  # Test that a pass started below the root inherits the styles of the
+  # ancestors
+  def test_resolve_styles(self):
+    self.root.set_style(color=RGBA(0,1,0,1), line_width=3)
+    table = self.group.resolve_styles()
+    self.assertTrue(np.all(table[self.c.style_id]['color'].array == [0,1,0,1]))
+    self.assertTrue(np.all(table[self.b.style_id]['color'].array == [1,0,0,1]))
+    table = self.c.resolve_styles()
+    self.assertEqual(len(table), 1)
+    self.assertTrue(np.all(table[self.c.style_id]['color'].array == [0,1,0,1]))
+
+  # Test that the vertex attributes index the style values, and give
+  # the same value for every vertex as the style of its leaf
+  def test_calc_vertex_attr(self):
+    self.c.vertex_colors = [RGBA(0,0,1,1)]*4
+    values, index = self.root.calc_vertex_attr('color', RGBA(1,1,1,1))
+    self.assertEqual(index.dtype, np.uint32)
+    self.assertEqual(len(index), 12)
+    self.assertEqual(len(values), len(self.root.style_table)+4)
+    expected = [[1,1,1,1]]*4+[[1,0,0,1]]*4+[[0,0,1,1]]*4
+    self.assertTrue(np.allclose([getattr(values[i], 'array', values[i]) for i in index], expected))
+    self.assertEqual(self.a.calc_vertex_attr('color', None), self.a.style_id)
+
+  # Test that the bounds are cached and follow the changes to the tree
+  def test_calc_bounds(self):
+    lo, hi = self.root.calc_bounds()
+    self.assertTrue(np.allclose(lo, leaf_vertices(self.root).min(axis=0)))
+    self.assertTrue(np.allclose(hi, leaf_vertices(self.root).max(axis=0)))
+    self.assertIs(self.root.calc_bounds()[0], lo)
+    self.b.set_transforms([Transform(Translate((0,0,10)))])
+    lo, hi = self.root.calc_bounds()
+    self.assertTrue(np.allclose(hi, leaf_vertices(self.root).max(axis=0)))
+    self.assertTrue(np.allclose(hi, [3,3,18]))
+
+  # Test that a rotation about the center of mass is about the center moved
+  # by the transforms before it, and that setting the same transforms
+  # again gives the same matrix
+  def test_set_transforms(self):
+    trans = [Transform(Translate((1,4,0))), Transform(RotateZ(np.pi/2))]
+    body = Body(trans=trans)
+    mats = []
+    for k in range(3):
+      body.set_transforms(trans)
+      mats.append( body.trans_mat.array)
+    self.assertTrue(np.allclose(mats[0], mats[1]))
+    self.assertTrue(np.allclose(mats[0], mats[2]))
+    self.assertTrue(np.allclose(body.center_of_mass().array, [2,4,0]))
+
+  # Test that the world matrices carry the kind of the transforms, and
+  # that transform_array follows the kind instead of the entries
+  def test_transform_kind(self):
+    self.assertEqual([mat.kind for leaf, mat in self.root.iter_leaf_mats()], ['identity', 'translation', 'translation'])
+    self.c.set_transforms([Transform(RotateZ(.5, origin=(0,0,0)))])
+    self.assertEqual(self.c.calc_world_mat().kind, 'affine')
+    points = np.zeros((2,3))
+    tiny = Mat3x4(1,0,0,1e-9,0,1,0,0,0,0,1,0, kind='translation')
+    self.assertTrue(tiny.is_identity())
+    self.assertTrue(np.all(transform_array(tiny, points)[:,0] == tiny.array[0,3]))
+    self.assertIs(transform_array(Mat3x4(1,0,0,0,0,1,0,0,0,0,1,0, kind='identity'), points), points)
+
+if __name__ == '__main__':
+  unittest.main()
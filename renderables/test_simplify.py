@@ -0,0 +1,75 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+from simplify import *
+from surface import Surface
+from renderable import RenderableGraphicsObj
+
+import unittest
+import numpy as np
+
+# A flat n by n grid of squares, each split into two triangles
+def grid(n):
+  x, y = np.meshgrid(np.arange(n+1), np.arange(n+1))
+  vertices = np.stack([x.ravel(), y.ravel(), np.zeros(x.size)], axis=1)
+  i = (np.arange(n)[:,np.newaxis]*(n+1)+np.arange(n)).ravel()
+  faces = np.concatenate([np.stack([i, i+1, i+n+2], axis=1),
+                          np.stack([i, i+n+2, i+n+1], axis=1)])
+  return( vertices, faces)
+
+def area(vertices, faces):
+  p = vertices[faces]
+  return( 0.5*np.linalg.norm(np.cross(p[:,1]-p[:,0], p[:,2]-p[:,0]), axis=1).sum())
+
+class TestSimplify(unittest.TestCase):
+
+  # Test that a flat grid is simplified below the target face count
+  # without error, keeping its outline and so its area
+  def test_flat(self):
+    v, f = grid(20)
+    v1, f1, error = simplify_arrays(v, f, target_faces=100)
+    self.assertLessEqual(len(f1), 100)
+    self.assertLess(error, 1.e-9)
+    self.assertAlmostEqual(area(v1, f1), 400., places=3)
+    self.assertEqual(f1.max(), len(v1)-1)
+
+  # Test that a curved grid reaches the target face count, even when
+  # the cheapest collapses of the last rounds would flip faces
+  def test_curved(self):
+    v, f = grid(100)
+    v[:,2] = 5*np.sin(0.2*v[:,0])*np.cos(0.15*v[:,1])
+    for target in (1000, 200):
+      v1, f1, error = simplify_arrays(v, f, target_faces=target)
+      self.assertLessEqual(len(f1), target)
+      self.assertGreater(len(f1), 0.9*target)
+
+  # Test that no collapse is made above the maximum error
+  def test_max_error(self):
+    v, f = grid(4)
+    v[12,2] = 1.
+    v1, f1, error = simplify_arrays(v, f, max_error=1.e-6)
+    self.assertLessEqual(error, 1.e-6)
+    self.assertTrue(np.any(np.all(np.isclose(v1, [2,2,1]), axis=1)))
+
+  # Test that the chain goes down to the floor, and that the level of
+  # detail follows the display radius, also inside a group
+  def test_lod(self):
+    v, f = grid(130)
+    v[:,2] = 5*np.sin(0.2*v[:,0])*np.cos(0.15*v[:,1])
+    s = Surface.from_arrays(v, f)
+    counts = [count for count, level in s.calc_lod_chain()]
+    self.assertEqual(counts[0], 33800)
+    self.assertTrue(np.all(np.diff(counts) < 0))
+    self.assertTrue(s.lod_floor_faces <= counts[-1] < s.lod_floor_faces/s.lod_ratio)
+    far = s.get_renderable(1000.)
+    self.assertLess(len(far.face_array), 33800)
+    self.assertIs(s.get_renderable(0.5), s)
+    self.assertIs(s.get_renderable(1000.), far)
+    group = RenderableGraphicsObj(s)
+    rend = group.to_renderable(1000.)
+    self.assertEqual(len(rend.obj_list[0].face_array), len(far.face_array))
+    self.assertIs(s.parent, group)
+    self.assertIs(group.to_renderable(0.5), group)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,42 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+from style import *
+from ..utils.color import RGB
+
+import unittest
+
+class TestStyle(unittest.TestCase):
+
+  # Test that equal styles compare and hash the same, even when the
+  # colors are different objects, and that styles are immutable
+  def test_Style(self):
+    s0 = Style(color=RGB(1,0,0), line_width=2)
+    s1 = Style(line_width=2, color=RGB(1,0,0))
+    self.assertEqual(s0, s1)
+    self.assertEqual(hash(s0), hash(s1))
+    self.assertNotEqual(s0, Style(color=RGB(0,1,0), line_width=2))
+    self.assertRaises(AttributeError, setattr, s0, 'color', None)
+
+  # Test merging a child style over the parent style, and trimming
+  # off the options an object can not use
+  def test_merge_and_trim(self):
+    parent = Style(color=RGB(1,0,0), point_size=4)
+    child = parent.merge(color=RGB(0,0,1))
+    self.assertEqual(child['point_size'], 4)
+    self.assertEqual(list(child['color']), [0,0,1,1])
+    trimmed = child.trim(['color','vertex_colors'])
+    self.assertFalse('point_size' in trimmed)
+    self.assertEqual(len(trimmed), 1)
+
+  # Test that the style table only stores each unique style once
+  def test_StyleTable(self):
+    table = StyleTable()
+    i0 = table.intern(Style(color=RGB(1,0,0)))
+    i1 = table.intern(Style(color=RGB(0,1,0)))
+    i2 = table.intern(Style(color=RGB(1,0,0)))
+    self.assertEqual((i0, i1, i2), (0, 1, 0))
+    self.assertEqual(len(table), 2)
+
+if __name__ == '__main__':
+  unittest.main()
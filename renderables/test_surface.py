@@ -1,9 +1,18 @@
 # Author: Jef Wagner
 # Date: 20-02-2015
 
+from surface import *
+from renderable import RenderableGraphicsObj
+from ..utils.vector import Vec3
+from ..utils.color import RGBA
+from ..lights.light import *
+from ..transforms.transform import Transform
+from ..transforms.rotate import RotateX
+
 import unittest
+import numpy as np
 
-class TestSurface(unittest.testcase):
+class TestSurface(unittest.TestCase):
 
   def test_Face(self):
     v = []
@@ -26,5 +35,70 @@ class TestSurface(unittest.testcase):
     s = Surface(v,f)
     self.assertIsInstance(s, Surface)
 
+  # Test that every bad face is listed in one error, and that unused
+  # vertices are removed
+  def test_Constructor_checks(self):
+    v = [[0,0,0],[1,0,0],[0,1,0],[5,5,5]]
+    with self.assertRaises(AttributeError) as cm:
+      Surface(v, [[0,1,2],[0,1,7],[1,1,2],[-1,1,2]])
+    self.assertIn('faces 1, 3 reference', str(cm.exception))
+    self.assertIn('faces 2 use', str(cm.exception))
+    s = Surface(v, [[0,1,3]])
+    self.assertEqual(s.vertex_array.shape, (3,3))
+    self.assertTrue(np.all(s.face_array == [[0,1,2]]))
+
+  # Test that from_arrays and set_faces check the faces in the same way
+  # as the constructor
+  def test_face_checks(self):
+    v = np.array([[0,0,0],[1,0,0],[0,1,0]], dtype=np.float32)
+    with self.assertRaises(AttributeError) as cm:
+      Surface.from_arrays(v, [[0,1,2],[0,0,2],[0,1,5]], check=True)
+    self.assertIn('faces 2 reference', str(cm.exception))
+    self.assertIn('faces 1 use', str(cm.exception))
+    s = Surface.from_arrays(v, [[0,1,2]])
+    with self.assertRaises(AttributeError) as cm:
+      s.set_faces([[0,1,1],[2,1,0]])
+    self.assertIn('faces 0 use', str(cm.exception))
+    self.assertTrue(np.all(s.face_array == [[0,1,2]]))
+
+  # Test that the wireframe of a box has every edge once, and that only
+  # the 12 sides of the box are creases
+  def test_to_lineset(self):
+    v = [[0,0,0],[1,0,0],[1,1,0],[0,1,0],[0,0,1],[1,0,1],[1,1,1],[0,1,1]]
+    f = [[0,2,1],[0,3,2],[0,5,4],[0,1,5],[1,6,5],[1,2,6],
+         [2,7,6],[2,3,7],[3,4,7],[3,0,4],[4,5,6],[4,6,7]]
+    s = Surface(v,f)
+    self.assertEqual(len(s.to_lineset().edge_array), 18)
+    l = s.to_lineset(np.pi/4)
+    self.assertEqual(len(l.edge_array), 12)
+    self.assertTrue(np.shares_memory(l.vertex_array, s.vertex_array))
+
+  # Test that baked colors are reused, recomputed for other lights, and
+  # dropped when the surface changes
+  def test_bake_lighting(self):
+    s = Surface([[0,0,0],[1,0,0],[0,1,0]], [[0,1,2]], color=RGBA(1,0,0,1))
+    lights = LightObj(DirectionalLight((0,0,-1)))
+    c = s.bake_lighting(lights)
+    self.assertTrue(np.allclose(c, [[1,0,0,1]]*3))
+    self.assertIs(s.vertex_colors, c)
+    self.assertIs(s.bake_lighting(LightObj(DirectionalLight((0,0,-1)))), c)
+    c2 = s.bake_lighting(LightObj(DirectionalLight((0,0,-1), intensity=0.5)))
+    self.assertTrue(np.allclose(c2[:,0], 0.5))
+    s.set_style(color=RGBA(0,1,0,1))
+    self.assertFalse(hasattr(s, 'vertex_colors'))
+    self.assertTrue(np.allclose(s.bake_lighting(lights)[:,1], 1))
+
+  # Test that lighting is baked in world space, and dropped when an
+  # ancestor moves the surface
+  def test_bake_lighting_parent(self):
+    s = Surface([[0,0,0],[1,0,0],[0,1,0]], [[0,1,2]], color=RGBA(.5,.5,.5,1))
+    parent = RenderableGraphicsObj(s)
+    lights = LightObj(AmbientLight(intensity=0.2), DirectionalLight((0,0,-1)))
+    self.assertTrue(np.allclose(s.bake_lighting(lights)[:,0], 0.6))
+    parent.set_transforms([Transform(RotateX(np.pi/2, origin=(0,0,0)))])
+    self.assertFalse(s.is_baked())
+    self.assertFalse(hasattr(s, 'vertex_colors'))
+    self.assertTrue(np.allclose(s.bake_lighting(lights)[:,:3], 0.1, atol=1e-6))
+
 if __name__ == '__main__':
   unittest.main()
\ No newline at end of file
@@ -0,0 +1,39 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+from topology import *
+
+import unittest
+import numpy as np
+
+class TestTopology(unittest.TestCase):
+
+  # A square of four triangles around a center vertex 4
+  faces = [[0,1,4], [1,2,4], [2,3,4], [3,0,4]]
+
+  def test_edges(self):
+    t = Topology(self.faces, 5)
+    self.assertEqual(len(t.edges), 8)
+    self.assertEqual(sorted(t.edge_face_count.tolist()), [1]*4+[2]*4)
+    e = t.face_edges[0,0]
+    self.assertEqual(t.edges[e].tolist(), [0,1])
+    self.assertEqual(t.edge_faces[t.face_edges[0,1]].tolist(), [0,1])
+
+  def test_adjacency(self):
+    t = Topology(self.faces, 5)
+    self.assertEqual(sorted(t.faces_of(4).tolist()), [0,1,2,3])
+    self.assertEqual(sorted(t.one_ring(0).tolist()), [1,3,4])
+    self.assertEqual(t.valence().tolist(), [3,3,3,3,4])
+
+  # Test that the boundary of the square is one loop in the direction
+  # of the faces
+  def test_boundary(self):
+    t = Topology(self.faces, 5)
+    self.assertEqual(sorted(map(tuple, t.boundary_edges().tolist())),
+                     [(0,1), (1,2), (2,3), (3,0)])
+    loops = t.boundary_loops()
+    self.assertEqual(len(loops), 1)
+    self.assertEqual(loops[0].tolist(), [0,1,2,3])
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,147 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+import numpy as np
+
+__all__ = ['Topology']
+
+#####################################################################
+# Topology class
+# ==============
+# An index of the connectivity of a triangle mesh, built once from the
+# (F,3) face array with a few sorts, and stored as flat arrays:
+# - edges: the (E,2) unique edges, with the smaller index first
+# - face_edges: the (F,3) index of the edge along each side of a face,
+#   side k of a face running from corner k to corner k+1
+# - edge_face_count: the (E,) number of faces using each edge
+# - edge_faces: the (E,2) faces on each side of an edge, -1 if none
+# - vertex_face_offsets, vertex_faces: the faces around each vertex in
+#   compressed sparse row (CSR) form, the faces of vertex v being
+#   vertex_faces[vertex_face_offsets[v]:vertex_face_offsets[v+1]]
+# - vertex_offsets, vertex_neighbors: the one-ring of each vertex in
+#   the same CSR form
+# It provides:
+# - The faces around a vertex (faces_of)
+# - The one-ring of a vertex (one_ring)
+# - The number of edges at each vertex (valence)
+# - The edges used by a single face (boundary_edges)
+# - The closed loops of boundary vertices (boundary_loops)
+class Topology:
+  """Array based connectivity index of a triangle mesh"""
+
+  # Topology constructor
+  # --------------------
+  # Takes the (F,3) face array and the number of vertices.
+  def __init__(self, faces, num_vertices):
+    """Constructor for the Topology class"""
+    F = np.asarray(faces, dtype=np.int64).reshape(-1,3)
+    n = int(num_vertices)
+    self.faces = F
+    self.num_vertices = n
+    # Unique edges from one sort of the sides of the faces
+    sides = F[:,[0,1,1,2,2,0]].reshape(-1,2)
+    key = np.minimum(sides[:,0], sides[:,1])*n+np.maximum(sides[:,0], sides[:,1])
+    order = np.argsort(key)
+    key = key[order]
+    new = np.empty(len(key), dtype=bool)
+    new[:1] = True
+    np.not_equal(key[1:], key[:-1], out=new[1:])
+    starts = np.flatnonzero(new)
+    counts = np.diff(np.append(starts, len(key)))
+    key = key[starts]
+    self.edges = np.stack([key//n, key%n], axis=1)
+    self.face_edges = np.empty(len(order), dtype=np.int64)
+    self.face_edges[order] = np.cumsum(new)-1
+    self.face_edges = self.face_edges.reshape(-1,3)
+    self.edge_face_count = counts
+    # The first two faces along each edge
+    self.edge_faces = np.full((len(key),2), -1, dtype=np.int64)
+    self.edge_faces[:,0] = order[starts]//3
+    shared = counts > 1
+    self.edge_faces[shared,1] = order[starts[shared]+1]//3
+
+  # Vertex adjacency
+  # ----------------
+  # The CSR arrays of the faces around each vertex and of the one-ring
+  # of each vertex are only built when they are first used.
+  @property
+  def vertex_face_offsets(self):
+    if not hasattr(self, '_vertex_face_offsets'):
+      corners = self.faces.ravel()
+      self._vertex_face_offsets = self.calc_offsets(corners, self.num_vertices)
+      self._vertex_faces = np.argsort(corners, kind='stable')//3
+    return( self._vertex_face_offsets)
+
+  @property
+  def vertex_faces(self):
+    self.vertex_face_offsets
+    return( self._vertex_faces)
+
+  @property
+  def vertex_offsets(self):
+    if not hasattr(self, '_vertex_offsets'):
+      src = np.concatenate([self.edges[:,0], self.edges[:,1]])
+      dst = np.concatenate([self.edges[:,1], self.edges[:,0]])
+      self._vertex_offsets = self.calc_offsets(src, self.num_vertices)
+      self._vertex_neighbors = dst[np.argsort(src, kind='stable')]
+    return( self._vertex_offsets)
+
+  @property
+  def vertex_neighbors(self):
+    self.vertex_offsets
+    return( self._vertex_neighbors)
+
+  @staticmethod
+  def calc_offsets(index, n):
+    """Returns the CSR offsets of the sorted index array"""
+    offsets = np.zeros(n+1, dtype=np.int64)
+    np.cumsum(np.bincount(index, minlength=n), out=offsets[1:])
+    return( offsets)
+
+  def faces_of(self, vertex):
+    """Returns the indices of the faces around a vertex"""
+    o = self.vertex_face_offsets
+    return( self.vertex_faces[o[vertex]:o[vertex+1]])
+
+  def one_ring(self, vertex):
+    """Returns the indices of the vertices sharing an edge with a vertex"""
+    o = self.vertex_offsets
+    return( self.vertex_neighbors[o[vertex]:o[vertex+1]])
+
+  def valence(self):
+    """Returns the number of edges at each vertex"""
+    return( np.diff(self.vertex_offsets))
+
+  # boundary_edges method
+  # ---------------------
+  # Returns the (B,2) edges used by only one face, each in the
+  # direction it runs around its face.
+  def boundary_edges(self):
+    """Returns the directed boundary edges"""
+    side = np.flatnonzero(self.edge_face_count[self.face_edges.ravel()] == 1)
+    F = self.faces
+    return( np.stack([F.ravel()[side], F[:,[1,2,0]].ravel()[side]], axis=1))
+
+  # boundary_loops method
+  # ---------------------
+  # Returns a list of arrays of vertex indices, one for each closed
+  # loop of boundary edges, following the direction of the faces. A
+  # vertex where two loops touch is followed along one of them.
+  def boundary_loops(self):
+    """Returns the loops of boundary vertices"""
+    be = self.boundary_edges()
+    following = np.full(self.num_vertices, -1, dtype=np.int64)
+    following[be[:,0]] = be[:,1]
+    seen = np.zeros(self.num_vertices, dtype=bool)
+    loops = []
+    for start in be[:,0]:
+      if seen[start]:
+        continue
+      loop = []
+      v = start
+      while v >= 0 and not seen[v]:
+        seen[v] = True
+        loop.append(v)
+        v = following[v]
+      loops.append( np.array(loop, dtype=np.int64))
+    return( loops)
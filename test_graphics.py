@@ -0,0 +1,61 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+from graphics import *
+from transforms.translate import Translate
+from transforms.rotate import RotateZ
+from utils.color import RGBA
+
+import unittest
+import numpy as np
+
+class TestGraphicsArray(unittest.TestCase):
+
+	# Test that the bulk constructor gives the matrices of the recipe,
+	# and the centers of the items moved one at a time
+	def test_from_arrays(self):
+		rng = np.random.RandomState(0)
+		centers = rng.uniform(-2, 2, (6,3))
+		angles = rng.uniform(-np.pi, np.pi, 6)
+		vecs = rng.uniform(-2, 2, (6,3))
+		recipe = [(RotateZ, {'angles': angles}), (Translate, {'vecs': vecs})]
+		objs = GraphicsObj.from_arrays(centers, recipe, color=RGBA(1,0,0,1))
+		self.assertIsInstance(objs, GraphicsArray)
+		self.assertEqual(len(objs), 6)
+		self.assertEqual(objs.trans_mats.dtype, np.float32)
+		self.assertTrue(np.allclose(objs.trans_mats, batch_trans_mats(recipe, centers)[0], atol=1e-6))
+		for k in range(6):
+			m = Translate(vecs[k]).get_mat(None)*RotateZ(angles[k], origin=centers[k]).get_mat(None)
+			self.assertTrue(np.allclose(objs.calc_world_centers()[k], (m*Vec3(centers[k])).array, atol=1e-5))
+		self.assertTrue(np.allclose(objs.center_of_mass().array, (centers+vecs).mean(axis=0), atol=1e-5))
+		self.assertTrue(np.all(objs.color.array == [1,0,0,1]))
+
+	# Test that items that are not moved do not store matrices
+	def test_GraphicsArray(self):
+		centers = [[0,0,0],[2,0,0],[0,4,0]]
+		objs = GraphicsArray(centers)
+		self.assertIsNone(objs.trans_mats)
+		self.assertIs(objs.calc_world_centers(), objs.centers)
+		self.assertTrue(np.allclose(objs.center_of_mass().array, [2./3,4./3,0]))
+		with self.assertRaises(AttributeError):
+			GraphicsArray(centers, np.zeros((2,3,4)))
+
+	# Test that an array can be placed in a scene graph, measured and
+	# drawn as points at the item centers
+	def test_to_renderable(self):
+		rng = np.random.RandomState(1)
+		centers = rng.uniform(-2, 2, (6,3))
+		objs = GraphicsObj.from_arrays(centers, [(Translate, {'vecs': [1,0,0]})], point_size=3)
+		scene = GraphicsObj(objs, transforms=[Transform(Translate((0,0,2)))])
+		rend = scene.get_renderable()
+		vertices = rend.pack_buffers()
+		self.assertTrue(np.allclose(vertices, centers+[1,0,2], atol=1e-6))
+		points = rend.obj_list[0].obj_list[0]
+		self.assertEqual(points.point_size, 3)
+		self.assertTrue(np.allclose(scene.calc_center(10.).array, centers.mean(axis=0)+[1,0,2], atol=1e-5))
+		self.assertAlmostEqual(scene.calc_area(10.), points.calc_area(10.))
+		self.assertGreater(scene.calc_area(10.), 0)
+		self.assertEqual(len(objs.obj_list), 0)
+
+if __name__ == '__main__':
+	unittest.main()
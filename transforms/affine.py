@@ -0,0 +1,35 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+import numpy as np
+from ..utils.matrix import Mat3x4
+from .transform import BaseTransform
+
+# Affine class
+# ------------
+# A transform given directly by its Mat3x4, used when only the matrix
+# of a chain of transforms is known, as for objects read from a file.
+# The matrix is only given the kind 'identity' or 'translation' if it
+# is exactly one.
+class Affine(BaseTransform):
+
+  def __init__(self, mat):
+    self.mat = Mat3x4(np.asarray(mat, dtype=np.float32).reshape(3,4))
+    if self.mat.is_identity(atol=0.):
+      self.mat.kind = 'identity'
+    elif self.mat.is_translation(atol=0.):
+      self.mat.kind = 'translation'
+
+  def get_mat(self, obj=None):
+    return( self.mat)
+
+  def fuse(self, other):
+    if isinstance(other, Affine):
+      return( Affine((other.mat*self.mat).array))
+    return( None)
+
+  def is_identity(self):
+    return( self.mat.kind == 'identity')
+
+  def is_translation(self):
+    return( self.mat.kind != 'affine')
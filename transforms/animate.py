@@ -0,0 +1,245 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+import numpy as np
+from ..utils.vector import Vec3
+from ..utils.matrix import Mat3x4
+from ..utils.quaternion import (quat_normalize, quat_align, quat_slerp,
+                                quat_from_axis_angle, quat_to_rotation)
+from .transform import BaseTransform, about_origin
+from .translate import Translate
+from .scale import ScaleXYZ
+from .shear import ShearX, ShearY, ShearZ
+from .rotate import RotateX, RotateY, RotateZ
+
+__all__ = ['Track',
+           'AnimatedTranslate',
+           'AnimatedScaleXYZ',
+           'AnimatedShearX', 'AnimatedShearY', 'AnimatedShearZ',
+           'AnimatedRotateX', 'AnimatedRotateY', 'AnimatedRotateZ',
+           'AnimatedRotateAA']
+
+#####################################################################
+# Track class
+# ===========
+# A keyframe track holds a sorted array of key times and an array
+# with one row of values for each key time. It can be evaluated at a
+# whole array of times at once. The supported interpolations are:
+# - 'step': hold the value of the last key
+# - 'linear': straight line between the keys
+# - 'cubic': cubic Hermite spline with Catmull-Rom tangents
+# - 'slerp': spherical linear interpolation of unit quaternions
+# Times before the first key or after the last key are clamped.
+class Track:
+  """Keyframe track that evaluates a whole array of times at once"""
+
+  interpolations = ('step', 'linear', 'cubic', 'slerp')
+
+  # Track constructor
+  # -----------------
+  # This constructor takes 2 positional arguments and a keyword:
+  # - times: a sequence of K increasing key times
+  # - values: a sequence of K values, each a number or a sequence
+  # - interpolation: one of the names in Track.interpolations
+  def __init__(self, times, values, interpolation='linear'):
+    """Constructor for the Track class"""
+    self.times = np.asarray(times, dtype=np.float64).flatten()
+    values = np.asarray(values, dtype=np.float64)
+    if len(self.times) == 0 or values.size % len(self.times) != 0:
+      raise AttributeError("Track.__init__ takes one value for each key time")
+    self.values = values.reshape(len(self.times), -1)
+    if np.any(np.diff(self.times) <= 0):
+      raise ValueError("Track key times must be strictly increasing")
+    if interpolation not in self.interpolations:
+      raise ValueError("Track interpolation must be one of {}".format(self.interpolations))
+    self.interpolation = interpolation
+    if interpolation == 'slerp':
+      if self.values.shape[1] != 4:
+        raise AttributeError("Track with 'slerp' interpolation takes quaternion values")
+      self.values = quat_align(quat_normalize(self.values))
+    elif interpolation == 'cubic':
+      self.tangents = self.calc_tangents()
+
+  # calc_tangents method
+  # --------------------
+  # The Catmull-Rom tangent at each key is the slope between its two
+  # neighbours, or the one-sided slope at the first and last key.
+  def calc_tangents(self):
+    """Returns the tangents of the cubic spline at each key"""
+    t = self.times
+    p = self.values
+    m = np.zeros_like(p)
+    if len(t) > 1:
+      m[0] = (p[1]-p[0])/(t[1]-t[0])
+      m[-1] = (p[-1]-p[-2])/(t[-1]-t[-2])
+      m[1:-1] = (p[2:]-p[:-2])/(t[2:]-t[:-2])[:,np.newaxis]
+    return( m)
+
+  # evaluate method
+  # ---------------
+  # Returns a (T,D) array of the track values at an array of T times.
+  # The key segment of every time is found with one searchsorted, and
+  # the interpolation is done with array arithmetic.
+  def evaluate(self, times):
+    """Returns the values of the track at an array of times"""
+    times = np.atleast_1d(np.asarray(times, dtype=np.float64))
+    if len(self.times) == 1:
+      return( np.repeat(self.values, len(times), axis=0))
+    k = np.searchsorted(self.times, times, side='right')-1
+    k = np.clip(k, 0, len(self.times)-2)
+    t0 = self.times[k]
+    dt = self.times[k+1]-t0
+    u = np.clip((times-t0)/dt, 0., 1.)[:,np.newaxis]
+    p0 = self.values[k]
+    p1 = self.values[k+1]
+    if self.interpolation == 'step':
+      return( np.where(u >= 1., p1, p0))
+    elif self.interpolation == 'linear':
+      return( p0+u*(p1-p0))
+    elif self.interpolation == 'cubic':
+      u2 = u*u
+      u3 = u2*u
+      h00 = 2*u3-3*u2+1
+      h10 = u3-2*u2+u
+      h01 = -2*u3+3*u2
+      h11 = u3-u2
+      dt = dt[:,np.newaxis]
+      return( h00*p0+h10*dt*self.tangents[k]+h01*p1+h11*dt*self.tangents[k+1])
+    else:
+      return( quat_slerp(p0, p1, u[:,0]))
+
+
+#####################################################################
+# Animated transform classes
+# ==========================
+# The animated transforms are the time dependent versions of the
+# static transforms. Their parameters are keyframe tracks, and they
+# provide:
+# - A (T,3,4) stack of matrices for an array of times (get_mats)
+# - A single Mat3x4 for one time (get_mat)
+# Transforms about an origin use the center of mass of the object when
+# no origin is given, just like the static transforms.
+class AnimatedTransform(BaseTransform):
+  """Base class for transforms with keyframed parameters"""
+
+  def get_origin(self, obj):
+    """Returns the origin of the transform"""
+    if self.origin is None:
+      return( np.asarray(obj.center_of_mass().array, dtype=np.float64))
+    else:
+      return( np.asarray(self.origin.array, dtype=np.float64))
+
+  # Animated transforms change with time, so Transform.optimize never
+  # fuses them or folds them into a cached matrix.
+  def is_constant(self):
+    return( False)
+
+  def get_mat(self, obj, time=0.):
+    """Returns the Mat3x4 at a single time"""
+    return( Mat3x4(self.get_mats(obj, [time])[0]))
+
+  @staticmethod
+  def make_origin(origin):
+    if origin is None:
+      return( None)
+    else:
+      return( Vec3(origin))
+
+
+class AnimatedTranslate(AnimatedTransform):
+  """Translation by a keyframed vector"""
+
+  def __init__(self, times, vecs, interpolation='linear'):
+    self.track = Track(times, vecs, interpolation)
+    if self.track.values.shape[1] != 3:
+      raise AttributeError("AnimatedTranslate.__init__ takes a vector for each key time")
+
+  def get_mats(self, obj, times):
+    """Returns a (T,3,4) array of matrices, one for each time"""
+    return( Translate.batch_mats(self.track.evaluate(times)))
+
+
+class AnimatedScaleXYZ(AnimatedTransform):
+  """Scaling by keyframed factors about an origin"""
+
+  def __init__(self, times, scales, origin=None, interpolation='linear'):
+    self.track = Track(times, scales, interpolation)
+    if self.track.values.shape[1] not in (1,3):
+      raise AttributeError("AnimatedScaleXYZ.__init__ takes 1 or 3 scale factors for each key time")
+    self.origin = self.make_origin(origin)
+
+  def get_mats(self, obj, times):
+    """Returns a (T,3,4) array of matrices, one for each time"""
+    v = self.track.evaluate(times)
+    v = np.broadcast_to(v, (len(v),3))
+    return( ScaleXYZ.batch_mats(v, self.get_origin(obj)))
+
+
+class AnimatedShear(AnimatedTransform):
+  """Base class for shears with keyframed factors about an origin"""
+
+  def __init__(self, times, shears, origin=None, interpolation='linear'):
+    self.track = Track(times, shears, interpolation)
+    if self.track.values.shape[1] != 2:
+      name = self.__class__.__name__
+      raise AttributeError("{}.__init__ takes 2 shear factors for each key time".format(name))
+    self.origin = self.make_origin(origin)
+
+  def get_mats(self, obj, times):
+    """Returns a (T,3,4) array of matrices, one for each time"""
+    v = self.track.evaluate(times)
+    return( self.shear_class.batch_mats(v, self.get_origin(obj)))
+
+class AnimatedShearX(AnimatedShear):
+  shear_class = ShearX
+
+class AnimatedShearY(AnimatedShear):
+  shear_class = ShearY
+
+class AnimatedShearZ(AnimatedShear):
+  shear_class = ShearZ
+
+
+class AnimatedRotate(AnimatedTransform):
+  """Base class for rotations about a coordinate axis by keyframed angles"""
+
+  def __init__(self, times, angles, origin=None, interpolation='linear'):
+    self.track = Track(times, angles, interpolation)
+    if self.track.values.shape[1] != 1:
+      name = self.__class__.__name__
+      raise AttributeError("{}.__init__ takes an angle for each key time".format(name))
+    self.origin = self.make_origin(origin)
+
+  def get_mats(self, obj, times):
+    """Returns a (T,3,4) array of matrices, one for each time"""
+    a = self.track.evaluate(times)[:,0]
+    return( self.rotate_class.batch_mats(a, self.get_origin(obj)))
+
+class AnimatedRotateX(AnimatedRotate):
+  rotate_class = RotateX
+
+class AnimatedRotateY(AnimatedRotate):
+  rotate_class = RotateY
+
+class AnimatedRotateZ(AnimatedRotate):
+  rotate_class = RotateZ
+
+
+class AnimatedRotateAA(AnimatedTransform):
+  """Rotation by keyframed angles about keyframed axes"""
+
+  # The key angles and axes are turned into unit quaternions, which are
+  # interpolated with slerp, or held with 'step'.
+  def __init__(self, times, angles, axes, origin=None, interpolation='slerp'):
+    if interpolation not in ('slerp', 'step'):
+      raise ValueError("AnimatedRotateAA interpolation must be 'slerp' or 'step'")
+    angles = np.asarray(angles, dtype=np.float64).flatten()
+    axes = np.broadcast_to(np.asarray(axes, dtype=np.float64), (len(angles),3))
+    q = quat_from_axis_angle(axes, angles)
+    self.track = Track(times, q, interpolation)
+    self.origin = self.make_origin(origin)
+
+  def get_mats(self, obj, times):
+    """Returns a (T,3,4) array of matrices, one for each time"""
+    q = self.track.evaluate(times)
+    return( about_origin(quat_to_rotation(q), self.get_origin(obj)))
@@ -4,84 +4,104 @@
 import numpy as np
 from ..utils.vector import Vec3
 from ..utils.matrix import Mat3x4
-from transform import BaseTransform
-from translate import translate
+from ..utils.quaternion import Quat, quat_from_axis_angle, quat_to_rotation
+from .transform import BaseTransform, about_origin
 
 class Rotate(BaseTransform):
 
+  has_origin = True
+
   def __init__(self, angle, origin=None):
     self.angle = float(angle)
-    if origin == None:
+    if origin is None:
       self.origin = None
     else:
       self.origin = Vec3(origin)
 
-class RotateX(Rotate):
+  # get_quat method
+  # ---------------
+  # The rotation as a unit quaternion, so that chains of rotations
+  # about the same origin can be composed without building matrices.
+  def get_quat(self):
+    return( Quat.from_axis_angle(self.axis, self.angle))
+
+  # fuse method
+  # -----------
+  # Two rotations about the same axis and origin add their angles. Two
+  # rotations about different axes but the same origin are fused into
+  # a single RotateAA through the product of their quaternions.
+  def fuse(self, other):
+    if not isinstance(other, Rotate) or not self.same_origin(other):
+      return( None)
+    if other.__class__ is self.__class__ and self.__class__ is not RotateAA:
+      return( self.__class__(self.angle+other.angle, self.origin))
+    axis, angle = (other.get_quat()*self.get_quat()).axis_angle()
+    return( RotateAA(angle, axis, self.origin))
 
+  def is_identity(self):
+    return( np.fabs(np.remainder(self.angle+np.pi, 2*np.pi)-np.pi) < 1.e-12)
+
+  # get_mat method
+  # --------------
+  # The rotation matrix about the origin, with the translation column
+  # computed directly as o - R*o.
   def get_mat(self, obj):
-    if self.origin == None:
-      o = obj.center_of_mass()
-    else:
-      o = self.origin
-    tr0 = Translate(-o).get_mat()
-    tr1 = Translate(o).get_mat()
-    a = self.angle
-    R = Mat3x4([1,0,0,0],
-             [0, np.cos(a), -np.sin(a), 0],
-           [0, np.sin(a), np.cos(a), 0])
-    return( tr1*R*tr0)
+    R = self.batch_linear(self.angle)
+    return( Mat3x4(about_origin(R, self.get_origin(obj).array)))
+
+  # batch_linear and batch_mats methods
+  # -----------------------------------
+  # The batched versions take an array of K angles and return a (K,3,3)
+  # stack of rotations, or a (K,3,4) stack of rotations about an array
+  # of K origins (or a single origin for all of them).
+  @classmethod
+  def batch_linear(cls, angles):
+    """Returns a stack of rotation matrices for an array of angles"""
+    angles = np.asarray(angles, dtype=np.float64)
+    c = np.cos(angles)
+    s = np.sin(angles)
+    k = cls.axis.index(1)
+    i, j = (k+1)%3, (k+2)%3
+    R = np.zeros(angles.shape+(3,3))
+    R[...,k,k] = 1.
+    R[...,i,i] = c
+    R[...,i,j] = -s
+    R[...,j,i] = s
+    R[...,j,j] = c
+    return( R)
+
+  @classmethod
+  def batch_mats(cls, angles, origins):
+    """Returns a stack of rotations about origins"""
+    return( about_origin(cls.batch_linear(angles), origins))
+
+class RotateX(Rotate):
+
+  axis = [1,0,0]
 
 class RotateY(Rotate):
 
-  def get_mat(self, obj):
-    if self.origin == None:
-      o = obj.center_of_mass()
-    else:
-      o = self.origin
-    tr0 = Translate(-o).get_mat()
-    tr1 = Translate(o).get_mat()
-    a = self.angle
-    R = Mat3x4([np.cos(a), 0, np.sin(a), 0],
-             [0,1,0,0],
-           [-np.sin(a), 0, np.cos(a), 0])
-    return( tr1*R*tr0)
+  axis = [0,1,0]
 
 class RotateZ(Rotate):
 
-  def get_mat(self, obj):
-    if self.origin == None:
-      o = obj.center_of_mass()
-    else:
-      o = self.origin
-    tr0 = Translate(-o).get_mat()
-    tr1 = Translate(o).get_mat()
-    a = self.angle
-    R = Mat3x4([np.cos(a), -np.sin(a), 0, 0],
-           [np.sin(a), np.cos(a), 0, 0],
-           [0, 0, 1, 0])
-    return( tr1*R*tr0)
+  axis = [0,0,1]
 
-class RotateAA(BaseTransform):
+class RotateAA(Rotate):
 
   def __init__(self, angle, axis, origin=None):
-    self.angle = float(angle)
     self.axis = Vec3(axis).unit()
-    if origin == None:
-      self.origin = None
-    else:
-      self.origin = origin
+    super(RotateAA, self).__init__(angle, origin)
 
   def get_mat(self, obj):
-    if self.origin == None:
-      o = obj.center_of_mass()
-    else:
-      o = self.origin
-    tr0 = Translate(-o).get_mat()
-    tr1 = Translate(o).get_mat()
-    ux, uy, uz = self.axis
-    s = np.sin(self.angle)
-    c = np.cos(self.angle)
-    R = Mat3x4([c+ux*ux*(1-c), ux*uy*(1-c)-uz*s, ux*uz*(1-c)+uy*s, 0],
-             [uy*ux*(1-c)+uz*s, c+uy*uy*(1-c), uy*uz*(1-c)-ux*s, 0],
-             [yz*uz*(1-c)-uy*s, uz*uy*(1-c)+ux*s, c+uz*uz*(1-c), 0])
-    return( tr1*R*tr0)
+    return( self.get_quat().to_mat(self.get_origin(obj)))
+
+  @classmethod
+  def batch_linear(cls, angles, axes):
+    """Returns a stack of rotation matrices for arrays of angles and axes"""
+    return( quat_to_rotation(quat_from_axis_angle(axes, angles)))
+
+  @classmethod
+  def batch_mats(cls, angles, axes, origins):
+    """Returns a stack of rotations about axes and origins"""
+    return( about_origin(cls.batch_linear(angles, axes), origins))
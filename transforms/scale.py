@@ -4,11 +4,12 @@
 import numpy as np
 from ..utils.vector import Vec3
 from ..utils.matrix import Mat3x4
-from transform import BaseTransform
-from translate import translate
+from .transform import BaseTransform, about_origin
 
 class ScaleXYZ(BaseTransform):
 
+  has_origin = True
+
   def __init__(self, *args, origin=None):
     v = np.array(args, dtype=np.float32).flatten()
     if len(v) == 1:
@@ -17,21 +18,57 @@ class ScaleXYZ(BaseTransform):
       self.scale_vec = Vec3(v)
     else:
       raise AttributeError("ScaleXYZ.__init__ takes an array with 1 or 3 elements")
-    if origin == None:
+    if origin is None:
       self.origin = None
     else:
       self.origin = Vec3(origin)
 
+  # get_mat method
+  # --------------
+  # The scaling matrix about the origin, with the translation column
+  # computed directly as o - S*o.
   def get_mat(self, obj):
-    if self.origin == None:
-      o = obj.center_of_mass()
+    S = self.batch_linear(self.scale_vec.array)
+    return( Mat3x4(about_origin(S, self.get_origin(obj).array)))
+
+  # fuse method
+  # -----------
+  # Two scalings about the same origin multiply their scale factors,
+  # so a scaling followed by its inverse becomes the identity.
+  def fuse(self, other):
+    if isinstance(other, ScaleXYZ) and self.same_origin(other):
+      v = self.scale_vec.array*other.scale_vec.array
+      return( ScaleXYZ(v, origin=self.origin))
+    return( None)
+
+  def is_identity(self):
+    return( np.allclose(self.scale_vec.array, 1., rtol=0., atol=1.e-7))
+
+  # batch_linear and batch_mats methods
+  # -----------------------------------
+  # The batched versions take either a (K,3) array of scale factors as
+  # scales, or a (K,) array of uniform scale factors as uniform, and
+  # return a (K,3,3) stack of scalings, or a (K,3,4) stack of scalings
+  # about an array of origins.
+  @classmethod
+  def batch_linear(cls, scales=None, uniform=None):
+    """Returns a stack of scaling matrices for an array of scales"""
+    if (scales is None) == (uniform is None):
+      raise AttributeError("ScaleXYZ.batch_linear takes either scales or uniform")
+    if scales is None:
+      v = np.asarray(uniform, dtype=np.float64)
+      v = np.repeat(v[...,np.newaxis], 3, axis=-1)
     else:
-      o = self.origin
-    tr0 = Translate(-o).get_mat()
-    tr1 = Translate(o).get_mat()
-    v = self.scale_vec
-    S = Mat3x4([[v[0],0,0,0],
-              [0,v[1],0,0],
-              [0,0,v[2],0]])
-    return( tr1*S*tr0)    
-    
\ No newline at end of file
+      v = np.asarray(scales, dtype=np.float64)
+      if v.ndim == 0 or v.shape[-1] != 3:
+        raise AttributeError("ScaleXYZ.batch_linear takes scales with 3 factors each")
+    S = np.zeros(v.shape+(3,))
+    S[...,0,0] = v[...,0]
+    S[...,1,1] = v[...,1]
+    S[...,2,2] = v[...,2]
+    return( S)
+
+  @classmethod
+  def batch_mats(cls, scales=None, origins=None, uniform=None):
+    """Returns a stack of scalings about origins"""
+    return( about_origin(cls.batch_linear(scales, uniform), origins))
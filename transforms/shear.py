@@ -4,66 +4,80 @@
 import numpy as np
 from ..utils.vector import Vec3
 from ..utils.matrix import Mat3x4
-from transform import BaseTransform
-from translate import translate
+from .transform import BaseTransform, about_origin
 
 class Shear(BaseTransform):
 
+  has_origin = True
+
   def __init__(self, *args, origin=None):
     v = np.array(args, dtype=np.float32).flatten()
     if len(v) == 2: 
       self.shear_vec = v
     else:
-      raise AttributeError("ShearZ.__init__ takes an array with 2 elements")
-    if origin == None:
+      name = self.__class__.__name__
+      raise AttributeError("{}.__init__ takes an array with 2 elements".format(name))
+    if origin is None:
       self.origin = None
     else:
       self.origin = Vec3(origin)
 
+  # get_mat method
+  # --------------
+  # The shear matrix about the origin, with the translation column
+  # computed directly as o - Sh*o.
+  def get_mat(self, obj):
+    Sh = self.batch_linear(self.shear_vec)
+    return( Mat3x4(about_origin(Sh, self.get_origin(obj).array)))
+
+  # fuse method
+  # -----------
+  # Two shears of the same kind about the same origin add their shear
+  # factors.
+  def fuse(self, other):
+    if other.__class__ is self.__class__ and self.same_origin(other):
+      return( self.__class__(self.shear_vec+other.shear_vec, origin=self.origin))
+    return( None)
+
+  def is_identity(self):
+    return( not np.any(self.shear_vec))
+
+  # batch_linear and batch_mats methods
+  # -----------------------------------
+  # The batched versions take a (K,2) array of shear factors and return
+  # a (K,3,3) stack of shears, or a (K,3,4) stack of shears about an
+  # array of origins. Each subclass gives the (row, column) positions
+  # of its two shear factors.
+  @classmethod
+  def batch_linear(cls, shears):
+    """Returns a stack of shear matrices for an array of shear factors"""
+    v = np.asarray(shears, dtype=np.float64)
+    Sh = np.zeros(v.shape[:-1]+(3,3))
+    Sh[...,0,0] = Sh[...,1,1] = Sh[...,2,2] = 1.
+    (r0, c0), (r1, c1) = cls.positions
+    Sh[...,r0,c0] = v[...,0]
+    Sh[...,r1,c1] = v[...,1]
+    return( Sh)
+
+  @classmethod
+  def batch_mats(cls, shears, origins):
+    """Returns a stack of shears about origins"""
+    return( about_origin(cls.batch_linear(shears), origins))
+
+# ShearX moves y and z in proportion to x
+#   [[1,0,0],[my,1,0],[mz,0,1]]
 class ShearX(Shear):
 
-  def get_mat(self, obj):
-    if self.origin == None:
-      o = obj.center_of_mass()
-    else:
-      o = self.origin
-    tr0 = Translate(-o).get_mat()
-    tr1 = Translate(o).get_mat()
-    my = self.shear_vec[0]
-    mz = self.shear_vec[1]
-    Sh = Mat3x4([1,0,0,0],
-              [my,1,0,0],
-              [mz,0,1,0])
-    return( tr1*Sh*tr0)
+  positions = ((1,0), (2,0))
 
+# ShearY moves z and x in proportion to y
+#   [[1,mx,0],[0,1,0],[0,mz,1]]
 class ShearY(Shear):
 
-  def get_mat(self, obj):
-    if self.origin == None:
-      o = obj.center_of_mass()
-    else:
-      o = self.origin
-    tr0 = Translate(-o).get_mat()
-    tr1 = Translate(o).get_mat()
-    mz = self.shear_vec[0]
-    mx = self.shear_vec[1]
-    Sh = Mat3x4([1,mx,0,0],
-              [0,1,0,0],
-              [0,mz,1,0])
-    return( tr1*Sh*tr0)
+  positions = ((2,1), (0,1))
 
+# ShearZ moves x and y in proportion to z
+#   [[1,0,mx],[0,1,my],[0,0,1]]
 class ShearZ(Shear):
 
-  def get_mat(self, obj):
-    if self.origin == None:
-      o = obj.center_of_mass()
-    else:
-      o = self.origin
-    tr0 = Translate(-o).get_mat()
-    tr1 = Translate(o).get_mat()
-    mx = self.shear_vec[0]
-    my = self.shear_vec[1]
-    Sh = Mat3x4([1,0,mx,0],
-              [0,1,my,0],
-              [0,0,1,0])
-    return( tr1*Sh*tr0)
\ No newline at end of file
+  positions = ((0,2), (1,2))
@@ -0,0 +1,74 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+from animate import *
+from translate import Translate
+from scale import ScaleXYZ
+from shear import ShearX, ShearY, ShearZ
+from rotate import RotateX, RotateY, RotateZ, RotateAA
+
+import unittest
+import numpy as np
+
+origin = (1,-2,.5)
+
+class TestAnimate(unittest.TestCase):
+
+  # Compares the batched matrices of an animated transform with the
+  # static transforms made one time at a time
+  def assertMatsEqual(self, anim, times, static):
+    m = anim.get_mats(None, times)
+    self.assertEqual(m.shape, (len(times),3,4))
+    for k, t in enumerate(times):
+      self.assertTrue(np.allclose(m[k], static(t).get_mat(None).array, atol=1e-5))
+      self.assertTrue(np.allclose(anim.get_mat(None, t).array, m[k], atol=1e-5))
+
+  def test_Track(self):
+    track = Track([0,1,3], [[0,0],[2,4],[6,0]])
+    self.assertTrue(np.allclose(track.evaluate([-1,0,.5,2,3,4]), [[0,0],[0,0],[1,2],[4,2],[6,0],[6,0]]))
+    step = Track([0,1,3], [0,2,6], interpolation='step')
+    self.assertTrue(np.allclose(step.evaluate([0,.99,1,2.5,3])[:,0], [0,0,2,2,6]))
+    cubic = Track([0,1,2,3], [0,1,4,9], interpolation='cubic')
+    v = cubic.evaluate([0,1,2,3,1.5])[:,0]
+    self.assertTrue(np.allclose(v[:4], [0,1,4,9]))
+    self.assertTrue(1 < v[4] < 4)
+    self.assertTrue(np.allclose(Track([2], [5]).evaluate([0,1,2]), 5))
+    with self.assertRaises(ValueError):
+      Track([0,0], [1,2])
+    with self.assertRaises(ValueError):
+      Track([0,1], [1,2], interpolation='spline')
+    with self.assertRaises(AttributeError):
+      Track([0,1], [1,2,3])
+
+  def test_slerp(self):
+    q = [[1,0,0,0],[-np.cos(np.pi/4),0,0,-np.sin(np.pi/4)]]
+    v = Track([0,1], q, interpolation='slerp').evaluate([0,.5,1])
+    self.assertTrue(np.allclose(np.linalg.norm(v, axis=1), 1))
+    self.assertTrue(np.allclose(np.abs(v[1]), [np.cos(np.pi/8),0,0,np.sin(np.pi/8)]))
+
+  def test_AnimatedTranslate(self):
+    anim = AnimatedTranslate([0,2], [[0,0,0],[2,4,-2]])
+    self.assertMatsEqual(anim, [0,.5,2], lambda t: Translate((t,2*t,-t)))
+
+  # Test that a uniform scale track evaluated at 3 times gives three
+  # matrices
+  def test_AnimatedScaleXYZ(self):
+    anim = AnimatedScaleXYZ([0,1], [1,3], origin=origin)
+    self.assertMatsEqual(anim, [0,.5,1], lambda t: ScaleXYZ(1+2*t, origin=origin))
+    anim = AnimatedScaleXYZ([0,1], [[1,1,1],[2,3,4]], origin=origin)
+    self.assertMatsEqual(anim, [0,.25,1], lambda t: ScaleXYZ(1+t, 1+2*t, 1+3*t, origin=origin))
+
+  def test_AnimatedShear(self):
+    for anim_class, shear_class in [(AnimatedShearX, ShearX), (AnimatedShearY, ShearY), (AnimatedShearZ, ShearZ)]:
+      anim = anim_class([0,1], [[0,0],[1,-2]], origin=origin)
+      self.assertMatsEqual(anim, [0,.3,1], lambda t: shear_class(t, -2*t, origin=origin))
+
+  def test_AnimatedRotate(self):
+    for anim_class, rotate_class in [(AnimatedRotateX, RotateX), (AnimatedRotateY, RotateY), (AnimatedRotateZ, RotateZ)]:
+      anim = anim_class([0,1], [0,np.pi], origin=origin)
+      self.assertMatsEqual(anim, [0,.3,1], lambda t: rotate_class(np.pi*t, origin=origin))
+    anim = AnimatedRotateAA([0,1], [0,np.pi/2], (1,1,0), origin=origin)
+    self.assertMatsEqual(anim, [0,.4,1], lambda t: RotateAA(np.pi/2*t, (1,1,0), origin=origin))
+
+if __name__ == '__main__':
+  unittest.main()
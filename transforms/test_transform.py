@@ -0,0 +1,144 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+from transform import *
+from ..utils.vector import Vec3
+from ..utils.matrix import Mat3x4
+from translate import Translate
+from scale import ScaleXYZ
+from shear import ShearX, ShearY, ShearZ
+from rotate import RotateX, RotateY, RotateZ, RotateAA
+
+import unittest
+import numpy as np
+
+rng = np.random.RandomState(0)
+origins = rng.uniform(-2, 2, (5,3))
+
+class TestBatch(unittest.TestCase):
+
+  # Compares a (K,3,4) stack of batched matrices with the transforms
+  # built one object at a time
+  def assertMatsEqual(self, m, singles):
+    self.assertEqual(m.shape, (len(singles),3,4))
+    for k, single in enumerate(singles):
+      self.assertTrue(np.allclose(m[k], single.get_mat(None).array, atol=1e-5))
+
+  def test_Translate(self):
+    vecs = rng.uniform(-2, 2, (5,3))
+    self.assertMatsEqual(Translate.batch_mats(vecs), [Translate(v) for v in vecs])
+
+  def test_Rotate(self):
+    angles = rng.uniform(-np.pi, np.pi, 5)
+    for cls in (RotateX, RotateY, RotateZ):
+      self.assertMatsEqual(cls.batch_mats(angles, origins),
+                           [cls(a, origin=o) for a, o in zip(angles, origins)])
+      lin = cls.batch_linear(angles)
+      self.assertTrue(np.allclose(np.matmul(lin, np.swapaxes(lin, -1, -2)), np.eye(3), atol=1e-6))
+    axes = rng.normal(size=(5,3))
+    self.assertMatsEqual(RotateAA.batch_mats(angles, axes, origins),
+                         [RotateAA(a, x, origin=o) for a, x, o in zip(angles, axes, origins)])
+
+  def test_Shear(self):
+    shears = rng.uniform(-1, 1, (5,2))
+    for cls in (ShearX, ShearY, ShearZ):
+      self.assertMatsEqual(cls.batch_mats(shears, origins),
+                           [cls(*v, origin=o) for v, o in zip(shears, origins)])
+
+  # Test that K=3 uniform scales give three matrices, the same as the
+  # ScaleXYZ objects built one at a time
+  def test_ScaleXYZ(self):
+    origins = np.array([[0,0,0],[1,2,3],[-1,0,1]], dtype=np.float64)
+    for kwargs, args in [({'uniform': [1,2,3]}, [(1,), (2,), (3,)]),
+                         ({'scales': [[1,2,3],[2,2,2],[.5,1,4]]}, [(1,2,3), (2,2,2), (.5,1,4)])]:
+      m = ScaleXYZ.batch_mats(origins=origins, **kwargs)
+      self.assertEqual(m.shape, (3,3,4))
+      for k in range(3):
+        single = ScaleXYZ(*args[k], origin=origins[k]).get_mat(None).array
+        self.assertTrue(np.allclose(m[k], single, atol=1e-6))
+    with self.assertRaises(AttributeError):
+      ScaleXYZ.batch_linear([1,2])
+
+  # Test that a recipe gives the same matrices and centers as building
+  # the chain of each object one transform at a time, each transform
+  # about the center moved by the ones before it
+  def test_batch_trans_mats(self):
+    centers = rng.uniform(-2, 2, (5,3))
+    angles = rng.uniform(-np.pi, np.pi, 5)
+    scales = rng.uniform(.5, 2, 5)
+    shears = rng.uniform(-1, 1, (5,2))
+    vecs = rng.uniform(-2, 2, (5,3))
+    recipe = [(RotateZ, {'angles': angles}),
+              (ScaleXYZ, {'uniform': scales}),
+              (ShearX, {'shears': shears, 'origins': origins}),
+              (Translate, {'vecs': vecs})]
+    mats, moved = batch_trans_mats(recipe, centers)
+    for k in range(5):
+      m = Mat3x4(1,0,0,0,0,1,0,0,0,0,1,0)
+      c = Vec3(centers[k])
+      for t in [RotateZ(angles[k], origin=c), ScaleXYZ(scales[k], origin=c),
+                ShearX(*shears[k], origin=origins[k]), Translate(vecs[k])]:
+        mt = t.get_mat(None)
+        m = mt*m
+        c = mt*c
+      self.assertTrue(np.allclose(mats[k], m.array, atol=1e-5))
+      self.assertTrue(np.allclose(moved[k], c.array, atol=1e-5))
+    mats, moved = batch_trans_mats([(RotateX, {'angles': np.pi/2})], centers)
+    self.assertEqual(mats.shape, (5,3,4))
+    self.assertTrue(np.allclose(moved, centers))
+
+# An object with a center of mass, for the transforms about the
+# center of mass
+class Body:
+  def center_of_mass(self):
+    return( Vec3(.5,1,-1))
+
+class TestOptimize(unittest.TestCase):
+
+  # Checks that the optimized chain gives the same matrix as the chain
+  # it was made from, and returns it
+  def optimize(self, trans, kind, length):
+    opt = trans.optimize()
+    self.assertEqual(opt.kind, kind)
+    self.assertEqual(len(opt.trans_list), length)
+    self.assertTrue(np.allclose(opt.get_mat(Body()).array, trans.get_mat(Body()).array, atol=1e-6))
+    return( opt)
+
+  def test_fuse(self):
+    o = (1,2,3)
+    opt = self.optimize(Transform(Translate((1,0,0)), Transform(Translate((0,2,0)), Translate((0,0,3)))), 'translation', 1)
+    self.assertTrue(np.allclose(opt.trans_list[0].vec.array, [1,2,3]))
+    opt = self.optimize(Transform(Transform(RotateZ(.5, origin=o)), RotateZ(.25, origin=o)), 'affine', 1)
+    self.assertAlmostEqual(opt.trans_list[0].angle, .75)
+    opt = self.optimize(Transform(RotateX(.5, origin=o), RotateY(.25, origin=o)), 'affine', 1)
+    self.assertIsInstance(opt.trans_list[0], RotateAA)
+    self.optimize(Transform(ShearX(1, 2, origin=o), ShearX(-1, 1, origin=o)), 'affine', 1)
+    self.optimize(Transform(ShearX(1, 2, origin=o), ShearY(-1, 1, origin=o)), 'affine', 2)
+    self.optimize(Transform(RotateZ(.5, origin=o), RotateZ(.5)), 'affine', 2)
+
+  def test_identity(self):
+    o = (1,2,3)
+    self.optimize(Transform(), 'identity', 0)
+    self.optimize(Transform(ScaleXYZ(2, origin=o), ScaleXYZ(.5, origin=o)), 'identity', 0)
+    self.optimize(Transform(*[RotateZ(np.pi/2)]*4), 'identity', 0)
+    self.optimize(Transform(Translate((1,0,0)), ShearZ(0,0), Translate((-1,0,0))), 'identity', 0)
+
+  # Test that constant chains are computed once, and that chains that
+  # only move points are found from their matrix
+  def test_const_mat(self):
+    opt = self.optimize(Transform(ScaleXYZ(2, origin=(1,0,0)), ScaleXYZ(.5, origin=(0,0,0))), 'translation', 2)
+    self.assertIsNotNone(opt.const_mat)
+    self.assertIs(opt.get_mat(None), opt.const_mat)
+    opt = self.optimize(Transform(Translate((1,0,0)), RotateZ(np.pi/3)), 'affine', 2)
+    self.assertIsNone(opt.const_mat)
+
+  # Test that the matrices carry the kind of the chain, and that a
+  # small translation is not taken for the identity
+  def test_mat_kind(self):
+    opt = self.optimize(Transform(Translate((1e-9,0,0))), 'translation', 1)
+    self.assertEqual(opt.get_mat(None).kind, 'translation')
+    self.assertEqual(Transform().get_mat(None).kind, 'identity')
+    self.assertEqual(Transform(Translate((1,0,0)), RotateZ(.5)).get_mat(Body()).kind, 'affine')
+
+if __name__ == '__main__':
+  unittest.main()
@@ -3,10 +3,55 @@
 
 import numpy as np
 from ..utils.vector import Vec3
-from ..utils.matrix import Mat3x4
+from ..utils.matrix import Mat3x4, affine_compose
+from ..utils.quaternion import Quat, quat_mul, quat_normalize
 
 class BaseTransform:
-	pass
+
+	# Transforms about an origin set this, so that the batched code
+	# knows to pass them an array of origins.
+	has_origin = False
+
+	# get_origin method
+	# -----------------
+	# The point a rotation, scale or shear is about, the center of mass
+	# of the object if no origin was given.
+	def get_origin(self, obj):
+		if self.origin is None:
+			return( obj.center_of_mass())
+		else:
+			return( self.origin)
+
+	# Simplification hooks
+	# --------------------
+	# Transform.optimize uses these to simplify a chain of transforms.
+	# - fuse: a single transform equal to this one followed by the next
+	#   one, or None if the two can not be fused
+	# - is_identity: true if the transform does nothing
+	# - is_translation: true if the transform only moves points
+	# - is_constant: true if the matrix does not depend on the object,
+	#   which is the case when it has no origin or an explicit origin
+	def fuse(self, other):
+		return( None)
+
+	def is_identity(self):
+		return( False)
+
+	def is_translation(self):
+		return( self.is_identity())
+
+	def is_constant(self):
+		return( getattr(self, 'origin', None) is not None or not hasattr(self, 'origin'))
+
+	# same_origin method
+	# ------------------
+	# Two transforms about an origin can only be fused if they are
+	# about the same point, either both the center of mass of the
+	# object or the same explicit point.
+	def same_origin(self, other):
+		if self.origin is None or other.origin is None:
+			return( self.origin is None and other.origin is None)
+		return( self.origin == other.origin)
 
 class Transform(BaseTransform):
 
@@ -17,9 +62,172 @@ class Transform(BaseTransform):
 				self.trans_list.append(trans)
 			else:
 				raise AttributeError("Transform.__init__ takes an array of BaseTransforms")
+		self.const_mat = None
+		self.kind = 'affine'
+
+	def is_identity(self):
+		return( all(trans.is_identity() for trans in self.trans_list))
+
+	def is_constant(self):
+		return( all(trans.is_constant() for trans in self.trans_list))
 
+	# flatten method
+	# --------------
+	# Returns the list of transforms with any nested Transform chains
+	# spliced in.
+	def flatten(self):
+		"""Returns a flat list of the transforms in the chain"""
+		flat = []
+		for trans in self.trans_list:
+			if isinstance(trans, Transform):
+				flat += trans.flatten()
+			else:
+				flat.append(trans)
+		return( flat)
+
+	# optimize method
+	# ---------------
+	# Returns a simplified chain that gives the same matrix:
+	# - nested chains are flattened
+	# - transforms that do nothing are dropped
+	# - neighbouring transforms are fused when they can be, for example
+	#   two translations, two rotations about the same origin, or a
+	#   scaling followed by its inverse; a fused result can then fuse
+	#   with the transform before it
+	# If nothing in the chain depends on the object, the matrix is
+	# computed once and cached. The kind of the result, 'identity',
+	# 'translation' or 'affine', is carried by the matrices it returns,
+	# so code applying them to many vectors can take a cheaper path. A
+	# cached matrix is only given a more special kind if it is exactly
+	# the identity or a translation.
+	def optimize(self):
+		"""Returns a simplified and possibly precomputed chain"""
+		steps = []
+		for trans in self.flatten():
+			while steps and trans is not None:
+				fused = steps[-1].fuse(trans)
+				if fused is None:
+					break
+				steps.pop()
+				trans = fused
+			if trans is not None and not trans.is_identity():
+				steps.append(trans)
+		opt = Transform(*steps)
+		if not steps:
+			opt.kind = 'identity'
+		elif all(trans.is_translation() for trans in steps):
+			opt.kind = 'translation'
+		if opt.is_constant():
+			opt.const_mat = opt.get_mat(None)
+			if opt.const_mat.is_identity(atol=0.):
+				opt.kind = 'identity'
+			elif opt.const_mat.is_translation(atol=0.):
+				opt.kind = 'translation'
+			opt.const_mat.kind = opt.kind
+		return( opt)
+
+	# get_mat method
+	# --------------
+	# Multiplies through the list of transforms. Runs of rotations about
+	# the same origin are composed as quaternions, and each run is only
+	# turned into a matrix once, after renormalizing, so long chains of
+	# rotations do not drift away from a pure rotation. The matrix gets
+	# the more special of the kind of the chain and the kind found by
+	# multiplying the matrices of the steps.
 	def get_mat(self, obj):
-		m = Mat3x4(1,0,0,0,0,1,0,0,0,0,1,0)
+		if self.const_mat is not None:
+			return( self.const_mat)
+		m = Mat3x4(1,0,0,0,0,1,0,0,0,0,1,0, kind='identity')
+		q = None
+		for trans in self.trans_list:
+			if hasattr(trans, 'get_quat'):
+				o = trans.get_origin(obj)
+				if q is not None and o == q_origin:
+					q = quat_mul(trans.get_quat().array.astype(np.float64), q)
+					continue
+				if q is not None:
+					m = Quat(quat_normalize(q)).to_mat(q_origin)*m
+				q = trans.get_quat().array.astype(np.float64)
+				q_origin = o
+			else:
+				if q is not None:
+					m = Quat(quat_normalize(q)).to_mat(q_origin)*m
+					q = None
+				m = trans.get_mat(obj)*m
+		if q is not None:
+			m = Quat(quat_normalize(q)).to_mat(q_origin)*m
+		m.kind = m.kinds[min(m.kinds.index(m.kind), m.kinds.index(self.kind))]
+		return( m)
+
+	# get_mats method
+	# ---------------
+	# Evaluates the transform at a whole array of times, returning a
+	# (T,3,4) stack of matrices. Animated transforms provide their own
+	# get_mats, static transforms are evaluated once and broadcast over
+	# all the times.
+	def get_mats(self, obj, times):
+		"""Returns a (T,3,4) array of matrices, one for each time"""
+		times = np.atleast_1d(np.asarray(times, dtype=np.float64))
+		m = np.broadcast_to(identity_stack(1), (len(times),3,4))
 		for trans in self.trans_list:
-			m = trans.get_mat(obj)*m
-		return( m)
\ No newline at end of file
+			if hasattr(trans, 'get_mats'):
+				mt = trans.get_mats(obj, times)
+			else:
+				mt = trans.get_mat(obj).array[np.newaxis]
+			m = affine_compose(mt, m)
+		return( np.array(m))
+
+
+# identity_stack function
+# -----------------------
+# Returns a (n,3,4) array of identity affine matrices.
+def identity_stack(n):
+	"""Returns n identity affine matrices"""
+	m = np.zeros((n,3,4))
+	m[:,0,0] = m[:,1,1] = m[:,2,2] = 1.
+	return( m)
+
+# about_origin function
+# ---------------------
+# Turns a (...,3,3) stack of linear maps into a (...,3,4) stack of
+# affine maps that leave the origin points fixed. The translation
+# column is o - M*o, which is the same as translating by -o, applying
+# M, and translating back by o, without the two matrix products. The
+# linear maps and the (...,3) origins broadcast against each other.
+def about_origin(lin, origin):
+	"""Returns the affine matrices of linear maps about origins"""
+	lin = np.asarray(lin, dtype=np.float64)
+	o = np.asarray(origin, dtype=np.float64)
+	m = np.empty(np.broadcast_shapes(lin.shape[:-2], o.shape[:-1])+(3,4))
+	m[...,:,:3] = lin
+	m[...,:,3] = o-np.matmul(lin, o[...,np.newaxis])[...,0]
+	return( m)
+
+# batch_trans_mats function
+# -------------------------
+# Computes the transform matrices of many objects at once from a
+# recipe, a list of (transform class, parameters) pairs applied in
+# order. The parameters are a dictionary of arrays with one entry per
+# object (or a single value shared by all of them), using the argument
+# names of the batch_mats class methods:
+#
+# >>> recipe = [(RotateZ, {'angles': angles}),
+# ...           (Translate, {'vecs': offsets})]
+# >>> mats, centers = batch_trans_mats(recipe, centers)
+#
+# A transform about an origin without an 'origins' entry uses the
+# center of mass of each object, moved by the transforms before it,
+# just like the objects built one at a time. Returns the (K,3,4)
+# matrices and the (K,3) transformed centers.
+def batch_trans_mats(recipe, centers):
+	"""Returns the matrices and centers for a recipe of batched transforms"""
+	centers = np.array(centers, dtype=np.float64).reshape(-1,3)
+	m = identity_stack(len(centers))
+	for cls, params in recipe:
+		params = dict(params)
+		if cls.has_origin and 'origins' not in params:
+			params['origins'] = centers
+		mt = np.broadcast_to(cls.batch_mats(**params), m.shape)
+		m = affine_compose(mt, m)
+		centers = np.matmul(mt[...,:,:3], centers[...,np.newaxis])[...,0] + mt[...,:,3]
+	return( m, centers)
@@ -4,16 +4,40 @@
 import numpy as np
 from ..utils.vector import Vec3
 from ..utils.matrix import Mat3x4
-from transform import BaseTransform
+from .transform import BaseTransform
 
 class Translate(BaseTransform):
 
   def __init__(self, vec):
     self.vec = Vec3(vec)
 
-  def mat(self, obj=None):
+  def get_mat(self, obj=None):
     T = Mat3x4(1,0,0,self.vec[0],
              0,1,0,self.vec[1],
-             0,0,1,self.vec[2])
+             0,0,1,self.vec[2],
+             kind='translation' if np.any(self.vec.array) else 'identity')
     return( T)
 
+  def fuse(self, other):
+    if isinstance(other, Translate):
+      return( Translate(self.vec+other.vec))
+    return( None)
+
+  def is_identity(self):
+    return( not np.any(self.vec.array))
+
+  def is_translation(self):
+    return( True)
+
+  # batch_mats method
+  # -----------------
+  # Returns a (K,3,4) stack of translations for a (K,3) array of
+  # vectors.
+  @classmethod
+  def batch_mats(cls, vecs):
+    """Returns a stack of translations for an array of vectors"""
+    v = np.asarray(vecs, dtype=np.float64)
+    m = np.zeros(v.shape[:-1]+(3,4))
+    m[...,0,0] = m[...,1,1] = m[...,2,2] = 1.
+    m[...,:,3] = v
+    return( m)
@@ -4,9 +4,10 @@
 import numpy as np
 import numbers
 
-from vector import BaseVec, FloatVec
+from vector import BaseVec, FloatVec, storage_dtype
 
-__all__ = ['Mat2x2','Mat3x3','Mat4x4','Mat2x3','Mat3x4']
+__all__ = ['Mat2x2','Mat3x3','Mat4x4','Mat2x3','Mat3x4',
+		   'affine_compose','affine_inv']
 
 ###############################################################
 # GenMat class
@@ -19,13 +20,16 @@ __all__ = ['Mat2x2','Mat3x3','Mat4x4','Mat2x3','Mat3x4']
 class GenMat(BaseVec):
 	"""General matrix base class for SquareMat and AffineMat"""
 
+	# The type the elements are stored as
+	dtype = storage_dtype
+
 	# __init__ method
 	# ---------------
 	# It calls the BaseVec's constructor, then reshapes the array to
 	# a two-dimensional array.
 	def __init__(self, nrows, ncolumns, *args):
 		"""Constructor of the GenMat class"""
-		super(GenMat, self).__init__(np.float32, nrows*ncolumns, *args)
+		super(GenMat, self).__init__(self.dtype, nrows*ncolumns, *args)
 		self.array = self.array.reshape(nrows, ncolumns)
 
 	# __repr__ method
@@ -229,32 +233,38 @@ class Mat4x4(SquareMat):
 class AffineMat(GenMat):
 	"""Affine matrix base class for Mat2x3 and Mat3x4"""
 
+	# The kinds of affine matrix, from the most to the least special.
+	kinds = ('identity', 'translation', 'affine')
+
 	# __init__ method
 	# ---------------
-	# Calls the parents init with n, and n+1
-	def __init__(self, n, *args):
+	# Calls the parents init with n, and n+1. The kind says what the
+	# matrix is known to do: 'identity', 'translation' or a general
+	# 'affine' map. It is only a promise made by whoever built the
+	# matrix, it is not checked against the entries.
+	def __init__(self, n, *args, kind='affine'):
 		"""Constructor of the AffineMat class"""
 		super(AffineMat, self).__init__(n,n+1,*args)
+		if kind not in self.kinds:
+			raise ValueError("AffineMat kind must be one of {}".format(self.kinds))
+		self.kind = kind
 
 	# dot method
 	# ----------
 	# Affine transformation can be though as a combination of a matrix
 	# transformation and a displacement. This simply defines how an affine
 	# transformation is applied to a vector, or how multiple transformations
-	# are combined.
+	# are combined. Both are done in closed form on the matrix and
+	# displacement parts, without padding to a square matrix.
 	def dot(self, other):
 		"""Dot product for matrix-matrix and matrix-vector"""
 		n = len(self)
-		if isinstance(other, FloatVec) and len(self) == n:
-			v = np.append( other.array, 1.)
-			new_v = np.dot( self.array, v.reshape(n+1,1))
+		if isinstance(other, FloatVec) and len(other) == n:
+			new_v = np.dot( self.array[:,:n], other.array) + self.array[:,n]
 			return( other.__class__(new_v))
 		elif isinstance(other, self.__class__):
-			bv = [0]*n+[1]
-			ml = np.append( self.array, [bv], axis=0)
-			mr = np.append( other.array, [bv], axis=0)
-			new_m = np.resize(np.dot( ml, mr),(n,n+1))
-			return( self.__class__(new_m))
+			kind = self.kinds[max(self.kinds.index(self.kind), self.kinds.index(other.kind))]
+			return( self.__class__(affine_compose( self.array, other.array), kind=kind))
 		else:
 			name = self.__class__.__name__
 			raise AttributeError("{}.dot take with an AffineMat or FloatVec".format(name))
@@ -264,16 +274,84 @@ class AffineMat(GenMat):
 	# Finds the inverse affine transformation.
 	def inv(self):
 		"""Inverse of the affine transform"""
+		return( self.__class__(affine_inv( self.array), kind=self.kind))
+
+	# is_identity and is_translation methods
+	# --------------------------------------
+	# Tests if the transformation does nothing, or only moves vectors
+	# without rotating, scaling or shearing them. Code that applies the
+	# matrix to many vectors can use these to skip the work, or to use
+	# an addition instead of a matrix product.
+	def is_identity(self, atol=1.e-7):
+		"""Tests if the matrix is the identity transformation"""
 		n = len(self.array)
-		A = self.array[:,0:n]
-		b = self.array[:,n]
-		if np.fabs(np.linalg.det(A)) > 1.e-10:
-			Ainv = np.linalg.inv(A)
-			binv = -np.dot( Ainv, b.reshape(n,1))
-			new_m = np.append( Ainv, binv, axis=1)
-			return( self.__class__(new_m))
-		else: 
-			raise ValueError("Can not take inverse of singular matrix")
+		return( np.allclose(self.array, np.eye(n, n+1), rtol=0., atol=atol))
+
+	def is_translation(self, atol=1.e-7):
+		"""Tests if the matrix is a pure translation"""
+		n = len(self.array)
+		return( np.allclose(self.array[:,:n], np.eye(n), rtol=0., atol=atol))
+
+
+# affine_compose function
+# -----------------------
+# Composes two stacks of (...,n,n+1) affine matrices, so that each
+# result applies the matrix from `b` first and then the one from `a`.
+# With a = [A|s] and b = [B|t] the product is [A*B | A*t+s], so no
+# [0,...,0,1] row is ever appended. The stacks broadcast against each
+# other like numpy arrays, so a single matrix can be composed with a
+# whole (K,n,n+1) stack.
+#
+# Example:
+# >>> a = np.zeros((100,3,4)); b = np.zeros((100,3,4))
+# >>> affine_compose(a, b).shape
+# (100, 3, 4)
+def affine_compose(a, b):
+	"""Returns the stack of products of affine matrices"""
+	a = np.asarray(a)
+	b = np.asarray(b)
+	n = a.shape[-2]
+	A = a[...,:,:n]
+	m = np.empty(np.broadcast_shapes(a.shape, b.shape), dtype=np.result_type(a, b))
+	m[...,:,:n] = np.matmul(A, b[...,:,:n])
+	m[...,:,n] = np.matmul(A, b[...,:,n,np.newaxis])[...,0] + a[...,:,n]
+	return( m)
+
+# affine_inv function
+# -------------------
+# Inverts a stack of (...,n,n+1) affine matrices. For [A|b] the
+# inverse is [A^-1 | -A^-1*b]. The 2x2 and 3x3 inverses are found in
+# closed form from the adjugate and the determinant, so a whole stack
+# is inverted with a few array operations. Raises an exception if any
+# of the matrices is singular.
+def affine_inv(m):
+	"""Returns the stack of inverses of affine matrices"""
+	m = np.asarray(m)
+	n = m.shape[-2]
+	A = m[...,:,:n]
+	if n == 3:
+		r0, r1, r2 = A[...,0,:], A[...,1,:], A[...,2,:]
+		adj = np.stack([np.cross(r1, r2), np.cross(r2, r0), np.cross(r0, r1)], axis=-1)
+		det = np.sum(r0*adj[...,:,0], axis=-1)
+	elif n == 2:
+		adj = np.empty(A.shape, dtype=A.dtype)
+		adj[...,0,0] = A[...,1,1]
+		adj[...,0,1] = -A[...,0,1]
+		adj[...,1,0] = -A[...,1,0]
+		adj[...,1,1] = A[...,0,0]
+		det = A[...,0,0]*A[...,1,1]-A[...,0,1]*A[...,1,0]
+	else:
+		det = np.linalg.det(A)
+	if np.any(np.fabs(det) <= 1.e-10):
+		raise ValueError("Can not take inverse of singular matrix")
+	if n in (2,3):
+		Ainv = adj/det[...,np.newaxis,np.newaxis]
+	else:
+		Ainv = np.linalg.inv(A)
+	inv = np.empty(m.shape, dtype=Ainv.dtype)
+	inv[...,:,:n] = Ainv
+	inv[...,:,n] = -np.matmul(Ainv, m[...,:,n,np.newaxis])[...,0]
+	return( inv)
 
 
 ##################################################################
@@ -289,9 +367,9 @@ class Mat2x3(AffineMat):
 	#
 	# Example:
 	# >>> m23 = Mat2x3([1,2,3,4,5,6])
-	def __init__(self, *args):
+	def __init__(self, *args, kind='affine'):
 		"""Constructor of the Mat2x3 class"""
-		super(Mat2x3, self).__init__(2, *args)
+		super(Mat2x3, self).__init__(2, *args, kind=kind)
 
 	# to_square method
 	# ----------------
@@ -315,9 +393,9 @@ class Mat3x4(AffineMat):
 	#
 	# Example:
 	# >>> m34 = Mat3x4([1]*12)
-	def __init__(self, *args):
+	def __init__(self, *args, kind='affine'):
 		"""Constructor of the Mat3x4 class"""
-		super(Mat3x4, self).__init__(3, *args)
+		super(Mat3x4, self).__init__(3, *args, kind=kind)
 
 	# to_square method
 	# ----------------
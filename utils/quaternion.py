@@ -0,0 +1,267 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+import numpy as np
+import numbers
+
+from vector import FloatVec, Vec3
+from matrix import AffineMat, SquareMat, Mat3x4
+
+__all__ = ['Quat',
+		   'quat_mul', 'quat_conj', 'quat_normalize', 'quat_align',
+		   'quat_slerp', 'quat_from_axis_angle', 'quat_to_rotation',
+		   'rotation_to_quat']
+
+#####################################################################
+# Batched quaternion functions
+# ============================
+# These work on (...,4) numpy arrays of quaternions stored as
+# (w,x,y,z), so a whole stack of rotations can be handled in a few
+# array operations. The Quat class below uses them for single
+# quaternions.
+
+# quat_mul function
+# -----------------
+# The Hamilton product of two stacks of quaternions. The product a*b
+# is the rotation b followed by the rotation a. The stacks broadcast
+# against each other like numpy arrays.
+def quat_mul(a, b):
+	"""Hamilton product of two arrays of quaternions"""
+	aw, ax, ay, az = a[...,0], a[...,1], a[...,2], a[...,3]
+	bw, bx, by, bz = b[...,0], b[...,1], b[...,2], b[...,3]
+	q = np.empty(np.broadcast_shapes(a.shape, b.shape))
+	q[...,0] = aw*bw-ax*bx-ay*by-az*bz
+	q[...,1] = aw*bx+ax*bw+ay*bz-az*by
+	q[...,2] = aw*by-ax*bz+ay*bw+az*bx
+	q[...,3] = aw*bz+ax*by-ay*bx+az*bw
+	return( q)
+
+def quat_conj(q):
+	"""Conjugate of an array of quaternions"""
+	c = np.array(q, dtype=np.float64)
+	c[...,1:] = -c[...,1:]
+	return( c)
+
+# quat_normalize function
+# -----------------------
+# Scales the quaternions back to unit length. Long chains of products
+# slowly drift away from unit length through round off, so the result
+# of a chain is renormalized once at the end.
+def quat_normalize(q):
+	"""Returns the quaternions scaled to unit length"""
+	n = np.linalg.norm(q, axis=-1)
+	if np.any(n == 0):
+		raise ValueError("Can not normalize the zero quaternion")
+	return( q/n[...,np.newaxis])
+
+# quat_align function
+# -------------------
+# A quaternion and its negative describe the same rotation, but slerp
+# between keys with a negative dot product takes the long way around.
+# Flipping the sign of each quaternion to match the previous one keeps
+# every step of a sequence on the short arc.
+def quat_align(q):
+	"""Returns the sequence of quaternions with signs on the shortest arcs"""
+	q = np.array(q, dtype=np.float64)
+	for i in range(1, len(q)):
+		if np.dot(q[i-1], q[i]) < 0:
+			q[i] = -q[i]
+	return( q)
+
+# quat_slerp function
+# -------------------
+# Spherical linear interpolation between two stacks of unit
+# quaternions at the parameters u. Falls back to linear interpolation
+# when the quaternions are almost equal.
+def quat_slerp(q0, q1, u):
+	"""Spherical linear interpolation between arrays of quaternions"""
+	u = np.asarray(u, dtype=np.float64)
+	d = np.clip(np.sum(q0*q1, axis=-1), -1., 1.)
+	theta = np.arccos(d)
+	s = np.sin(theta)
+	small = s < 1.e-6
+	s = np.where(small, 1., s)
+	w0 = np.where(small, 1.-u, np.sin((1.-u)*theta)/s)
+	w1 = np.where(small, u, np.sin(u*theta)/s)
+	return( quat_normalize(w0[...,np.newaxis]*q0+w1[...,np.newaxis]*q1))
+
+def quat_from_axis_angle(axes, angles):
+	"""Unit quaternions for rotations about arrays of axes by angles"""
+	axes = np.asarray(axes, dtype=np.float64)
+	axes = axes/np.linalg.norm(axes, axis=-1)[...,np.newaxis]
+	half = 0.5*np.asarray(angles, dtype=np.float64)
+	q = np.empty(np.broadcast_shapes(axes.shape[:-1], half.shape)+(4,))
+	q[...,0] = np.cos(half)
+	q[...,1:] = axes*np.sin(half)[...,np.newaxis]
+	return( q)
+
+# quat_to_rotation function
+# -------------------------
+# Returns the (...,3,3) rotation matrices of a stack of unit
+# quaternions.
+def quat_to_rotation(q):
+	"""Rotation matrices of an array of unit quaternions"""
+	w, x, y, z = q[...,0], q[...,1], q[...,2], q[...,3]
+	R = np.empty(q.shape[:-1]+(3,3))
+	R[...,0,0] = 1-2*(y*y+z*z)
+	R[...,0,1] = 2*(x*y-w*z)
+	R[...,0,2] = 2*(x*z+w*y)
+	R[...,1,0] = 2*(x*y+w*z)
+	R[...,1,1] = 1-2*(x*x+z*z)
+	R[...,1,2] = 2*(y*z-w*x)
+	R[...,2,0] = 2*(x*z-w*y)
+	R[...,2,1] = 2*(y*z+w*x)
+	R[...,2,2] = 1-2*(x*x+y*y)
+	return( R)
+
+# rotation_to_quat function
+# -------------------------
+# Returns the unit quaternions of a stack of (...,3,3) rotation
+# matrices. Each matrix uses the largest of the four diagonal
+# combinations as the pivot, which keeps the square root and the
+# division away from zero.
+def rotation_to_quat(R):
+	"""Unit quaternions of an array of rotation matrices"""
+	R = np.asarray(R, dtype=np.float64)
+	m00, m11, m22 = R[...,0,0], R[...,1,1], R[...,2,2]
+	pivots = np.stack([m00+m11+m22, m00-m11-m22, -m00+m11-m22, -m00-m11+m22], axis=-1)
+	k = np.argmax(pivots, axis=-1)
+	s = 2.*np.sqrt(np.maximum(1.+np.take_along_axis(pivots, k[...,np.newaxis], -1)[...,0], 1.e-12))
+	q = np.empty(R.shape[:-2]+(4,))
+	d21 = (R[...,2,1]-R[...,1,2])/s
+	d02 = (R[...,0,2]-R[...,2,0])/s
+	d10 = (R[...,1,0]-R[...,0,1])/s
+	s01 = (R[...,0,1]+R[...,1,0])/s
+	s02 = (R[...,0,2]+R[...,2,0])/s
+	s12 = (R[...,1,2]+R[...,2,1])/s
+	quarter = 0.25*s
+	q[...,0] = np.choose(k, [quarter, d21, d02, d10])
+	q[...,1] = np.choose(k, [d21, quarter, s01, s02])
+	q[...,2] = np.choose(k, [d02, s01, quarter, s12])
+	q[...,3] = np.choose(k, [d10, s02, s12, quarter])
+	return( quat_normalize(q))
+
+
+#####################################################################
+# Quat class
+# ==========
+# A quaternion (w,x,y,z) used to represent rotations. Rotations are
+# composed by multiplying quaternions, which takes 16 multiplies
+# instead of the 27 of a 3x3 matrix product, and a chain of rotations
+# only needs to be turned into a matrix once at the end. It provides:
+# - Construction from an axis and angle (from_axis_angle)
+# - Construction from a rotation matrix (from_mat)
+# - The Hamilton product, and rotation of a Vec3 (__mul__)
+# - The conjugate, which is the inverse rotation (conj)
+# - The axis and angle of the rotation (axis_angle)
+# - Spherical linear interpolation (slerp)
+# - Conversion to an affine matrix about an origin (to_mat)
+class Quat(FloatVec):
+	"""A quaternion for representing rotations"""
+
+	# Quat constructor
+	# ----------------
+	# Takes the four components w, x, y, z.
+	#
+	# Example:
+	# >>> q = Quat(1,0,0,0)
+	def __init__(self, *args):
+		"""Constructor for the Quat class"""
+		super(Quat, self).__init__( 4, *args)
+
+	# from_axis_angle method
+	# ----------------------
+	# Returns the unit quaternion for a rotation by angle about the
+	# axis. The axis does not need to be a unit vector.
+	@classmethod
+	def from_axis_angle(cls, axis, angle):
+		"""Quaternion for a rotation about an axis"""
+		return( cls(quat_from_axis_angle(np.array(axis, dtype=np.float64).flatten(), float(angle))))
+
+	# from_mat method
+	# ---------------
+	# Returns the unit quaternion of the rotation part of a Mat3x3 or
+	# Mat3x4. The translation column of a Mat3x4 is ignored.
+	@classmethod
+	def from_mat(cls, mat):
+		"""Quaternion for the rotation part of a matrix"""
+		if isinstance(mat, (AffineMat, SquareMat)) and len(mat) == 3:
+			return( cls(rotation_to_quat(mat.array[:,:3])))
+		else:
+			raise AttributeError("Quat.from_mat takes a Mat3x3 or Mat3x4")
+
+	# __mul__ method
+	# --------------
+	# Overrides the `*` operator. Quaternion times quaternion is the
+	# Hamilton product, quaternion times a Vec3 rotates the vector,
+	# and quaternion times a scalar is scalar multiplication.
+	#
+	# Example:
+	# >>> q = Quat.from_axis_angle([0,0,1], np.pi/2)
+	# >>> q*Vec3(1,0,0)
+	# Vec3([0.0, 1.0, 0.0])
+	def __mul__(self, other):
+		"""Hamilton product, vector rotation, or scalar multiplication"""
+		if isinstance(other, Quat):
+			return( Quat(quat_mul(self.array.astype(np.float64), other.array.astype(np.float64))))
+		elif isinstance(other, Vec3):
+			R = quat_to_rotation(self.array.astype(np.float64))
+			return( Vec3(np.dot(R, other.array)))
+		elif isinstance(other, numbers.Number):
+			return( Quat([x*other for x in self]))
+		else:
+			raise AttributeError("Quat.__mul__ takes a Quat, Vec3 or scalar")
+
+	def __rmul__(self, other):
+		"""Scalar multiplication from the left"""
+		if isinstance(other, numbers.Number):
+			return( Quat([x*other for x in self]))
+		else:
+			raise AttributeError("Quat.__rmul__ takes a scalar")
+
+	# conj method
+	# -----------
+	# The conjugate of a unit quaternion is the inverse rotation.
+	def conj(self):
+		"""Conjugate of the quaternion"""
+		return( Quat(quat_conj(self.array)))
+
+	# axis_angle method
+	# -----------------
+	# Returns the unit axis and the angle of the rotation. The identity
+	# rotation has an angle of 0 and is given the x axis.
+	def axis_angle(self):
+		"""Axis and angle of the rotation"""
+		q = quat_normalize(self.array.astype(np.float64))
+		if q[0] < 0:
+			q = -q
+		s = np.linalg.norm(q[1:])
+		if s < 1.e-9:
+			return( Vec3(1,0,0), 0.)
+		return( Vec3(q[1:]/s), 2.*np.arctan2(s, q[0]))
+
+	# slerp method
+	# ------------
+	# Spherical linear interpolation to another quaternion, with u=0
+	# giving this quaternion and u=1 the other one.
+	def slerp(self, other, u):
+		"""Spherical linear interpolation to another quaternion"""
+		q0 = self.array.astype(np.float64)
+		q1 = np.array(other.array, dtype=np.float64)
+		if np.dot(q0, q1) < 0:
+			q1 = -q1
+		return( Quat(quat_slerp(q0, q1, float(u))))
+
+	# to_mat method
+	# -------------
+	# Returns the Mat3x4 for the rotation about an origin. The
+	# translation column is o - R*o. The quaternion is normalized first.
+	def to_mat(self, origin=None):
+		"""Affine matrix of the rotation about an origin"""
+		R = quat_to_rotation(quat_normalize(self.array.astype(np.float64)))
+		if origin is None:
+			t = np.zeros(3)
+		else:
+			o = np.array(origin, dtype=np.float64).flatten()
+			t = o-np.dot(R, o)
+		return( Mat3x4(np.append(R, t.reshape(3,1), axis=1)))
@@ -100,6 +100,39 @@ class TestMatrixFunctions(unittest.TestCase):
 		m = Mat3x4([(x+1)**2 for x in range(12)])
 		self.assertTrue( (m*m.inv()).close( eye34, 1.e-3, 1.e-4))
 
+	# Test the batched compose and inverse against the square matrix
+	# products, for a stack of random affine matrices.
+	def test_affine_batch(self):
+		import numpy as np
+		rng = np.random.RandomState(0)
+		a = rng.rand(10,3,4)
+		b = rng.rand(10,3,4)
+		bv = np.array([0,0,0,1.])
+		sq = lambda m: np.concatenate([m, np.broadcast_to(bv, m.shape[:-2]+(1,4))], axis=-2)
+		ab = affine_compose(a, b)
+		self.assertEqual( ab.shape, (10,3,4))
+		self.assertTrue( np.allclose(sq(ab), np.matmul(sq(a), sq(b))))
+		self.assertTrue( np.allclose(affine_compose(a[0], b)[3], affine_compose(a[0], b[3])))
+		eye = np.eye(3,4)
+		self.assertTrue( np.allclose(affine_compose(a, affine_inv(a)), eye))
+		self.assertRaises( ValueError, affine_inv, np.zeros((2,3,4)))
+
+	# Test the identity and pure translation checks
+	def test_affine_kind(self):
+		m = Mat3x4(1,0,0,0,0,1,0,0,0,0,1,0)
+		self.assertTrue( m.is_identity())
+		m = Mat3x4(1,0,0,2,0,1,0,0,0,0,1,-1)
+		self.assertFalse( m.is_identity())
+		self.assertTrue( m.is_translation())
+		m = Mat3x4(0,-1,0,0,1,0,0,0,0,0,1,0)
+		self.assertFalse( m.is_translation())
+		self.assertEqual( m.kind, 'affine')
+		t = Mat3x4(1,0,0,2,0,1,0,0,0,0,1,-1, kind='translation')
+		self.assertEqual( (t*t).kind, 'translation')
+		self.assertEqual( (t*m).kind, 'affine')
+		self.assertEqual( t.inv().kind, 'translation')
+		self.assertRaises( ValueError, Mat3x4, [0]*12, kind='scale')
+
 	# Test turning an affine matrix into a square matrix.
 	def test_tosquare(self):
 		self.assertIsInstance(Mat3x4([0]*12).to_square(), Mat4x4)
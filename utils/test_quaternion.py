@@ -0,0 +1,66 @@
+# Author: Jef Wagner
+# Date: 19-10-2026
+
+from quaternion import *
+from matrix import *
+from vector import *
+
+import numpy as np
+import unittest
+
+class TestQuaternionFunctions(unittest.TestCase):
+
+	# Test the constructors, including the wrong number of elements
+	def test_Constructor(self):
+		q = Quat(1,0,0,0)
+		self.assertIsInstance(q, Quat)
+		q = Quat.from_axis_angle([0,0,2], np.pi/2)
+		self.assertTrue( np.allclose(q.array, [np.sqrt(.5),0,0,np.sqrt(.5)]))
+		self.assertRaises( AttributeError, Quat, 1, 0, 0)
+
+	# Test the Hamilton product, the rotation of a vector, and that a
+	# quaternion times its conjugate is the identity
+	def test_mul_and_conj(self):
+		qz = Quat.from_axis_angle([0,0,1], np.pi/2)
+		qx = Quat.from_axis_angle([1,0,0], np.pi/2)
+		v = (qz*qz)*Vec3(1,0,0)
+		self.assertTrue( np.allclose(v.array, [-1,0,0], atol=1.e-6))
+		v = (qx*qz)*Vec3(1,0,0)
+		self.assertTrue( np.allclose(v.array, [0,0,1], atol=1.e-6))
+		self.assertTrue( np.allclose((qz*qz.conj()).array, [1,0,0,0], atol=1.e-6))
+
+	# Test that converting to a matrix and back gives the same rotation,
+	# and that the matrix about an origin leaves the origin fixed
+	def test_to_and_from_mat(self):
+		q = Quat.from_axis_angle([1,2,3], 2.5)
+		m = q.to_mat([1,1,1])
+		self.assertIsInstance(m, Mat3x4)
+		self.assertTrue( np.allclose((m*Vec3(1,1,1)).array, [1,1,1], atol=1.e-6))
+		q2 = Quat.from_mat(m)
+		self.assertTrue( np.allclose(np.fabs(np.dot(q.array, q2.array)), 1., atol=1.e-6))
+
+	# Test getting back the axis and angle of a rotation
+	def test_axis_angle(self):
+		axis, angle = Quat.from_axis_angle([0,3,4], 1.2).axis_angle()
+		self.assertTrue( np.allclose(axis.array, [0,.6,.8], atol=1.e-6))
+		self.assertAlmostEqual( angle, 1.2, places=5)
+		axis, angle = Quat(1,0,0,0).axis_angle()
+		self.assertEqual( angle, 0.)
+
+	# Test slerp halfway between two rotations about the same axis, and
+	# the batched functions on a stack of quaternions
+	def test_slerp_and_batch(self):
+		q0 = Quat.from_axis_angle([0,1,0], 0.)
+		q1 = Quat.from_axis_angle([0,1,0], 1.)
+		qh = q0.slerp(q1, 0.5)
+		self.assertTrue( np.allclose(qh.array, Quat.from_axis_angle([0,1,0], 0.5).array, atol=1.e-6))
+		angles = np.linspace(0, np.pi, 7)
+		qs = quat_from_axis_angle([0,0,1], angles)
+		R = quat_to_rotation(qs)
+		self.assertEqual( R.shape, (7,3,3))
+		self.assertTrue( np.allclose(rotation_to_quat(R), qs))
+		q = quat_mul(qs, quat_conj(qs))
+		self.assertTrue( np.allclose(q, [1,0,0,0]))
+
+if __name__ == '__main__':
+	unittest.main()
@@ -5,6 +5,7 @@ from vector import *
 
 import math
 import unittest
+import numpy as np
 
 class TestVectorFunctions(unittest.TestCase):
 
@@ -114,6 +115,14 @@ class TestVectorFunctions(unittest.TestCase):
     face_list = [IVec3([2,4,6]),IVec3([5,7,9])]
     face_list = [iv.reduce(3) for iv in face_list]
     self.assertEqual( face_list, [(2,3,5),(4,6,8)])
+    self.assertEqual( IVec3(0,40000,70000)[2], 70000)
+
+  # Test the index type picked for the number of vertices
+  def test_index_dtype(self):
+    self.assertEqual( index_dtype(1000), np.uint16)
+    self.assertEqual( index_dtype(70000), np.uint32)
+    self.assertEqual( index_dtype(2**33), np.int64)
+    self.assertEqual( restart_index(np.uint16), 0xFFFF)
 
 if __name__ == '__main__':
   unittest.main()
\ No newline at end of file
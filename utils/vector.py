@@ -5,7 +5,48 @@ import numpy as np
 import numbers
 
 __all__ = ['Vec2', 'Vec3', 'Vec4', 
-					 'IVec2', 'IVec3', 'IVec4']
+					 'IVec2', 'IVec3', 'IVec4',
+					 'index_dtype', 'restart_index']
+
+#####################################################################
+# Precision policy
+# ================
+# Positions, colors and matrices are stored as float32, the type they
+# are exported in, and sums over many of them (centers, areas, lengths)
+# are added up in float64, so the error does not grow with the size of
+# the mesh. A vector class with other storage can be made by setting
+# its `dtype` class attribute, e.g.
+#
+# >>> class DVec3(Vec3):
+# ...   dtype = np.float64
+storage_dtype = np.float32
+reduction_dtype = np.float64
+
+# index_dtype function
+# --------------------
+# Returns the smallest integer type for indices into an array of n
+# vertices: uint16 or uint32 if every index fits below the largest
+# value of the type, which is kept free as the restart index of a strip
+# buffer, and int64 otherwise.
+#
+# Example:
+# >>> index_dtype(1000)
+# <class 'numpy.uint16'>
+def index_dtype(n):
+	"""Returns the integer type of indices into n vertices"""
+	if n <= 0xFFFF:
+		return( np.uint16)
+	if n <= 0xFFFFFFFF:
+		return( np.uint32)
+	return( np.int64)
+
+# restart_index function
+# ----------------------
+# The index that ends one strip and starts the next in an index buffer
+# of the given type, the largest value of the type.
+def restart_index(dtype):
+	"""Returns the primitive restart index of an index type"""
+	return( int(np.iinfo(dtype).max))
 
 #####################################################################
 # BaseVec
@@ -251,12 +292,15 @@ class GenVec(BaseVec):
 class FloatVec(GenVec):
 	"""A vector of floats, a base class for Vec2, Vec3, and Vec4"""
 
+	# The type the elements are stored as
+	dtype = storage_dtype
+
 	# FloatVec constructor
 	# --------------------
 	# Simply passes the initialization to the parent classes constructor
 	def __init__(self, n, *args):
 		"""Constructor for the FloatVec method"""
-		super(FloatVec,self).__init__(np.float32, n, *args)
+		super(FloatVec,self).__init__(self.dtype, n, *args)
 
 	# inner method
 	# ------------
@@ -399,10 +443,14 @@ class Vec4(FloatVec):
 class IntVec(GenVec):
 	"""A vector of integers, a base class for IVec2 and IVec3"""
 
+	# The type the elements are stored as, wide enough for an index
+	# into any vertex array
+	dtype = np.int64
+
 	# IntVec constructor
 	# ------------------
 	def __init__(self, n, *args):
-		super(IntVec,self).__init__( np.int16, n, *args)
+		super(IntVec,self).__init__( self.dtype, n, *args)
 
 	# reduce method
 	# ------------------------